@@ -0,0 +1,76 @@
+"""
+Benchmark: the pooled AsyncLmstudioClient behind LmstudioLLM._acall vs. the
+old asyncio.to_thread path.
+
+Both paths talk to the local stub server. The thread-wrapped path mimics the
+previous implementation, where each request occupies a worker of the default
+executor while it blocks on the response.
+
+Run from the repository root::
+
+    python benchmarks/bench_async_client.py --requests 500 --latency 0.05
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from llms.async_client import AsyncLmstudioClient  # noqa: E402
+from stub_server import start_stub_server  # noqa: E402
+
+MESSAGES = [{"role": "user", "content": "ping"}]
+
+
+async def run_thread_wrapped(base_url: str, n: int) -> float:
+    client = httpx.Client(base_url=base_url, timeout=300)
+    payload = {"model": "stub-model", "messages": MESSAGES}
+
+    def blocking_call() -> str:
+        return client.post("/chat/completions", json=payload).json()["choices"][0]["message"]["content"]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(asyncio.to_thread(blocking_call) for _ in range(n)))
+    elapsed = time.perf_counter() - start
+    client.close()
+    return elapsed
+
+
+async def run_native_async(client: AsyncLmstudioClient, n: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(client.chat_completion("stub-model", MESSAGES) for _ in range(n)))
+    elapsed = time.perf_counter() - start
+    await client.aclose()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the pooled async client with asyncio.to_thread.")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05, help="stub server latency in seconds")
+    parser.add_argument("--max-connections", type=int, default=256)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(args.latency)
+    try:
+        client = AsyncLmstudioClient(base_url, max_connections=args.max_connections)
+        threaded = asyncio.run(run_thread_wrapped(base_url, args.requests))
+        native = asyncio.run(run_native_async(client, args.requests))
+    finally:
+        server.shutdown()
+
+    print(f"requests={args.requests} latency={args.latency}s default_executor_workers={min(32, (os.cpu_count() or 1) + 4)}")
+    print(f"{'path':<16}{'seconds':>10}{'req/s':>10}")
+    print(f"{'to_thread':<16}{threaded:>10.2f}{args.requests / threaded:>10.1f}")
+    print(f"{'native async':<16}{native:>10.2f}{args.requests / native:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
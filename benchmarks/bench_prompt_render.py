@@ -0,0 +1,80 @@
+"""
+Benchmark: per-step prompt overhead of AdvancedAgent.plan.
+
+Compares the previous hot path with the compiled prompt. The previous path
+built a throwaway ``create_prompt(tools)`` template and formatted it, then
+``LLMChain`` formatted the agent prompt again. The compiled path fills the
+slots of a prompt compiled once per tool set. A fake LLM keeps the model out
+of the measurement; ``plan`` is timed end to end as well.
+
+Run from the repository root::
+
+    python benchmarks/bench_prompt_render.py --steps 20000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from typing import Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from langchain_core.language_models.fake import FakeListLLM  # noqa: E402
+from langchain_core.prompts import PromptTemplate  # noqa: E402
+from langchain_core.tools import Tool  # noqa: E402
+
+from agents.advanced_agent import AdvancedAgent  # noqa: E402
+from agents.prompts import compile_prompt  # noqa: E402
+
+TEMPLATE = (
+    "You are a very advanced agent that integrates web search and presentation tools.\n"
+    "You can use these tools:\n{tools}\n\nAnswer with one of [{tool_names}] or a final answer.\n\n"
+    "User Query: {input}\n\n{agent_scratchpad}"
+)
+
+
+def per_step(fn: Callable[[], object], steps: int) -> float:
+    start = time.perf_counter()
+    for _ in range(steps):
+        fn()
+    return (time.perf_counter() - start) / steps * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--steps", type=int, default=20000)
+    parser.add_argument("--tools", type=int, default=10)
+    args = parser.parse_args()
+
+    tools = [
+        Tool(name=f"tool_{i}", func=lambda text: text, description=f"Tool number {i} does one specific thing well.")
+        for i in range(args.tools)
+    ]
+    prompt = PromptTemplate.from_template(TEMPLATE)
+    values = {"input": "Generate a presentation on latest tech innovations.", "agent_scratchpad": ""}
+    tool_values = {
+        "tools": "\n".join(f"{tool.name}: {tool.description}" for tool in tools),
+        "tool_names": ", ".join(tool.name for tool in tools),
+    }
+
+    def previous_render() -> str:
+        AdvancedAgent.create_prompt(tools).format()
+        return prompt.format_prompt(**values, **tool_values).to_string()
+
+    compiled = compile_prompt(prompt, tools)
+    assert compiled.render(values) == previous_render()
+
+    agent = AdvancedAgent(llm=FakeListLLM(responses=["done"]), tools=tools, prompt_template=prompt)
+
+    print(f"{args.tools} tools, {args.steps} steps")
+    print(f"  previous render (create_prompt + format): {per_step(previous_render, args.steps):8.2f} us/step")
+    print(f"  compiled render:                          {per_step(lambda: compiled.render(values), args.steps):8.2f} us/step")
+    print(f"  compile_prompt (cached lookup):           {per_step(lambda: compile_prompt(prompt, tools), 1000):8.2f} us")
+    plan_steps = max(args.steps // 20, 100)
+    print(f"  AdvancedAgent.plan, fake LLM:             {per_step(lambda: agent.plan([], **values), plan_steps):8.2f} us/step")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Benchmark: prompt size and latency with all tools vs. the top-k selected tools.
+
+Builds synthetic catalogues of 10 to 1000 tools and renders AdvancedAgent
+prompts for queries aimed at one tool each. It compares putting every tool
+description in the prompt with the top-k tools from a ToolIndex (BM25, or
+BM25 blended with HashingVectorizer embeddings). For each catalogue it
+reports:
+
+* prompt tokens (``agents.memory.estimate_tokens``),
+* the time to select tools and render the prompt,
+* recall@k (how often the targeted tool made it into the prompt),
+* the prefill time those tokens cost at ``--prefill-tps``, and end-to-end
+  latency against the stub server when ``--stub`` is given. The stub models
+  prefill with the same rate.
+
+Run from the repository root::
+
+    python benchmarks/bench_tool_selection.py --k 5 --queries 200
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from langchain_core.language_models.fake import FakeListLLM  # noqa: E402
+from langchain_core.prompts import PromptTemplate  # noqa: E402
+from langchain_core.tools import Tool  # noqa: E402
+
+from agents.advanced_agent import AdvancedAgent  # noqa: E402
+from agents.memory import estimate_tokens  # noqa: E402
+from llms.semantic_cache import HashingVectorizer  # noqa: E402
+from tools.retrieval import ToolIndex  # noqa: E402
+
+TEMPLATE = (
+    "You are a very advanced agent that can use these tools:\n{tools}\n\n"
+    "Answer with one of [{tool_names}] or a final answer.\n\nUser Query: {input}\n\n{agent_scratchpad}"
+)
+VERBS = ["search", "fetch", "create", "convert", "summarize", "translate", "schedule", "analyze", "send", "compare"]
+NOUNS = [
+    "weather", "stocks", "email", "calendar", "invoice", "slides", "wikipedia", "news", "recipe", "flight",
+    "hotel", "currency", "contract", "ticket", "playlist", "repository", "spreadsheet", "map", "patent", "receipt",
+]
+DETAILS = ["for a city", "by date range", "with references", "as a table", "for a user", "in bulk", "from a url",
+           "with filters", "by keyword", "for a region", "with a summary", "in a given language"]
+
+
+def make_catalogue(size: int, rng: random.Random) -> List[Tool]:
+    tools = []
+    for i in range(size):
+        verb, noun, detail = VERBS[i % len(VERBS)], NOUNS[(i // len(VERBS)) % len(NOUNS)], rng.choice(DETAILS)
+        extra = rng.sample(NOUNS, 2)
+        description = f"{verb.capitalize()} {noun} records {detail}; also handles {extra[0]} and {extra[1]} data. Variant {i}."
+        tools.append(Tool(name=f"{verb}_{noun}_{i}", func=lambda text: text, description=description))
+    return tools
+
+
+def make_queries(tools: List[Tool], count: int, rng: random.Random) -> List[Tuple[str, str]]:
+    queries = []
+    for _ in range(count):
+        tool = rng.choice(tools)
+        verb, noun, _ = tool.name.split("_")
+        detail = tool.description.split(" records ")[1].split(";")[0]
+        # Paraphrased, without the variant number, so several tools can match equally well.
+        queries.append((f"could you {verb} the {noun} {detail}?", tool.name))
+    return queries
+
+
+def run(size: int, args: argparse.Namespace, base_url: str = "") -> None:
+    rng = random.Random(size)
+    tools = make_catalogue(size, rng)
+    queries = make_queries(tools, args.queries, rng)
+    prompt = PromptTemplate.from_template(TEMPLATE)
+    llm = FakeListLLM(responses=["done"])
+    setups = [
+        ("all tools", AdvancedAgent(llm=llm, tools=tools, prompt_template=prompt)),
+        (f"bm25 top-{args.k}", AdvancedAgent(llm=llm, tools=tools, prompt_template=prompt, max_tools=args.k)),
+        (f"hybrid top-{args.k}", AdvancedAgent(
+            llm=llm, tools=tools, prompt_template=prompt, max_tools=args.k,
+            tool_index=ToolIndex(tools, embedder=HashingVectorizer()),
+        )),
+    ]
+    print(f"{size} tools")
+    for label, agent in setups:
+        tokens = hits = 0
+        start = time.perf_counter()
+        for query, target in queries:
+            rendered = agent._render_prompt([], input=query)
+            tokens += estimate_tokens(rendered)
+            hits += f"{target}:" in rendered
+        render_ms = (time.perf_counter() - start) / len(queries) * 1e3
+        average = tokens / len(queries)
+        line = (
+            f"  {label:14s} {average:9.0f} prompt tokens  select+render {render_ms:7.3f} ms"
+            f"  recall {hits / len(queries):6.1%}  prefill {average / args.prefill_tps * 1e3:8.1f} ms"
+        )
+        if base_url:
+            line += f"  stub e2e {stub_latency(base_url, agent, queries[:args.stub_queries]):8.1f} ms"
+        print(line)
+
+
+def stub_latency(base_url: str, agent: AdvancedAgent, queries: List[Tuple[str, str]]) -> float:
+    import httpx
+
+    start = time.perf_counter()
+    with httpx.Client(timeout=None) as client:
+        for query, _ in queries:
+            rendered = agent._render_prompt([], input=query)
+            client.post(f"{base_url}/chat/completions", json={"messages": [{"role": "user", "content": rendered}]})
+    return (time.perf_counter() - start) / len(queries) * 1e3
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 100, 250, 500, 1000])
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--prefill-tps", type=float, default=2000.0, help="prompt tokens the model prefills per second")
+    parser.add_argument("--stub", action="store_true", help="also time requests against the local stub server")
+    parser.add_argument("--stub-queries", type=int, default=20)
+    args = parser.parse_args()
+
+    base_url = ""
+    if args.stub:
+        sys.path.insert(0, os.path.dirname(__file__))
+        from stub_server import start_stub_server
+
+        server, base_url = start_stub_server(0.0, prefill_tps=args.prefill_tps)
+    for size in args.sizes:
+        run(size, args, base_url)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Local stub of the LM Studio OpenAI-compatible server, used by the benchmarks.
+
+It answers ``POST /v1/chat/completions`` after a fixed artificial latency,
+so throughput numbers reflect the client side rather than a real model.
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+REPLY = "<think>stub reasoning</think>Paris is the capital of France."
+
+
+def make_handler(latency: float, prefill_tps: float = 0.0) -> type:
+    class StubHandler(BaseHTTPRequestHandler):
+        # HTTP/1.1 so clients can keep connections alive between requests.
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            delay = latency
+            if prefill_tps:
+                # Prefill grows with the prompt: about four characters per token.
+                prompt_chars = sum(len(str(message.get("content", ""))) for message in body.get("messages", []))
+                delay += prompt_chars / 4 / prefill_tps
+            time.sleep(delay)
+            if body.get("stream"):
+                self._stream_reply(body)
+            else:
+                self._json_reply(body)
+
+        def _json_reply(self, body: dict) -> None:
+            payload = json.dumps({
+                "id": "stub",
+                "object": "chat.completion",
+                "model": body.get("model", "stub"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": REPLY}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 12, "completion_tokens": 9, "total_tokens": 21},
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _stream_reply(self, body: dict) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            for token in REPLY.split(" "):
+                chunk = {"choices": [{"index": 0, "delta": {"content": token + " "}}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.close_connection = True
+
+    return StubHandler
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Large backlog so hundreds of concurrent connects are not refused.
+    request_queue_size = 1024
+
+
+def start_stub_server(latency: float = 0.05, prefill_tps: float = 0.0) -> Tuple[StubServer, str]:
+    """Start the stub on a free port in a daemon thread and return (server, base_url)."""
+    server = StubServer(("127.0.0.1", 0), make_handler(latency, prefill_tps))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}/v1"
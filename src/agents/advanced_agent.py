@@ -1,15 +1,14 @@
-from typing import List, Any, Dict, Optional, Union
+from typing import List, Any, AsyncIterator, Dict, Iterator, Optional, Sequence, Union
 
-from pydantic import Field
-from langchain.agents import Agent, AgentExecutor, AgentOutputParser
+from pydantic import Field, PrivateAttr
+from langchain.agents import AgentExecutor, AgentOutputParser, BaseSingleActionAgent
 from langchain_core.tools import BaseTool, Tool
-from langchain.schema import AgentAction, AgentFinish
-from langchain.prompts import BasePromptTemplate, PromptTemplate
-from langchain.llms.base import LLM
-from langchain_core.runnables import RunnableSequence  # Use RunnableSequence instead of LLMChain
-from langchain.chains.llm import LLMChain
+from langchain_core.agents import AgentAction, AgentFinish
+from langchain_core.prompts import BasePromptTemplate, PromptTemplate
+from langchain_core.language_models.llms import LLM
+from langchain_core.runnables import RunnableSequence
+from agents.prompts import CompiledPrompt, ToolSignature, compile_prompt, tool_signature
 from llms.lmstudio_llm import get_llm
-from tools import web_search_google, ppt_tool, ref_tool
 
 # A simple custom output parser that expects a plain text answer.
 class SimpleOutputParser(AgentOutputParser):
@@ -17,21 +16,29 @@ class SimpleOutputParser(AgentOutputParser):
         # Here we assume the output is the final answer.
         return AgentFinish({"output": text.strip()}, text.strip())
 
-class AdvancedAgent(Agent):
+class AdvancedAgent(BaseSingleActionAgent):
     """
-    Custom Agent that inherits from Agent.
-    This agent uses a RunnableSequence (prompt | llm) to process user input using a provided prompt template.
+    Custom single-action agent that runs its prompt straight on the LLM runnable.
+    The prompt is compiled once per tool set (see agents.prompts); planning uses the
+    LLM's invoke/ainvoke, and batch_plan/stream use its batch and stream fast paths.
     Allowed tools (by name) should match those provided to the executor.
     """
+    llm: LLM = Field(...)
     allowed_tools: Optional[List[str]] = Field(default=None)
     tools: List[Any] = Field(...)
     prompt_template: BasePromptTemplate = Field(...)
     verbose: bool = Field(default=False)
     output_parser: AgentOutputParser = Field(default_factory=SimpleOutputParser)
-    # Replace LLMChain with a RunnableSequence
-    runnable_chain: RunnableSequence = Field(...) # This is forward compatible for future use case
-    llm_chain: LLMChain = Field(default=None)
-    # The LLMChain is now a part of the RunnableSequence, so we don't need it separately. But for the sake of compatibilty we have to keep it
+    # Opt-in: expose the deprecated LLMChain interface as ``llm_chain``.
+    legacy_llm_chain: bool = Field(default=False)
+    # With ``max_tools`` set, only the top-k tools for each query go into the
+    # prompt, ranked by ``tool_index`` (a tools.retrieval.ToolIndex over ``tools`` by default).
+    max_tools: Optional[int] = Field(default=None)
+    tool_index: Any = Field(default=None)
+    # Prompt compiled for the current tool set, see agents.prompts.
+    _compiled_prompt: Optional[CompiledPrompt] = PrivateAttr(default=None)
+    _compiled_for: Optional[ToolSignature] = PrivateAttr(default=None)
+    _llm_chain: Any = PrivateAttr(default=None)
 
     def __init__(
         self,
@@ -40,23 +47,39 @@ class AdvancedAgent(Agent):
         prompt_template: BasePromptTemplate,
         verbose: bool = False,
         allowed_tools: Optional[List[str]] = None,
+        legacy_llm_chain: bool = False,
+        max_tools: Optional[int] = None,
+        tool_index: Any = None,
         **kwargs: Any
     ):
-        runnable_chain = prompt_template | llm
-        llm_chain = LLMChain(llm=llm, prompt=prompt_template)
-        # Call Agent's __init__ as a Pydantic model.
         super().__init__(
+            llm=llm,  # type: ignore
             tools=tools,               # type: ignore
-            prompt_template=prompt_template,  # type: ignore
+            prompt_template=_with_scratchpad(prompt_template),  # type: ignore
             verbose=verbose,           # type: ignore
             allowed_tools=allowed_tools,  # type: ignore
-            llm_chain = llm_chain, #type: ignore
-            runnable_chain = runnable_chain, # type: ignore
+            legacy_llm_chain=legacy_llm_chain,  # type: ignore
+            max_tools=max_tools,  # type: ignore
+            tool_index=tool_index,  # type: ignore
             **kwargs
         )
-        # Use the RunnableSequence pattern: combine the prompt and LLM.
-        # This is equivalent to: chain = prompt_template | llm
 
+    @property
+    def runnable_chain(self) -> RunnableSequence:
+        """The agent's prompt and LLM composed as ``prompt_template | llm``."""
+        return self.prompt_template | self.llm  # type: ignore
+
+    @property
+    def llm_chain(self) -> Any:
+        """Compatibility shim: an LLMChain over the same prompt and LLM, if opted in."""
+        if not self.legacy_llm_chain:
+            raise AttributeError(
+                "AdvancedAgent no longer uses an LLMChain; pass legacy_llm_chain=True for the old interface."
+            )
+        if self._llm_chain is None:
+            from langchain.chains.llm import LLMChain
+            self._llm_chain = LLMChain(llm=self.llm, prompt=self.prompt_template)
+        return self._llm_chain
 
     @property
     def input_keys(self) -> List[str]:
@@ -74,6 +97,9 @@ class AdvancedAgent(Agent):
     def llm_prefix(self) -> str:
         return ""
 
+    def get_allowed_tools(self) -> Optional[List[str]]:
+        return self.allowed_tools
+
     @classmethod
     def _get_default_output_parser(cls, **kwargs: Any) -> AgentOutputParser:
         return SimpleOutputParser()
@@ -92,16 +118,109 @@ class AdvancedAgent(Agent):
         **kwargs: Any
     ) -> Union[AgentAction, AgentFinish]:
         """
-        Create a plan by appending the user query to the base prompt.
+        Create a plan by rendering the compiled prompt with the user query.
+        """
+        prompt = self._render_prompt(intermediate_steps, **kwargs)
+        llm_output = self.llm.invoke(prompt, config={"callbacks": callbacks})
+        return self._parse_llm_output(llm_output)
+
+    async def aplan(
+        self,
+        intermediate_steps: List[tuple[AgentAction, str]],
+        callbacks: Optional[Any] = None,
+        **kwargs: Any
+    ) -> Union[AgentAction, AgentFinish]:
+        """
+        Async version of plan; the LLM call does not block the event loop.
+        """
+        prompt = self._render_prompt(intermediate_steps, **kwargs)
+        llm_output = await self.llm.ainvoke(prompt, config={"callbacks": callbacks})
+        return self._parse_llm_output(llm_output)
+
+    def batch_plan(self, inputs: Sequence[Dict[str, Any]], callbacks: Optional[Any] = None) -> List[Union[AgentAction, AgentFinish]]:
+        """
+        Plan the first step for many inputs with one LLM batch call.
+        """
+        prompts = [self._render_prompt([], **values) for values in inputs]
+        outputs = self.llm.batch(prompts, config={"callbacks": callbacks})
+        return [self._parse_llm_output(output) for output in outputs]
+
+    async def abatch_plan(self, inputs: Sequence[Dict[str, Any]], callbacks: Optional[Any] = None) -> List[Union[AgentAction, AgentFinish]]:
+        """
+        Async batch_plan; LmstudioLLM sends the prompts concurrently.
+        """
+        prompts = [self._render_prompt([], **values) for values in inputs]
+        outputs = await self.llm.abatch(prompts, config={"callbacks": callbacks})
+        return [self._parse_llm_output(output) for output in outputs]
+
+    def stream(
+        self,
+        intermediate_steps: List[tuple[AgentAction, str]],
+        callbacks: Optional[Any] = None,
+        **kwargs: Any
+    ) -> Iterator[str]:
+        """
+        Stream the text of the next step as the LLM produces it.
         """
-        user_input = kwargs.get("input", "")
-        # Construct the full prompt using our prompt template.
-        base_prompt = self.create_prompt(self.tools).format()
-        full_prompt = f"{base_prompt}\nUser Query: {user_input}"
+        prompt = self._render_prompt(intermediate_steps, **kwargs)
+        yield from self.llm.stream(prompt, config={"callbacks": callbacks})
+
+    async def astream(
+        self,
+        intermediate_steps: List[tuple[AgentAction, str]],
+        callbacks: Optional[Any] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[str]:
+        prompt = self._render_prompt(intermediate_steps, **kwargs)
+        async for chunk in self.llm.astream(prompt, config={"callbacks": callbacks}):
+            yield chunk
+
+    @property
+    def compiled_prompt(self) -> CompiledPrompt:
+        """The prompt compiled for the current tools; recompiled only when they change."""
+        signature = tool_signature(self.tools)
+        if self._compiled_prompt is None or signature != self._compiled_for:
+            self._compiled_prompt = compile_prompt(self.prompt_template, self.tools)
+            self._compiled_for = signature
+        return self._compiled_prompt
+
+    def select_tools(self, query: str) -> List[Any]:
+        """The tools whose descriptions go into the prompt for ``query``."""
+        if self.max_tools is None or len(self.tools) <= self.max_tools:
+            return self.tools
+        if self.tool_index is None:
+            from tools.retrieval import ToolIndex
+            self.tool_index = ToolIndex(self.tools)
+        # A shared index (e.g. from_catalog) may know tools this agent cannot run.
+        by_name = {tool.name: tool for tool in self.tools}
+        names = self.tool_index.select_names(query, k=self.max_tools, allowed=by_name)
+        return [by_name[name] for name in names] or self.tools[:self.max_tools]
+
+    def _render_prompt(self, intermediate_steps: List[tuple[AgentAction, str]], **kwargs: Any) -> str:
+        if self.max_tools is None:
+            compiled = self.compiled_prompt
+        else:
+            # compile_prompt memoizes per tool set, so repeated selections reuse their prompt.
+            compiled = compile_prompt(self.prompt_template, self.select_tools(str(kwargs.get("input", ""))))
+        variables = compiled.input_variables
+        if len(variables) == 1:
+            # A single-variable prompt takes the user query, whatever its name.
+            prompt = compiled.render({variables[0]: kwargs.get("input", "")})
+        else:
+            values = {**kwargs, "agent_scratchpad": self._construct_scratchpad(intermediate_steps)}
+            prompt = compiled.render({name: values.get(name, "") for name in variables})
         if self.verbose:
-            print("AdvancedAgent plan prompt:", full_prompt)
-        # Invoke the chain using the user input.
-        llm_output = self.llm_chain.invoke(user_input)
+            print("AdvancedAgent plan prompt:", prompt)
+        return prompt
+
+    def _construct_scratchpad(self, intermediate_steps: List[tuple[AgentAction, str]]) -> str:
+        thoughts = ""
+        for action, observation in intermediate_steps:
+            thoughts += action.log
+            thoughts += f"\n{self.observation_prefix}{observation}\n{self.llm_prefix}"
+        return thoughts
+
+    def _parse_llm_output(self, llm_output: Any) -> Union[AgentAction, AgentFinish]:
         if self.verbose:
             print("LLM raw output:", llm_output)
         # Extract the string output from llm_output.
@@ -126,10 +245,25 @@ class AdvancedAgent(Agent):
         tools: List[Any],
         prompt_template: BasePromptTemplate,
         verbose: bool = False,
+        max_tools: Optional[int] = None,
+        tool_index: Any = None,
     ) -> AgentExecutor:
-        agent = cls(llm=llm, tools=tools, prompt_template=prompt_template, verbose=verbose)
+        agent = cls(
+            llm=llm, tools=tools, prompt_template=prompt_template, verbose=verbose,
+            max_tools=max_tools, tool_index=tool_index,
+        )
         return AgentExecutor.from_agent_and_tools(agent=agent, tools=tools, verbose=verbose)
 
+def _with_scratchpad(prompt_template: BasePromptTemplate) -> BasePromptTemplate:
+    # The langchain Agent base class appended the scratchpad to prompts that
+    # lack one; keep doing so, on a copy, so existing prompts render the same.
+    if "agent_scratchpad" in prompt_template.input_variables or not isinstance(prompt_template, PromptTemplate):
+        return prompt_template
+    return prompt_template.model_copy(update={
+        "template": prompt_template.template + "\n\n{agent_scratchpad}",
+        "input_variables": [*prompt_template.input_variables, "agent_scratchpad"],
+    })
+
 if __name__ == "__main__":
     model = get_llm()
     from pprint import pprint
@@ -142,6 +276,7 @@ if __name__ == "__main__":
         template="You are a very advanced agent that integrates web search and presentation tools.\n\n{agent_scratchpad}"
     )
 
+    from tools import web_search_google, ppt_tool, ref_tool
     accessible_tools = [web_search_google, ppt_tool, ref_tool]
 
     agent = AdvancedAgent(
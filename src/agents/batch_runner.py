@@ -0,0 +1,221 @@
+"""
+Batch Runner
+------------
+
+Pushes a large stream of queries through an agent executor with a bounded
+number of runs in flight.
+
+* Inputs stream from a JSONL file or any (async) iterator and are never all
+  held in memory. Each record is ``{"id": ..., "input": ...}`` or a plain
+  string. Records without an id use their position in the stream.
+* ``concurrency`` workers pull from a small queue and ``ainvoke`` the
+  executor. Up to N runs are in flight, and they share one event loop and
+  the pooled LLM client.
+* Results are appended to a JSONL file as they complete. That file doubles
+  as the checkpoint: a rerun skips every id already written, so a crashed
+  job resumes where it stopped.
+* Throughput and latency percentiles are tracked and can be reported while
+  the job runs.
+
+Usage::
+
+    executor = AdvancedAgent.create_executor(llm, tools, prompt)
+    stats = BatchRunner(executor, concurrency=16).run("queries.jsonl", "results.jsonl")
+    print(stats.as_dict())
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, Iterable, List, Optional, Set, Union
+
+Record = Dict[str, Any]
+InputSource = Union[str, Iterable[Any], AsyncIterable[Any]]
+
+
+def read_jsonl(path: str) -> Iterable[Any]:
+    """Yield one parsed record per non-empty line of ``path``."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def completed_ids(path: str, include_failed: bool = False) -> Set[str]:
+    """Ids already written to an output file; a torn last line is ignored."""
+    done: Set[str] = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if include_failed or record.get("error") is None:
+                done.add(str(record["id"]))
+    return done
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank percentile.
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+@dataclass
+class BatchStats:
+    completed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
+    finished_at: Optional[float] = None
+    latencies: List[float] = field(default_factory=list)
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        """Finished runs (ok or failed) per second."""
+        return (self.completed + self.failed) / self.elapsed if self.elapsed > 0 else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        return {
+            "completed": self.completed,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "elapsed": self.elapsed,
+            "throughput": self.throughput,
+            "latency_p50": percentile(latencies, 0.50),
+            "latency_p95": percentile(latencies, 0.95),
+            "latency_p99": percentile(latencies, 0.99),
+            "latency_max": latencies[-1] if latencies else 0.0,
+        }
+
+
+class BatchRunner:
+    """Runs an executor (anything with ``ainvoke``) over a stream of inputs, N at a time."""
+
+    def __init__(
+        self,
+        executor: Any,
+        concurrency: int = 8,
+        timeout: Optional[float] = None,
+        input_key: str = "input",
+        output_key: str = "output",
+        retry_failed: bool = True,
+        report_interval: Optional[float] = None,
+        on_report: Optional[Callable[[BatchStats], None]] = None,
+    ):
+        self.executor = executor
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.input_key = input_key
+        self.output_key = output_key
+        # On resume, rerun records that failed last time (their new result is
+        # appended; the last record per id wins).
+        self.retry_failed = retry_failed
+        self.report_interval = report_interval
+        self.on_report = on_report or (lambda stats: print(f"batch: {stats.as_dict()}"))
+
+    def run(self, inputs: InputSource, output_path: str, resume: bool = True) -> BatchStats:
+        return asyncio.run(self.arun(inputs, output_path, resume=resume))
+
+    async def arun(self, inputs: InputSource, output_path: str, resume: bool = True) -> BatchStats:
+        done = completed_ids(output_path, include_failed=not self.retry_failed) if resume else set()
+        stats = BatchStats()
+        queue: "asyncio.Queue[Optional[Record]]" = asyncio.Queue(maxsize=self.concurrency * 2)
+        mode = "a" if resume else "w"
+        with open(output_path, mode, encoding="utf-8") as out:
+            if resume:
+                _terminate_torn_line(out, output_path)
+
+            async def produce() -> None:
+                async for record in self._records(inputs):
+                    if record["id"] in done:
+                        stats.skipped += 1
+                        continue
+                    await queue.put(record)
+                for _ in range(self.concurrency):
+                    await queue.put(None)
+
+            async def work() -> None:
+                while True:
+                    record = await queue.get()
+                    if record is None:
+                        return
+                    result = await self._run_one(record, stats)
+                    out.write(json.dumps(result, default=str) + "\n")
+                    out.flush()
+
+            reporter = asyncio.create_task(self._report(stats)) if self.report_interval else None
+            try:
+                await asyncio.gather(produce(), *(work() for _ in range(self.concurrency)))
+            finally:
+                if reporter is not None:
+                    reporter.cancel()
+                stats.finished_at = time.perf_counter()
+        return stats
+
+    async def _run_one(self, record: Record, stats: BatchStats) -> Record:
+        start = time.perf_counter()
+        result: Record = {"id": record["id"], "input": record["input"], "output": None, "error": None}
+        try:
+            response = await asyncio.wait_for(self.executor.ainvoke({self.input_key: record["input"]}), self.timeout)
+            result["output"] = response.get(self.output_key) if isinstance(response, dict) else response
+            stats.completed += 1
+        except asyncio.TimeoutError:
+            result["error"] = f"timed out after {self.timeout}s"
+            stats.failed += 1
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+            stats.failed += 1
+        result["latency"] = time.perf_counter() - start
+        stats.latencies.append(result["latency"])
+        return result
+
+    async def _records(self, inputs: InputSource) -> AsyncIterator[Record]:
+        source: Union[Iterable[Any], AsyncIterable[Any]] = read_jsonl(inputs) if isinstance(inputs, str) else inputs
+        position = 0
+        if isinstance(source, AsyncIterable):
+            async for item in source:
+                yield self._record(item, position)
+                position += 1
+        else:
+            for item in source:
+                yield self._record(item, position)
+                position += 1
+                if position % 256 == 0:
+                    # Reading a file is blocking; let the workers run.
+                    await asyncio.sleep(0)
+
+    def _record(self, item: Any, position: int) -> Record:
+        if isinstance(item, dict):
+            return {"id": str(item.get("id", position)), "input": item[self.input_key]}
+        return {"id": str(position), "input": item}
+
+    async def _report(self, stats: BatchStats) -> None:
+        assert self.report_interval is not None
+        while True:
+            await asyncio.sleep(self.report_interval)
+            self.on_report(stats)
+
+
+def _terminate_torn_line(out: Any, path: str) -> None:
+    # A crash mid-write can leave a partial last line; start on a fresh one.
+    if out.tell() == 0:
+        return
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            out.write("\n")
@@ -0,0 +1,577 @@
+"""
+Conversation Checkpointer
+-------------------------
+
+A LangGraph checkpointer that keeps conversations in SQLite instead of
+process memory.
+
+``MemorySaver`` holds a full copy of every channel for every step of every
+thread, never lets go of it, and loses all of it on restart.
+``SQLiteDeltaSaver`` differs in three ways:
+
+* Append-only list channels (``messages``) are written as deltas. A step that
+  adds two messages writes those two messages, not the whole history. A full
+  snapshot is written every ``snapshot_every`` deltas, or when the list was
+  rewritten rather than extended (``RemoveMessage``, edits). A value is
+  therefore rebuilt from one snapshot plus a bounded chain of deltas.
+* Checkpoints, metadata and values are stored in the serializer's msgpack
+  encoding.
+* To compute deltas, the latest value of each channel is kept per thread.
+  Threads leave that cache least recently used first, or once they have been
+  idle for ``idle_ttl`` seconds, so an idle conversation holds no RAM.
+  ``bulk_load`` warms many threads with a handful of queries.
+
+Usage::
+
+    saver = SQLiteDeltaSaver("conversations.sqlite")
+    app = workflow.compile(checkpointer=saver)
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.serde.base import SerializerProtocol
+
+DEFAULT_CHECKPOINT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "agentic_framework", "checkpoints.sqlite")
+
+# Keys per "IN (VALUES ...)" query; well under SQLite's parameter limit.
+_QUERY_BATCH = 200
+
+# (thread_id, checkpoint_ns, channel, version)
+BlobKey = Tuple[str, str, str, str]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob BLOB NOT NULL,
+    base_version TEXT,
+    root_version TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE INDEX IF NOT EXISTS blobs_by_root ON blobs (thread_id, checkpoint_ns, channel, root_version);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob BLOB NOT NULL,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+_CHECKPOINT_COLUMNS = (
+    "thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata"
+)
+_BLOB_COLUMNS = "thread_id, checkpoint_ns, channel, version, kind, type, blob, base_version, root_version, depth"
+
+
+@dataclass
+class _Head:
+    """Latest known value of a list channel; the next delta is computed against it."""
+
+    version: str
+    value: List[Any]
+    root: str
+    depth: int
+
+
+@dataclass
+class _CachedThread:
+    heads: Dict[Tuple[str, str], _Head] = field(default_factory=dict)
+    last_used: float = 0.0
+
+
+def _extends(previous: List[Any], value: Any) -> bool:
+    """True if ``value`` is ``previous`` with items appended."""
+    if not isinstance(value, list) or len(value) < len(previous):
+        return False
+    return all(old is new or old == new for old, new in zip(previous, value))
+
+
+def _config(thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> RunnableConfig:
+    return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}}
+
+
+def _batches(items: Sequence[Any], size: int = _QUERY_BATCH) -> Iterator[Sequence[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _placeholders(count: int) -> str:
+    return ", ".join("?" * count)
+
+
+def _row_values(width: int, count: int) -> str:
+    row = "(" + ", ".join("?" * width) + ")"
+    return "VALUES " + ", ".join([row] * count)
+
+
+class SQLiteDeltaSaver(BaseCheckpointSaver[str]):
+    """SQLite checkpointer that stores list channels as deltas and caches only recently used threads."""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CHECKPOINT_PATH,
+        *,
+        serde: Optional[SerializerProtocol] = None,
+        snapshot_every: int = 32,
+        max_threads: int = 256,
+        idle_ttl: Optional[float] = 600.0,
+    ):
+        super().__init__(serde=serde)
+        self.path = path
+        self.snapshot_every = snapshot_every
+        self.max_threads = max_threads
+        self.idle_ttl = idle_ttl
+        self._threads: "OrderedDict[str, _CachedThread]" = OrderedDict()
+        self._lock = threading.RLock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._threads.clear()
+            self._conn.close()
+
+    # --- Thread cache ---
+
+    @property
+    def cached_threads(self) -> List[str]:
+        """Threads whose latest channel values are held in memory, least recently used first."""
+        with self._lock:
+            return list(self._threads)
+
+    def evict_idle(self) -> int:
+        """Drop cached threads over ``max_threads`` or idle for ``idle_ttl``; returns how many."""
+        with self._lock:
+            evicted = 0
+            while len(self._threads) > self.max_threads:
+                self._threads.popitem(last=False)
+                evicted += 1
+            if self.idle_ttl is not None:
+                cutoff = time.monotonic() - self.idle_ttl
+                # Least recently used first, so stop at the first live thread.
+                while self._threads and next(iter(self._threads.values())).last_used < cutoff:
+                    self._threads.popitem(last=False)
+                    evicted += 1
+            return evicted
+
+    def _touch(self, thread_id: str) -> _CachedThread:
+        cached = self._threads.get(thread_id)
+        if cached is None:
+            cached = self._threads[thread_id] = _CachedThread()
+        cached.last_used = time.monotonic()
+        self._threads.move_to_end(thread_id)
+        self.evict_idle()
+        return cached
+
+    def _remember(self, tuples: Iterable[CheckpointTuple], chains: Dict[BlobKey, Tuple[str, int]]) -> None:
+        """Make the loaded values the delta base for each thread's next ``put``."""
+        for checkpoint_tuple in tuples:
+            configurable = checkpoint_tuple.config["configurable"]
+            thread_id, checkpoint_ns = configurable["thread_id"], configurable["checkpoint_ns"]
+            heads = self._touch(thread_id).heads
+            checkpoint = checkpoint_tuple.checkpoint
+            for channel, value in checkpoint["channel_values"].items():
+                version = str(checkpoint["channel_versions"][channel])
+                chain = chains.get((thread_id, checkpoint_ns, channel, version))
+                if isinstance(value, list) and chain is not None:
+                    heads[(checkpoint_ns, channel)] = _Head(version, list(value), *chain)
+
+    # --- Writing ---
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        stored = checkpoint.copy()
+        values: Dict[str, Any] = stored.pop("channel_values")  # type: ignore[misc]
+        checkpoint_type, checkpoint_blob = self.serde.dumps_typed(stored)
+        metadata_type, metadata_blob = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        with self._lock:
+            heads = self._touch(thread_id).heads
+            rows = [
+                self._blob_row(thread_id, checkpoint_ns, channel, str(version), values, heads)
+                for channel, version in new_versions.items()
+            ]
+            self._conn.executemany(f"INSERT OR REPLACE INTO blobs ({_BLOB_COLUMNS}) VALUES ({_placeholders(10)})", rows)
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO checkpoints ({_CHECKPOINT_COLUMNS}) VALUES ({_placeholders(8)})",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),
+                    checkpoint_type,
+                    checkpoint_blob,
+                    metadata_type,
+                    metadata_blob,
+                ),
+            )
+            self._conn.commit()
+        return _config(thread_id, checkpoint_ns, checkpoint["id"])
+
+    def _blob_row(
+        self,
+        thread_id: str,
+        checkpoint_ns: str,
+        channel: str,
+        version: str,
+        values: Dict[str, Any],
+        heads: Dict[Tuple[str, str], _Head],
+    ) -> Tuple[Any, ...]:
+        key = (checkpoint_ns, channel)
+        head = heads.pop(key, None)
+        if channel not in values:
+            return (thread_id, checkpoint_ns, channel, version, "empty", "empty", b"", None, version, 0)
+        value = values[channel]
+        if head is not None and head.version != version and head.depth < self.snapshot_every and _extends(head.value, value):
+            type_, blob = self.serde.dumps_typed(value[len(head.value):])
+            heads[key] = _Head(version, list(value), head.root, head.depth + 1)
+            return (thread_id, checkpoint_ns, channel, version, "delta", type_, blob, head.version, head.root, head.depth + 1)
+        type_, blob = self.serde.dumps_typed(value)
+        if isinstance(value, list):
+            heads[key] = _Head(version, list(value), version, 0)
+        return (thread_id, checkpoint_ns, channel, version, "full", type_, blob, None, version, 0)
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        # Special writes (errors, interrupts) replace; regular writes keep the first copy.
+        verb = "INSERT OR REPLACE" if all(channel in WRITES_IDX_MAP for channel, _ in writes) else "INSERT OR IGNORE"
+        rows = [
+            (thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx), channel, *self.serde.dumps_typed(value), task_path)
+            for idx, (channel, value) in enumerate(writes)
+        ]
+        with self._lock:
+            self._conn.executemany(
+                f"{verb} INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, blob, task_path)"
+                f" VALUES ({_placeholders(9)})",
+                rows,
+            )
+            self._conn.commit()
+
+    def delete_thread(self, thread_id: str) -> None:
+        thread_id = str(thread_id)
+        with self._lock:
+            self._threads.pop(thread_id, None)
+            for table in ("checkpoints", "blobs", "writes"):
+                self._conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            self._conn.commit()
+
+    # --- Reading ---
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        with self._lock:
+            if checkpoint_id:
+                rows = self._conn.execute(
+                    f"SELECT {_CHECKPOINT_COLUMNS} FROM checkpoints"
+                    " WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    f"SELECT {_CHECKPOINT_COLUMNS} FROM checkpoints"
+                    " WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchall()
+            if not rows:
+                return None
+            tuples, chains = self._build_tuples(rows)
+            self._remember(tuples, chains)
+            return tuples[0]
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        clauses: List[str] = []
+        params: List[Any] = []
+        if config is not None:
+            clauses.append("thread_id = ?")
+            params.append(str(config["configurable"]["thread_id"]))
+            if config["configurable"].get("checkpoint_ns") is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(config["configurable"]["checkpoint_ns"])
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before is not None and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_CHECKPOINT_COLUMNS} FROM checkpoints{where} ORDER BY checkpoint_id DESC", params
+            ).fetchall()
+        if filter:
+            # Metadata is msgpack, so filtering happens after decoding.
+            rows = [
+                row for row in rows
+                if all(self.serde.loads_typed((row[6], row[7])).get(key) == value for key, value in filter.items())
+            ]
+        if limit is not None:
+            rows = rows[:limit]
+        for batch in _batches(rows):
+            with self._lock:
+                tuples, _ = self._build_tuples(batch)
+            yield from tuples
+
+    def bulk_load(self, thread_ids: Iterable[str], checkpoint_ns: str = "") -> Dict[str, CheckpointTuple]:
+        """Latest checkpoint of every thread in ``thread_ids``, loaded in batches and cached for the next put."""
+        ids = list(dict.fromkeys(str(thread_id) for thread_id in thread_ids))
+        loaded: Dict[str, CheckpointTuple] = {}
+        with self._lock:
+            for batch in _batches(ids):
+                rows = self._conn.execute(
+                    f"SELECT {_CHECKPOINT_COLUMNS} FROM checkpoints"
+                    " WHERE checkpoint_ns = ? AND (thread_id, checkpoint_id) IN ("
+                    "  SELECT thread_id, MAX(checkpoint_id) FROM checkpoints"
+                    f"  WHERE checkpoint_ns = ? AND thread_id IN ({_placeholders(len(batch))}) GROUP BY thread_id)",
+                    (checkpoint_ns, checkpoint_ns, *batch),
+                ).fetchall()
+                tuples, chains = self._build_tuples(rows)
+                self._remember(tuples, chains)
+                loaded.update((t.config["configurable"]["thread_id"], t) for t in tuples)
+        return loaded
+
+    def _build_tuples(self, rows: Sequence[Tuple[Any, ...]]) -> Tuple[List[CheckpointTuple], Dict[BlobKey, Tuple[str, int]]]:
+        checkpoints = [self.serde.loads_typed((row[4], row[5])) for row in rows]
+        wanted = {
+            (row[0], row[1], channel, str(version))
+            for row, checkpoint in zip(rows, checkpoints)
+            for channel, version in checkpoint["channel_versions"].items()
+        }
+        values, chains = self._load_values(wanted)
+        writes = self._load_writes([(row[0], row[1], row[2]) for row in rows])
+        tuples: List[CheckpointTuple] = []
+        for row, checkpoint in zip(rows, checkpoints):
+            thread_id, checkpoint_ns, checkpoint_id, parent_id = row[:4]
+            channel_values: Dict[str, Any] = {}
+            for channel, version in checkpoint["channel_versions"].items():
+                key = (thread_id, checkpoint_ns, channel, str(version))
+                if key in values:
+                    # Each checkpoint gets its own list; the graph may hold on to it.
+                    value = values[key]
+                    channel_values[channel] = list(value) if isinstance(value, list) else value
+            tuples.append(
+                CheckpointTuple(
+                    config=_config(thread_id, checkpoint_ns, checkpoint_id),
+                    checkpoint={**checkpoint, "channel_values": channel_values},
+                    metadata=self.serde.loads_typed((row[6], row[7])),
+                    parent_config=_config(thread_id, checkpoint_ns, parent_id) if parent_id else None,
+                    pending_writes=writes.get((thread_id, checkpoint_ns, checkpoint_id), []),
+                )
+            )
+        return tuples, chains
+
+    def _load_values(self, wanted: Iterable[BlobKey]) -> Tuple[Dict[BlobKey, Any], Dict[BlobKey, Tuple[str, int]]]:
+        """Channel values for ``wanted``, plus (root, depth) of each list value's delta chain."""
+        values: Dict[BlobKey, Any] = {}
+        chains: Dict[BlobKey, Tuple[str, int]] = {}
+        missing: List[BlobKey] = []
+        for key in wanted:
+            cached = self._threads.get(key[0])
+            head = cached.heads.get((key[1], key[2])) if cached is not None else None
+            if head is not None and head.version == key[3]:
+                values[key] = head.value
+                chains[key] = (head.root, head.depth)
+            else:
+                missing.append(key)
+        rows = self._select_blobs("version", missing)
+        # A delta needs the rest of its chain: every row built on the same snapshot.
+        roots = sorted({(*key[:3], row[4]) for key, row in rows.items() if row[0] == "delta"})
+        rows.update(self._select_blobs("root_version", roots))
+        decoded: Dict[BlobKey, Any] = {}
+
+        def decode(key: BlobKey) -> Any:
+            if key not in decoded:
+                decoded[key] = self.serde.loads_typed((rows[key][1], rows[key][2]))
+            return decoded[key]
+
+        for key in missing:
+            row = rows.get(key)
+            if row is None or row[0] == "empty":
+                continue
+            chain = [key]
+            while rows[chain[-1]][0] == "delta":
+                base = (*key[:3], rows[chain[-1]][3])
+                if base not in rows:
+                    break
+                chain.append(base)
+            if rows[chain[-1]][0] != "full":
+                continue
+            value = decode(chain[-1])
+            if row[0] == "delta":
+                value = list(value)
+                for link in reversed(chain[:-1]):
+                    value.extend(decode(link))
+            values[key] = value
+            if isinstance(value, list):
+                chains[key] = (row[4], row[5])
+        return values, chains
+
+    def _select_blobs(self, column: str, keys: Sequence[BlobKey]) -> Dict[BlobKey, Tuple[Any, ...]]:
+        """Blob rows matching (thread_id, checkpoint_ns, channel, ``column``), keyed by their own version."""
+        found: Dict[BlobKey, Tuple[Any, ...]] = {}
+        for batch in _batches(keys):
+            params = [part for key in batch for part in key]
+            for row in self._conn.execute(
+                f"SELECT {_BLOB_COLUMNS} FROM blobs"
+                f" WHERE (thread_id, checkpoint_ns, channel, {column}) IN ({_row_values(4, len(batch))})",
+                params,
+            ):
+                found[(row[0], row[1], row[2], row[3])] = row[4:]
+        return found
+
+    def _load_writes(self, keys: Sequence[Tuple[str, str, str]]) -> Dict[Tuple[str, str, str], List[Tuple[str, str, Any]]]:
+        writes: Dict[Tuple[str, str, str], List[Tuple[str, str, Any]]] = {}
+        for batch in _batches(keys):
+            params = [part for key in batch for part in key]
+            for thread_id, checkpoint_ns, checkpoint_id, task_id, channel, type_, blob in self._conn.execute(
+                "SELECT thread_id, checkpoint_ns, checkpoint_id, task_id, channel, type, blob FROM writes"
+                f" WHERE (thread_id, checkpoint_ns, checkpoint_id) IN ({_row_values(3, len(batch))})"
+                " ORDER BY task_id, idx",
+                params,
+            ):
+                writes.setdefault((thread_id, checkpoint_ns, checkpoint_id), []).append(
+                    (task_id, channel, self.serde.loads_typed((type_, blob)))
+                )
+        return writes
+
+    # --- Stats ---
+
+    def storage_stats(self) -> Dict[str, int]:
+        """Stored value rows by kind, and the total bytes of stored values."""
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT kind, COUNT(*) FROM blobs GROUP BY kind").fetchall())
+            size = self._conn.execute("SELECT COALESCE(SUM(LENGTH(blob)), 0) FROM blobs").fetchone()[0]
+        return {"full": counts.get("full", 0), "delta": counts.get("delta", 0), "empty": counts.get("empty", 0), "bytes": size}
+
+    # --- Async ---
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        tuples = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for checkpoint_tuple in tuples:
+            yield checkpoint_tuple
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    async def abulk_load(self, thread_ids: Iterable[str], checkpoint_ns: str = "") -> Dict[str, CheckpointTuple]:
+        return await asyncio.to_thread(self.bulk_load, list(thread_ids), checkpoint_ns)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        # Zero-padded so versions (and checkpoint order) compare as strings.
+        return f"{current_v + 1:032}.{random.random():016}"
+
+
+_checkpointer: Optional[SQLiteDeltaSaver] = None
+_checkpointer_lock = threading.Lock()
+
+
+def get_checkpointer() -> SQLiteDeltaSaver:
+    """Process-wide checkpointer stored at $AGENTIC_CHECKPOINT_DB or ~/.cache."""
+    global _checkpointer
+    with _checkpointer_lock:
+        if _checkpointer is None:
+            _checkpointer = SQLiteDeltaSaver(os.environ.get("AGENTIC_CHECKPOINT_DB", DEFAULT_CHECKPOINT_PATH))
+        return _checkpointer
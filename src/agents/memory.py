@@ -0,0 +1,270 @@
+"""
+Token-Budgeted Memory
+---------------------
+
+Conversation memory whose prompt stays under a fixed token budget.
+
+A plain message list is resent in full every turn, so prompt processing
+grows with the length of the conversation. ``TokenBudgetMemory`` keeps:
+
+* pinned system messages,
+* a running summary of older turns, and
+* a sliding window of recent turns.
+
+Token counts are computed once per message when it is added and kept as
+running totals. When the window overflows its share of the budget, the
+oldest whole turns leave it. A turn is a user message plus everything
+answering it, so a tool call is never separated from its result. Evicted
+turns are folded into the summary on a background thread. The summary is
+cached and extended incrementally, so every turn is summarized once. Until
+the fold finishes, the prompt carries the previous summary.
+
+Messages are OpenAI-style dicts (``{"role": ..., "content": ...}``), which is
+what ``client.chat.completions.create`` takes. ``BudgetedChatMemory`` exposes
+the same memory to LangChain agent executors.
+
+Usage::
+
+    memory = TokenBudgetMemory(budget=3000, summarizer=llm_summarizer(llm))
+    memory.add({"role": "user", "content": question})
+    response = client.chat.completions.create(model=MODEL, messages=memory.messages())
+"""
+from __future__ import annotations
+
+import json
+import math
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from langchain_core.memory import BaseMemory
+from langchain_core.messages import BaseMessage, convert_to_messages
+
+Message = Dict[str, Any]
+# (previous summary, evicted messages) -> new summary
+Summarizer = Callable[[str, List[Message]], str]
+
+# Role, separators and priming tokens every chat message costs on top of its content.
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PROMPT = (
+    "Summarize the conversation below for the assistant's memory. Keep names, facts, "
+    "decisions and open questions; drop small talk and formatting. Use at most {max_words} words.\n\n"
+    "Summary so far:\n{summary}\n\n"
+    "New messages:\n{transcript}\n\n"
+    "Updated summary:"
+)
+# Long tool results are clipped before they reach the summarizer.
+TRANSCRIPT_CHARS_PER_MESSAGE = 2000
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough BPE token count (about four characters per token); no tokenizer needed."""
+    return math.ceil(len(text) / 4)
+
+
+def message_text(message: Message) -> str:
+    content = message.get("content") or ""
+    text = content if isinstance(content, str) else json.dumps(content, default=str)
+    if message.get("tool_calls"):
+        text += json.dumps(message["tool_calls"], default=str)
+    return text
+
+
+def render_transcript(messages: Sequence[Message]) -> str:
+    return "\n".join(
+        f"{message.get('role', 'user')}: {message_text(message)[:TRANSCRIPT_CHARS_PER_MESSAGE]}" for message in messages
+    )
+
+
+def llm_summarizer(llm: Any, max_words: int = 200) -> Summarizer:
+    """A summarizer that asks ``llm`` (LLM or chat model) to fold new messages into the summary."""
+
+    def summarize(summary: str, messages: List[Message]) -> str:
+        prompt = SUMMARY_PROMPT.format(
+            max_words=max_words, summary=summary or "(none)", transcript=render_transcript(messages)
+        )
+        response = llm.invoke(prompt)
+        return (response.content if isinstance(response, BaseMessage) else str(response)).strip()
+
+    return summarize
+
+
+@dataclass
+class _Turn:
+    messages: List[Message] = field(default_factory=list)
+    tokens: int = 0
+
+
+class TokenBudgetMemory:
+    """System messages, a running summary and a window of recent turns, kept under ``budget`` tokens."""
+
+    def __init__(
+        self,
+        budget: int = 4096,
+        summarizer: Optional[Summarizer] = None,
+        summary_budget: int = 512,
+        min_turns: int = 1,
+        count_tokens: Callable[[str], int] = estimate_tokens,
+        background: bool = True,
+    ):
+        self.budget = budget
+        self.summarizer = summarizer
+        # Reserved for the summary, so the window share does not move when the summary grows.
+        self.summary_budget = summary_budget if summarizer is not None else 0
+        self.min_turns = min_turns
+        self.count_tokens = count_tokens
+        self.background = background
+        self.summarized_turns = 0
+        self._system: List[Message] = []
+        self._system_tokens = 0
+        self._turns: List[_Turn] = []
+        self._window_tokens = 0
+        self._summary = ""
+        self._summary_tokens = 0
+        self._pending: List[_Turn] = []
+        self._future: Optional[Future] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.RLock()
+
+    # --- Adding ---
+
+    def add(self, message: Message) -> None:
+        """Record a message; a user message starts a new turn."""
+        tokens = self.count_tokens(message_text(message)) + MESSAGE_OVERHEAD_TOKENS
+        with self._lock:
+            role = message.get("role")
+            if role == "system" and not self._turns:
+                self._system.append(message)
+                self._system_tokens += tokens
+                return
+            if role == "user" or not self._turns:
+                self._turns.append(_Turn())
+            turn = self._turns[-1]
+            turn.messages.append(message)
+            turn.tokens += tokens
+            self._window_tokens += tokens
+            self._enforce_budget()
+
+    def extend(self, messages: Sequence[Message]) -> None:
+        for message in messages:
+            self.add(message)
+
+    def clear(self) -> None:
+        self.wait()
+        with self._lock:
+            self._turns.clear()
+            self._pending.clear()
+            self._window_tokens = 0
+            self._summary, self._summary_tokens = "", 0
+            self.summarized_turns = 0
+
+    # --- Reading ---
+
+    def messages(self) -> List[Message]:
+        """The prompt: system messages, the summary (if any) and the recent turns."""
+        with self._lock:
+            prompt = list(self._system)
+            if self._summary:
+                prompt.append({"role": "system", "content": f"Summary of the earlier conversation:\n{self._summary}"})
+            for turn in self._turns:
+                prompt.extend(turn.messages)
+            return prompt
+
+    def langchain_messages(self) -> List[BaseMessage]:
+        return convert_to_messages([{"role": m["role"], "content": message_text(m)} for m in self.messages()])
+
+    @property
+    def summary(self) -> str:
+        return self._summary
+
+    @property
+    def total_tokens(self) -> int:
+        """Estimated prompt tokens of ``messages()``."""
+        with self._lock:
+            summary = self._summary_tokens + MESSAGE_OVERHEAD_TOKENS if self._summary else 0
+            return self._system_tokens + summary + self._window_tokens
+
+    @property
+    def turns(self) -> int:
+        return len(self._turns)
+
+    # --- Window and summary ---
+
+    def _enforce_budget(self) -> None:
+        limit = self.budget - self._system_tokens - self.summary_budget
+        evicted = False
+        while self._window_tokens > limit and len(self._turns) > self.min_turns:
+            turn = self._turns.pop(0)
+            self._window_tokens -= turn.tokens
+            self._pending.append(turn)
+            evicted = True
+        if evicted:
+            self._schedule_summary()
+
+    def _schedule_summary(self) -> None:
+        if self.summarizer is None:
+            # Pure sliding window: old turns are simply dropped.
+            self.summarized_turns += len(self._pending)
+            self._pending.clear()
+            return
+        if self._future is not None and not self._future.done():
+            # The running fold picks these turns up when it finishes.
+            return
+        batch, self._pending = self._pending, []
+        if not self.background:
+            self._fold(self._summary, batch)
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-summary")
+        self._future = self._executor.submit(self._fold, self._summary, batch)
+
+    def _fold(self, summary: str, batch: List[_Turn]) -> None:
+        messages = [message for turn in batch for message in turn.messages]
+        try:
+            summary = self.summarizer(summary, messages)
+        except Exception as e:
+            # Keep the previous summary; these turns are lost from memory.
+            print(f"memory: summarization failed: {e}")
+        if self.count_tokens(summary) > self.summary_budget:
+            summary = summary[: self.summary_budget * 4]
+        with self._lock:
+            self._summary = summary
+            self._summary_tokens = self.count_tokens(summary)
+            self.summarized_turns += len(batch)
+            self._future = None
+            if self._pending:
+                self._schedule_summary()
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Block until the background summary has caught up with evicted turns."""
+        while True:
+            with self._lock:
+                future = self._future
+            if future is None:
+                return
+            future.result(timeout=timeout)
+
+
+class BudgetedChatMemory(BaseMemory):
+    """LangChain memory backed by a ``TokenBudgetMemory``; a drop-in for ``ConversationBufferMemory``."""
+
+    memory: Any
+    memory_key: str = "chat_history"
+    input_key: str = "input"
+    output_key: str = "output"
+
+    @property
+    def memory_variables(self) -> List[str]:
+        return [self.memory_key]
+
+    def load_memory_variables(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        return {self.memory_key: self.memory.langchain_messages()}
+
+    def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]) -> None:
+        self.memory.add({"role": "user", "content": str(inputs[self.input_key])})
+        self.memory.add({"role": "assistant", "content": str(outputs[self.output_key])})
+
+    def clear(self) -> None:
+        self.memory.clear()
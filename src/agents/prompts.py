@@ -0,0 +1,111 @@
+"""
+Compiled Prompts
+----------------
+
+Prompt templates are parsed once and rendered by filling slots.
+
+``PromptTemplate.format`` re-merges partials, re-validates and re-parses the
+template string on every call. A ``CompiledPrompt`` does the parsing once. It
+bakes constant values (partials, the tool-description block) into the
+literal text and keeps a list of slots, so rendering a step is one list copy
+and one ``join``.
+
+The tool block (``{tools}``, ``{tool_names}``) is memoized by the tools'
+names and descriptions. Changing the tool set yields a new block and a new
+compiled prompt; an unchanged set reuses both.
+"""
+from __future__ import annotations
+
+import string
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from langchain_core.prompts import BasePromptTemplate, PromptTemplate
+
+ToolSignature = Tuple[Tuple[str, str], ...]
+
+# Variables filled from the tool set rather than per step.
+TOOL_VARIABLES = ("tools", "tool_names")
+
+
+def tool_signature(tools: Sequence[Any]) -> ToolSignature:
+    return tuple((tool.name, tool.description) for tool in tools)
+
+
+@lru_cache(maxsize=256)
+def tool_block(signature: ToolSignature) -> Dict[str, str]:
+    """Tool descriptions and names as rendered into prompts, one entry per tool variable."""
+    return {
+        "tools": "\n".join(f"{name}: {description}" for name, description in signature),
+        "tool_names": ", ".join(name for name, _ in signature),
+    }
+
+
+class CompiledPrompt:
+    """A prompt template parsed once; ``render`` only fills the per-step variables."""
+
+    def __init__(self, template: BasePromptTemplate, constants: Optional[Mapping[str, Any]] = None):
+        self.template = template
+        constants = {**template.partial_variables, **(constants or {})}
+        self.input_variables: List[str] = [name for name in template.input_variables if name not in constants]
+        self._parts: List[str] = []
+        self._slots: List[Tuple[int, str]] = []
+        self._constants = constants
+        self._compiled = self._compile(template, constants)
+
+    def _compile(self, template: BasePromptTemplate, constants: Mapping[str, Any]) -> bool:
+        if not isinstance(template, PromptTemplate) or template.template_format != "f-string":
+            return False
+        if any(callable(value) for value in constants.values()):
+            return False
+        literal: List[str] = []
+        for text, field, spec, conversion in string.Formatter().parse(template.template):
+            literal.append(text)
+            if field is None:
+                continue
+            if spec or conversion or not field.isidentifier():
+                # Format specs and attribute access: leave it to the template.
+                return False
+            if field in constants:
+                literal.append(str(constants[field]))
+                continue
+            self._parts.append("".join(literal))
+            literal = []
+            self._slots.append((len(self._parts), field))
+            self._parts.append("")
+        self._parts.append("".join(literal))
+        return True
+
+    def render(self, values: Mapping[str, Any]) -> str:
+        if not self._compiled:
+            return self.template.format(**{**self._constants, **values})
+        parts = self._parts.copy()
+        for position, name in self._slots:
+            parts[position] = str(values[name])
+        return "".join(parts)
+
+
+_compiled: "OrderedDict[Tuple[Any, ...], CompiledPrompt]" = OrderedDict()
+_MAX_COMPILED = 256
+_compiled_lock = threading.Lock()
+
+
+def compile_prompt(template: BasePromptTemplate, tools: Sequence[Any] = ()) -> CompiledPrompt:
+    """Return the compiled form of ``template`` for this tool set, compiling it on first use."""
+    signature = tool_signature(tools)
+    key = (id(template), getattr(template, "template", None), tuple(template.input_variables), signature)
+    with _compiled_lock:
+        compiled = _compiled.get(key)
+        if compiled is not None and compiled.template is template:
+            _compiled.move_to_end(key)
+            return compiled
+    block = tool_block(signature)
+    constants = {name: block[name] for name in TOOL_VARIABLES if name in template.input_variables}
+    compiled = CompiledPrompt(template, constants)
+    with _compiled_lock:
+        _compiled[key] = compiled
+        while len(_compiled) > _MAX_COMPILED:
+            _compiled.popitem(last=False)
+    return compiled
@@ -0,0 +1,135 @@
+"""
+Agent Serving
+-------------
+
+Builds the agent executors served over HTTP and bounds how many runs may be
+in flight at once.
+
+Executors are built once, when the server starts, and are shared by every
+request. An ``AgentExecutor`` keeps no per-run state, so concurrent
+``ainvoke`` calls on one executor are safe. The concurrency limit does not
+block: a request that finds every slot taken is rejected immediately (HTTP
+429), rather than queueing on the event loop.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional
+
+from langchain.agents import AgentExecutor
+from langchain_core.language_models.llms import LLM
+from langchain_core.prompts import PromptTemplate
+
+DEFAULT_MAX_CONCURRENT_RUNS = int(os.environ.get("AGENTIC_MAX_CONCURRENT_RUNS", "32"))
+
+AgentFactory = Callable[[LLM], AgentExecutor]
+
+
+class AgentSaturated(Exception):
+    """Raised when every run slot of an AgentPool is taken."""
+
+
+def build_advanced_agent(llm: LLM) -> AgentExecutor:
+    from agents.advanced_agent import AdvancedAgent
+    from tools import ppt_tool, ref_tool, web_search_google
+
+    prompt_template = PromptTemplate(
+        input_variables=["input"],
+        template="You are a very advanced agent that integrates web search and presentation tools.\n\nUser Query: {input}",
+    )
+    return AdvancedAgent.create_executor(
+        llm=llm,
+        tools=[web_search_google, ppt_tool, ref_tool],
+        prompt_template=prompt_template,
+    )
+
+
+# Agents served by default, by URL name.
+AGENT_FACTORIES: Dict[str, AgentFactory] = {
+    "advanced": build_advanced_agent,
+}
+
+
+class AgentPool:
+    """Executors built once, plus a non-blocking limit on concurrent runs."""
+
+    def __init__(
+        self,
+        executors: Dict[str, AgentExecutor],
+        max_concurrent_runs: int = DEFAULT_MAX_CONCURRENT_RUNS,
+        build_seconds: Optional[Dict[str, float]] = None,
+    ):
+        self.executors = executors
+        self.max_concurrent_runs = max_concurrent_runs
+        self.build_seconds = build_seconds or {}
+        self.in_flight = 0
+        self.rejected = 0
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.executors
+
+    def get(self, name: str) -> Optional[AgentExecutor]:
+        return self.executors.get(name)
+
+    def names(self) -> List[str]:
+        return sorted(self.executors)
+
+    def acquire(self) -> None:
+        """Take a run slot or raise AgentSaturated. Never waits."""
+        # Check and increment happen without an await in between, so this is
+        # atomic on the event loop.
+        if self.in_flight >= self.max_concurrent_runs:
+            self.rejected += 1
+            raise AgentSaturated(f"{self.in_flight} agent runs in flight (limit {self.max_concurrent_runs})")
+        self.in_flight += 1
+
+    def release(self) -> None:
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def drain(self, timeout: float = 30.0, poll_interval: float = 0.05) -> bool:
+        """Wait until no run is in flight; returns False if ``timeout`` ran out first."""
+        deadline = time.monotonic() + timeout
+        while self.in_flight and time.monotonic() < deadline:
+            await asyncio.sleep(poll_interval)
+        return not self.in_flight
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "agents": self.names(),
+            "in_flight": self.in_flight,
+            "max_concurrent_runs": self.max_concurrent_runs,
+            "rejected": self.rejected,
+        }
+
+
+def build_agent_pool(
+    llm: Optional[LLM] = None,
+    names: Optional[Iterable[str]] = None,
+    factories: Optional[Dict[str, AgentFactory]] = None,
+    max_concurrent_runs: int = DEFAULT_MAX_CONCURRENT_RUNS,
+) -> AgentPool:
+    """Build every served executor once; ``llm`` defaults to the registry's first loaded model."""
+    if llm is None:
+        from llms.lmstudio_llm import get_llm
+        llm = get_llm()
+        if llm is None:
+            raise RuntimeError("No LLM available to serve agents. Is LM Studio running with a model loaded?")
+    factories = factories or AGENT_FACTORIES
+    executors: Dict[str, AgentExecutor] = {}
+    build_seconds: Dict[str, float] = {}
+    for name in names or factories:
+        start = time.perf_counter()
+        executors[name] = factories[name](llm)
+        build_seconds[name] = time.perf_counter() - start
+    return AgentPool(executors, max_concurrent_runs=max_concurrent_runs, build_seconds=build_seconds)
@@ -1,5 +1,7 @@
 """Console script for agentic_framework."""
-import main
+from typing import Optional
+
+import main as server
 
 import typer
 from rich.console import Console
@@ -16,6 +18,42 @@ def main():
     console.print("See Typer documentation at https://typer.tiangolo.com/")
 
 
+@app.command()
+def serve(
+    production: Optional[bool] = typer.Option(
+        None, "--production/--dev", help="Preloaded multi-worker server without reload (default: from $AGENTIC_ENV).",
+    ),
+    host: str = typer.Option("0.0.0.0", help="Interface to bind."),
+    port: int = typer.Option(8000, help="Port to bind."),
+    workers: Optional[int] = typer.Option(None, help="Worker processes in production mode (default: $WEB_CONCURRENCY or 2)."),
+    graceful_timeout: float = typer.Option(server.DEFAULT_GRACEFUL_TIMEOUT, help="Seconds to drain in-flight agent runs on shutdown."),
+):
+    """Serve the agents over HTTP."""
+    server.main(production=production, host=host, port=port, workers=workers, graceful_timeout=graceful_timeout)
+
+
+@app.command()
+def batch(
+    input_path: str = typer.Argument(..., help="JSONL file of {\"id\", \"input\"} records or strings."),
+    output_path: str = typer.Argument(..., help="JSONL file results are appended to; also the resume checkpoint."),
+    agent: str = typer.Option("advanced", help="Agent to run."),
+    concurrency: int = typer.Option(8, help="Agent runs in flight at once."),
+    timeout: Optional[float] = typer.Option(None, help="Per-run timeout in seconds."),
+    resume: bool = typer.Option(True, "--resume/--restart", help="Skip inputs already in the output file."),
+    report_interval: float = typer.Option(30.0, help="Seconds between progress reports."),
+):
+    """Run an agent over every input of a JSONL file."""
+    from agents.batch_runner import BatchRunner
+    from agents.serving import AGENT_FACTORIES, build_agent_pool
+
+    if agent not in AGENT_FACTORIES:
+        choices = ", ".join(sorted(AGENT_FACTORIES))
+        raise typer.BadParameter(f"unknown agent {agent!r}; choose from {choices}", param_hint="--agent")
+    executor = build_agent_pool(names=[agent]).get(agent)
+    runner = BatchRunner(executor, concurrency=concurrency, timeout=timeout, report_interval=report_interval)
+    stats = runner.run(input_path, output_path, resume=resume)
+    console.print(stats.as_dict())
+
 
 if __name__ == "__main__":
     app()
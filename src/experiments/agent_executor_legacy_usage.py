@@ -1,9 +1,9 @@
 from langchain import hub
 from langchain.agents import AgentExecutor, create_tool_calling_agent
-from langchain.memory import ConversationBufferMemory
 from langchain_core.tools import tool
 from langchain_core.prompts import ChatPromptTemplate
 
+from agents.memory import BudgetedChatMemory, TokenBudgetMemory, llm_summarizer
 from llm_init import llm
 model = llm
 
@@ -29,9 +29,10 @@ prompt = ChatPromptTemplate.from_messages(
 
 # Construct the Tools agent
 agent = create_tool_calling_agent(model, tools, prompt)
-# Instantiate memory
-memory = ConversationBufferMemory(
-    memory_key="chat_history", return_messages=True)
+# Instantiate memory: recent turns under a token budget, older ones summarized
+memory = BudgetedChatMemory(
+    memory=TokenBudgetMemory(budget=2000, summarizer=llm_summarizer(model)),
+    memory_key="chat_history")
 
 # Create an agent
 agent = create_tool_calling_agent(model, tools, prompt)
@@ -2,7 +2,6 @@
 from tabnanny import check
 import uuid
 from langchain_core.messages import HumanMessage
-from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import START, MessagesState, StateGraph
 from langchain.agents import AgentType, create_tool_calling_agent, AgentExecutor, create_openai_functions_agent
 from llm_init import llm
@@ -10,6 +9,7 @@ import gradio as gr
 from agents import web_search_tools
 from prompts_templates import simple_prompt
 from langgraph.prebuilt import create_react_agent
+from agents.checkpoint import SQLiteDeltaSaver
 
 #%% Step 1 -  Define a new graph as a workflow
 workflow = StateGraph(state_schema=MessagesState) # This stategraph contains the scope for bigger and better conversational flows
@@ -32,7 +32,8 @@ workflow.add_node("model", call_model)
 
 #%% Step 4 - Introduce memory element into this 
 # Adding memory is straight forward in langgraph!
-memory = MemorySaver()
+# Conversations persist in SQLite as message deltas; idle threads leave RAM.
+memory = SQLiteDeltaSaver("conversations.sqlite")
 
 app = workflow.compile(
     checkpointer=memory
@@ -10,74 +10,27 @@ import shutil
 import sys
 import threading
 import time
-import urllib.parse
-import urllib.request
 
 # Third-party imports
 from openai import OpenAI
 
+# Framework imports
+from agents.memory import SUMMARY_PROMPT, TokenBudgetMemory, render_transcript
+from llms.think_filter import ThinkTagFilter
+from tools.dispatch import ToolCall, ToolDispatcher
+from tools.implementation.wiki_tools import fetch_wikipedia_articles
+
 # Initialize LM Studio client
 client = OpenAI(base_url="http://127.0.0.1:1234/v1", api_key="lm-studio")
 MODEL = "deepseek-r1-distill-llama-8b@q4_k_m"
+# Prompt tokens sent per turn; older turns are summarized to stay under it.
+CONTEXT_BUDGET = 3000
 
 
 def fetch_wikipedia_content(search_query: str) -> dict:
     """Fetches wikipedia content for a given search_query"""
     try:
-        # Search for most relevant article
-        search_url = "https://en.wikipedia.org/w/api.php"
-        search_params = {
-            "action": "query",
-            "format": "json",
-            "list": "search",
-            "srsearch": search_query,
-            "srlimit": 1,
-        }
-
-        url = f"{search_url}?{urllib.parse.urlencode(search_params)}"
-        with urllib.request.urlopen(url) as response:
-            search_data = json.loads(response.read().decode())
-
-        if not search_data["query"]["search"]:
-            return {
-                "status": "error",
-                "message": f"No Wikipedia article found for '{search_query}'",
-            }
-
-        # Get the normalized title from search results
-        normalized_title = search_data["query"]["search"][0]["title"]
-
-        # Now fetch the actual content with the normalized title
-        content_params = {
-            "action": "query",
-            "format": "json",
-            "titles": normalized_title,
-            "prop": "extracts",
-            "exintro": "true",
-            "explaintext": "true",
-            "redirects": 1,
-        }
-
-        url = f"{search_url}?{urllib.parse.urlencode(content_params)}"
-        with urllib.request.urlopen(url) as response:
-            data = json.loads(response.read().decode())
-
-        pages = data["query"]["pages"]
-        page_id = list(pages.keys())[0]
-
-        if page_id == "-1":
-            return {
-                "status": "error",
-                "message": f"No Wikipedia article found for '{search_query}'",
-            }
-
-        content = pages[page_id]["extract"].strip()
-        return {
-            "status": "success",
-            "content": content,
-            "title": pages[page_id]["title"],
-        }
-
+        return fetch_wikipedia_articles([search_query])[0]
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
@@ -106,6 +59,13 @@ WIKI_TOOL = {
 }
 
 
+# Tool calls of one model turn run concurrently, in call order.
+dispatcher = ToolDispatcher(
+    {"fetch_wikipedia_content": fetch_wikipedia_content},
+    timeouts={"fetch_wikipedia_content": 20.0},
+)
+
+
 # Class for displaying the state of model processing
 class Spinner:
     def __init__(self, message="Processing..."):
@@ -139,11 +99,25 @@ class Spinner:
         self.write("\r")  # Move cursor to beginning of line
 
 
+def summarize_turns(summary: str, messages: list) -> str:
+    """Fold turns that left the context window into the running summary."""
+    prompt = SUMMARY_PROMPT.format(
+        max_words=150, summary=summary or "(none)", transcript=render_transcript(messages)
+    )
+    response = client.chat.completions.create(
+        model=MODEL, messages=[{"role": "user", "content": prompt}]
+    )
+    think_filter = ThinkTagFilter()
+    text = think_filter.feed(response.choices[0].message.content or "")
+    return text + think_filter.flush()
+
+
 def chat_loop():
     """
     Main chat loop that processes user input and handles tool calls.
     """
-    messages = [
+    memory = TokenBudgetMemory(budget=CONTEXT_BUDGET, summarizer=summarize_turns)
+    memory.add(
         {
             "role": "system",
             "content": (
@@ -152,7 +126,7 @@ def chat_loop():
                 "and cite information from them."
             ),
         }
-    ]
+    )
 
     print(
         "Assistant: "
@@ -167,12 +141,12 @@ def chat_loop():
         if user_input.lower() == "quit":
             break
 
-        messages.append({"role": "user", "content": user_input})
+        memory.add({"role": "user", "content": user_input})
         try:
             with Spinner("Thinking..."):
                 response = client.chat.completions.create(
                     model=MODEL,
-                    messages=messages,
+                    messages=memory.messages(),
                     tools=[WIKI_TOOL],
                 )
 
@@ -180,8 +154,8 @@ def chat_loop():
                 # Handle all tool calls
                 tool_calls = response.choices[0].message.tool_calls
 
-                # Add all tool calls to messages
-                messages.append(
+                # Add all tool calls to memory
+                memory.add(
                     {
                         "role": "assistant",
                         "tool_calls": [
@@ -195,10 +169,24 @@ def chat_loop():
                     }
                 )
 
-                # Process each tool call and add results
-                for tool_call in tool_calls:
-                    args = json.loads(tool_call.function.arguments)
-                    result = fetch_wikipedia_content(args["search_query"])
+                calls = [ToolCall.from_openai(tool_call) for tool_call in tool_calls]
+                # Resolve every topic of this turn in one batch; the individual
+                # calls below are then answered from the title cache.
+                queries = [
+                    call.arguments.get("search_query", "")
+                    for call in calls
+                    if call.name == "fetch_wikipedia_content"
+                ]
+                if len(queries) > 1:
+                    fetch_wikipedia_articles(queries)
+
+                # Run all tool calls concurrently, then add results in order
+                results = dispatcher.dispatch(calls)
+                for tool_call, dispatched in zip(tool_calls, results):
+                    if dispatched.ok:
+                        result = dispatched.output
+                    else:
+                        result = {"status": "error", "message": dispatched.error}
 
                     # Print the Wikipedia content in a formatted way
                     terminal_width = shutil.get_terminal_size().columns
@@ -213,7 +201,7 @@ def chat_loop():
                         )
                     print("=" * terminal_width + "\n")
 
-                    messages.append(
+                    memory.add(
                         {
                             "role": "tool",
                             "content": json.dumps(result),
@@ -224,7 +212,7 @@ def chat_loop():
                 # Stream the post-tool-call response
                 print("\nAssistant:", end=" ", flush=True)
                 stream_response = client.chat.completions.create(
-                    model=MODEL, messages=messages, stream=True
+                    model=MODEL, messages=memory.messages(), stream=True
                 )
                 collected_content = ""
                 for chunk in stream_response:
@@ -233,7 +221,7 @@ def chat_loop():
                         print(content, end="", flush=True)
                         collected_content += content
                 print()  # New line after streaming completes
-                messages.append(
+                memory.add(
                     {
                         "role": "assistant",
                         "content": collected_content,
@@ -242,7 +230,7 @@ def chat_loop():
             else:
                 # Handle regular response
                 print("\nAssistant:", response.choices[0].message.content)
-                messages.append(
+                memory.add(
                     {
                         "role": "assistant",
                         "content": response.choices[0].message.content,
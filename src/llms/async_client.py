@@ -0,0 +1,133 @@
+"""
+Async LM Studio Client
+----------------------
+
+A natively async client for the OpenAI-compatible REST endpoint exposed by
+LM Studio (``/v1/chat/completions``). Every client keeps a bounded pool of
+keep-alive connections, so a single event loop can have hundreds of requests
+in flight without parking a worker thread per request.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import weakref
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+DEFAULT_MAX_CONNECTIONS = 64
+DEFAULT_MAX_KEEPALIVE = 32
+DEFAULT_TIMEOUT = 300.0
+
+
+class AsyncLmstudioClient:
+    """Connection-pooled async client for an OpenAI-compatible chat endpoint."""
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str = "lm-studio",
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        )
+        # Requests beyond the pool size wait for a free connection instead of
+        # failing, hence no pool timeout.
+        self.timeout = httpx.Timeout(timeout, pool=None)
+        # httpx.AsyncClient is bound to the loop it was first used on, so we
+        # keep one pool per running loop.
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                limits=self.limits,
+                timeout=self.timeout,
+            )
+            self._clients[loop] = client
+        return client
+
+    async def chat_completion(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        stop: Optional[Sequence[str]] = None,
+        **params: Any
+    ) -> Dict[str, Any]:
+        """Send one chat completion request and return the decoded JSON body."""
+        payload: Dict[str, Any] = {"model": model, "messages": messages, **params}
+        if stop:
+            payload["stop"] = list(stop)
+        response = await self._client().post("/chat/completions", json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    async def stream_chat_completion(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        stop: Optional[Sequence[str]] = None,
+        usage: Optional[Dict[str, Any]] = None,
+        **params: Any
+    ) -> AsyncIterator[str]:
+        """Stream a chat completion over SSE, yielding content deltas as they arrive.
+
+        Pass a dict as ``usage`` to have the server's token usage (sent after
+        the last delta) written into it.
+        """
+        payload: Dict[str, Any] = {"model": model, "messages": messages, "stream": True, **params}
+        if stop:
+            payload["stop"] = list(stop)
+        if usage is not None:
+            payload["stream_options"] = {"include_usage": True}
+        async with self._client().stream("POST", "/chat/completions", json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                event = json.loads(data)
+                if usage is not None and event.get("usage"):
+                    usage.update(event["usage"])
+                choices = event.get("choices") or [{}]
+                content = choices[0].get("delta", {}).get("content")
+                if content:
+                    yield content
+
+    async def aclose(self) -> None:
+        """Close the connection pool owned by the running loop."""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+_clients: Dict[Tuple[str, Tuple[Tuple[str, Any], ...]], AsyncLmstudioClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_async_client(base_url: str, **kwargs: Any) -> AsyncLmstudioClient:
+    """Return the process-wide client for ``base_url`` and these options, creating it on first use."""
+    # Callers asking for different pool sizes or timeouts get their own client.
+    key = (base_url, tuple(sorted(kwargs.items())))
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = AsyncLmstudioClient(base_url, **kwargs)
+            _clients[key] = client
+        return client
@@ -0,0 +1,202 @@
+"""
+Micro-batching Scheduler
+------------------------
+
+Opt-in scheduler that sits in front of an LLM and coalesces concurrent
+prompts. Prompts arriving within ``max_wait_ms`` of each other (up to
+``max_batch_size``) are sent as one ``agenerate`` call and every result is
+routed back to the caller that submitted it.
+
+Usage::
+
+    scheduler = MicroBatchScheduler(llm, max_batch_size=8, max_wait_ms=5)
+    batched_llm = MicroBatchedLLM(scheduler=scheduler)   # drop-in LLM
+    batched_llm.invoke("Summarize this: ...")
+    scheduler.stats()   # queue depth and batch-size histograms
+
+The scheduler owns a small event loop thread, so blocking callers (tools run
+by AgentExecutor) and async callers can share the same batches.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.language_models.llms import LLM, BaseLLM
+from pydantic import Field
+
+
+@dataclass
+class _Pending:
+    prompt: str
+    stop: Optional[Tuple[str, ...]]
+    future: "asyncio.Future[str]"
+    enqueued_at: float
+
+
+class MicroBatchScheduler:
+    """Collects concurrent prompts over a short window and generates them as one batch."""
+
+    def __init__(
+        self,
+        llm: BaseLLM,
+        max_batch_size: int = 8,
+        max_wait_ms: float = 5.0,
+        max_inflight_batches: int = 2,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1.")
+        self.llm = llm
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_inflight_batches = max_inflight_batches
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._queue: Optional["asyncio.Queue[_Pending]"] = None
+        # --- Metrics ---
+        self.batch_size_histogram: Counter = Counter()
+        self.queue_depth_histogram: Counter = Counter()
+        self.submitted = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.total_queue_wait = 0.0
+
+    # --- Public API ---
+
+    def submit(self, prompt: str, stop: Optional[Sequence[str]] = None) -> str:
+        """Queue a prompt and block until its result is ready."""
+        loop, queue = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(self._enqueue(queue, prompt, stop), loop).result()
+
+    async def asubmit(self, prompt: str, stop: Optional[Sequence[str]] = None) -> str:
+        """Queue a prompt from any event loop and await its result."""
+        loop, queue = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(self._enqueue(queue, prompt, stop), loop)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of the scheduler metrics, for tuning batch size against wait time."""
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "submitted": self.submitted,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "mean_batch_size": self.submitted / self.batches if self.batches else 0.0,
+            "mean_queue_wait_ms": 1000.0 * self.total_queue_wait / self.submitted if self.submitted else 0.0,
+            "batch_size_histogram": dict(sorted(self.batch_size_histogram.items())),
+            "queue_depth_histogram": dict(sorted(self.queue_depth_histogram.items())),
+        }
+
+    def close(self) -> None:
+        """Stop the scheduler loop. Prompts still queued are cancelled; a later submit starts a new loop."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            # Loop tasks hold their own queue reference, so clearing it here is safe.
+            self._loop = self._thread = self._queue = None
+        if loop is not None and thread is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            # The thread cancels the collector and the pending prompts before it exits.
+            thread.join()
+            loop.close()
+
+    # --- Internals ---
+
+    def _ensure_loop(self) -> Tuple[asyncio.AbstractEventLoop, "asyncio.Queue[_Pending]"]:
+        with self._lock:
+            if self._loop is None or self._queue is None:
+                loop = asyncio.new_event_loop()
+                queue: "asyncio.Queue[_Pending]" = asyncio.Queue()
+                ready = threading.Event()
+                self._thread = threading.Thread(
+                    target=self._run_loop, args=(loop, queue, ready), name="micro-batch-scheduler", daemon=True
+                )
+                self._thread.start()
+                ready.wait()
+                self._loop, self._queue = loop, queue
+            return self._loop, self._queue
+
+    def _run_loop(self, loop: asyncio.AbstractEventLoop, queue: "asyncio.Queue[_Pending]", ready: threading.Event) -> None:
+        asyncio.set_event_loop(loop)
+        loop.create_task(self._collect(queue))
+        ready.set()
+        loop.run_forever()
+        for task in asyncio.all_tasks(loop):
+            task.cancel()
+        loop.run_until_complete(asyncio.gather(*asyncio.all_tasks(loop), return_exceptions=True))
+
+    async def _enqueue(self, queue: "asyncio.Queue[_Pending]", prompt: str, stop: Optional[Sequence[str]]) -> str:
+        loop = asyncio.get_running_loop()
+        pending = _Pending(prompt, tuple(stop) if stop else None, loop.create_future(), time.perf_counter())
+        queue.put_nowait(pending)
+        return await pending.future
+
+    async def _collect(self, queue: "asyncio.Queue[_Pending]") -> None:
+        inflight = asyncio.Semaphore(self.max_inflight_batches)
+        while True:
+            first = await queue.get()
+            batch = [first]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            self._record(batch, queue.qsize())
+            await inflight.acquire()
+            task = asyncio.create_task(self._dispatch(batch))
+            task.add_done_callback(lambda _: inflight.release())
+
+    def _record(self, batch: List[_Pending], queue_depth: int) -> None:
+        now = time.perf_counter()
+        self.batches += 1
+        self.submitted += len(batch)
+        self.batch_size_histogram[len(batch)] += 1
+        self.queue_depth_histogram[queue_depth] += 1
+        self.total_queue_wait += sum(now - item.enqueued_at for item in batch)
+
+    async def _dispatch(self, batch: List[_Pending]) -> None:
+        # agenerate takes one stop list per call, so split the batch by stop.
+        groups: Dict[Optional[Tuple[str, ...]], List[_Pending]] = {}
+        for item in batch:
+            groups.setdefault(item.stop, []).append(item)
+        await asyncio.gather(*(self._generate(items) for items in groups.values()))
+
+    async def _generate(self, items: List[_Pending]) -> None:
+        stop = items[0].stop
+        try:
+            result = await self.llm.agenerate([item.prompt for item in items], stop=list(stop) if stop else None)
+        except Exception as e:
+            if len(items) > 1:
+                # One bad prompt fails the whole call; rerun individually so
+                # only the caller that caused it sees the error.
+                self.failed_batches += 1
+                await asyncio.gather(*(self._generate([item]) for item in items))
+            elif not items[0].future.done():
+                items[0].future.set_exception(e)
+            return
+        for item, generations in zip(items, result.generations):
+            if not item.future.done():
+                item.future.set_result(generations[0].text)
+
+
+class MicroBatchedLLM(LLM):
+    """Drop-in LLM that routes every call through a MicroBatchScheduler."""
+    scheduler: Any = Field(...)
+
+    @property
+    def _llm_type(self) -> str:
+        return "micro_batched"
+
+    def _call(self, prompt: str, stop: Optional[Sequence[str]] = None, run_manager: Any = None, **kwargs: Any) -> str:
+        return self.scheduler.submit(prompt, stop=stop)
+
+    async def _acall(self, prompt: str, stop: Optional[Sequence[str]] = None, run_manager: Any = None, **kwargs: Any) -> str:
+        return await self.scheduler.asubmit(prompt, stop=stop)
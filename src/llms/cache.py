@@ -0,0 +1,270 @@
+"""
+LLM Response Cache
+------------------
+
+Pluggable cache for LmstudioLLM responses. Entries are keyed on the model
+identifier, the prompt prefix, the prompt and the stop sequences, and store
+the cleaned text together with the call metadata.
+
+Available backends:
+
+* ``InMemoryLRUCache`` - LRU with TTL, entry-count and byte-size limits.
+* ``SQLiteCache``      - persistent on-disk tier that survives restarts.
+* ``TieredCache``      - chains caches, e.g. memory in front of SQLite.
+
+Usage::
+
+    cache = TieredCache(InMemoryLRUCache(max_entries=1024, ttl=3600), SQLiteCache("llm_cache.sqlite"))
+    llm = LmstudioLLM(response_cache=cache)
+    cache.stats.as_dict()
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+
+@dataclass(frozen=True)
+class CacheKey:
+    """Everything that determines an LLM response."""
+    model: str
+    prompt_prefix: str
+    prompt: str
+    stop: Tuple[str, ...] = ()
+    # The part of the prompt the semantic cache compares, when the caller knows
+    # it (e.g. the user question without the template); not part of the key.
+    semantic_text: Optional[str] = field(default=None, compare=False)
+
+    @classmethod
+    def build(
+        cls,
+        model: str,
+        prompt_prefix: str,
+        prompt: str,
+        stop: Optional[Sequence[str]] = None,
+        semantic_text: Optional[str] = None,
+    ) -> "CacheKey":
+        return cls(model, prompt_prefix, prompt, tuple(stop) if stop else (), semantic_text)
+
+    @property
+    def namespace(self) -> Tuple[str, str, Tuple[str, ...]]:
+        """The key without the prompt: responses are only comparable within a namespace."""
+        return (self.model, self.prompt_prefix, self.stop)
+
+    def digest(self) -> str:
+        raw = json.dumps([self.model, self.prompt_prefix, self.prompt, list(self.stop)], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CachedResponse:
+    text: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    def size(self) -> int:
+        return len(self.text.encode("utf-8")) + len(json.dumps(self.metadata, default=str))
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    puts: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "puts": self.puts,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hit_rate,
+        }
+
+
+class ResponseCache(ABC):
+    """Interface every response cache backend implements."""
+
+    def __init__(self) -> None:
+        self.stats = CacheStats()
+
+    @abstractmethod
+    def get(self, key: CacheKey) -> Optional[CachedResponse]:
+        ...
+
+    @abstractmethod
+    def put(self, key: CacheKey, response: CachedResponse) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+
+class InMemoryLRUCache(ResponseCache):
+    """Thread-safe LRU cache bounded by entry count, total bytes and entry age."""
+
+    def __init__(self, max_entries: int = 1024, max_bytes: Optional[int] = None, ttl: Optional[float] = None):
+        super().__init__()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[CachedResponse, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: CacheKey) -> Optional[CachedResponse]:
+        digest = key.digest()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None and self.ttl is not None and time.time() - entry[1] > self.ttl:
+                self._remove(digest)
+                self.stats.expirations += 1
+                entry = None
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.stats.hits += 1
+            return entry[0]
+
+    def put(self, key: CacheKey, response: CachedResponse) -> None:
+        digest = key.digest()
+        size = response.size()
+        with self._lock:
+            if digest in self._entries:
+                self._remove(digest)
+            self._entries[digest] = (response, time.time(), size)
+            self._bytes += size
+            self.stats.puts += 1
+            while self._entries and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                self._remove(next(iter(self._entries)))
+                self.stats.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, digest: str) -> None:
+        _, _, size = self._entries.pop(digest)
+        self._bytes -= size
+
+
+class SQLiteCache(ResponseCache):
+    """Persistent cache tier stored in a SQLite file."""
+
+    def __init__(self, path: str = "llm_cache.sqlite", ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        super().__init__()
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, text TEXT NOT NULL, metadata TEXT NOT NULL,"
+            " created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: CacheKey) -> Optional[CachedResponse]:
+        digest = key.digest()
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text, metadata, created_at FROM responses WHERE key = ?", (digest,)
+            ).fetchone()
+            if row is not None and self.ttl is not None and now - row[2] > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (digest,))
+                self._conn.commit()
+                self.stats.expirations += 1
+                row = None
+            if row is None:
+                self.stats.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, digest))
+            self._conn.commit()
+            self.stats.hits += 1
+        return CachedResponse(row[0], json.loads(row[1]))
+
+    def put(self, key: CacheKey, response: CachedResponse) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, text, metadata, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key.digest(), response.text, json.dumps(response.metadata, default=str), now, now),
+            )
+            self.stats.puts += 1
+            if self.max_entries is not None:
+                evicted = self._conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    " SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                ).rowcount
+                self.stats.evictions += max(evicted, 0)
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class TieredCache(ResponseCache):
+    """Looks tiers up in order and promotes hits into the faster tiers in front."""
+
+    def __init__(self, *tiers: ResponseCache):
+        super().__init__()
+        if not tiers:
+            raise ValueError("TieredCache needs at least one tier.")
+        self.tiers = tiers
+
+    def get(self, key: CacheKey) -> Optional[CachedResponse]:
+        for index, tier in enumerate(self.tiers):
+            response = tier.get(key)
+            if response is not None:
+                for faster in self.tiers[:index]:
+                    faster.put(key, response)
+                self.stats.hits += 1
+                return response
+        self.stats.misses += 1
+        return None
+
+    def put(self, key: CacheKey, response: CachedResponse) -> None:
+        self.stats.puts += 1
+        for tier in self.tiers:
+            tier.put(key, response)
+
+    def clear(self) -> None:
+        for tier in self.tiers:
+            tier.clear()
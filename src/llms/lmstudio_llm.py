@@ -1,22 +1,74 @@
 from __future__ import annotations
-from langchain.llms.base import LLM
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import Generation, GenerationChunk, LLMResult
 import lmstudio as lms
 import asyncio
-import re
-from typing import Optional, Any, Sequence
-from pydantic import Field
+import time
+from typing import Optional, Any, Sequence, List, Dict, Iterator, AsyncIterator, Tuple
+from pydantic import Field, PrivateAttr
+from langchain_core.tracers._streaming import _StreamingCallbackHandler
+from llms.async_client import AsyncLmstudioClient, get_async_client
+from llms.cache import CacheKey, CachedResponse, ResponseCache
+from llms.session import ChatSession
+from llms.think_filter import ThinkTagFilter
 
 SERVER_API_HOST = "localhost:1234"
+OPENAI_API_BASE = f"http://{SERVER_API_HOST}/v1"
+
+# NOTE: No SDK interaction happens at import time. The client connection is
+# owned by llms.registry and created on first use.
+
+# Keys of the per-call metrics in Generation.generation_info. Token counts come
+# from the server and are None when it did not report them.
+TOKEN_USAGE_KEYS = ("prompt_tokens", "completion_tokens", "total_tokens")
+
+
+def call_metrics(
+    prompt_tokens: Optional[int],
+    completion_tokens: Optional[int],
+    latency: float,
+    time_to_first_token: Optional[float] = None,
+    tokens_per_second: Optional[float] = None,
+    **extra: Any
+) -> Dict[str, Any]:
+    """Metrics of one model call; tokens/sec is derived from the timings when not reported."""
+    if tokens_per_second is None and completion_tokens:
+        generating = latency - (time_to_first_token or 0.0)
+        tokens_per_second = completion_tokens / generating if generating > 0 else None
+    total = None if prompt_tokens is None and completion_tokens is None else (prompt_tokens or 0) + (completion_tokens or 0)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": total,
+        "time_to_first_token": time_to_first_token,
+        "tokens_per_second": tokens_per_second,
+        "latency": latency,
+        "queue_wait": 0.0,
+        **extra,
+    }
 
-# This must be the *first* SDK interaction (otherwise the SDK will
-# implicitly attempt to access the default server instance)
-default_client = lms.get_default_client(SERVER_API_HOST)
 
 class LmstudioLLM(LLM):
     """A LangChain LLM wrapper for an lmstudio LLM model."""
     lm_model: lms.LLM = Field(...)
     prompt_prefix: str = Field("You are a helpful assistant, who just answers questions promptly")
-    last_metadata: dict = Field(default_factory=dict)
+    # OpenAI-compatible endpoint used by the native async path.
+    api_base: str = Field(OPENAI_API_BASE)
+    max_connections: int = Field(64)
+    # How many prompts of one agenerate/abatch call are in flight at once.
+    batch_concurrency: int = Field(8)
+    # Whether streamed output starts inside an implicit <think> block; None
+    # means auto-detect, from then on using what the first stream showed.
+    implicit_think: Optional[bool] = Field(None)
+    # Optional response cache, see llms.cache. None disables caching.
+    response_cache: Optional[ResponseCache] = Field(None)
+    # Session mode: every call appends its prompt to one stable chat (see
+    # llms.session) instead of building a fresh [system, user] chat, so the
+    # server can reuse the KV cache of earlier turns. Bypasses the response cache.
+    session_mode: bool = Field(False)
+    _session: Optional[ChatSession] = PrivateAttr(None)
+    # What auto-detection learned from the last decided stream.
+    _detected_implicit_think: Optional[bool] = PrivateAttr(None)
 
     class Config:
         extra = "allow"
@@ -29,11 +81,11 @@ class LmstudioLLM(LLM):
     ):
         # If no model is provided, load the default
         if not lm_model:
-            client = lms.get_default_client(SERVER_API_HOST)
-            loaded_models = client.list_loaded_models()
+            from llms.registry import get_registry
+            loaded_models = get_registry().loaded_models()
             if not loaded_models:
                 raise ValueError("No models loaded. Please load a model first.")
-            lm_model = loaded_models[0]  # type: ignore
+            lm_model = loaded_models[0]
             if not isinstance(lm_model, lms.LLM):
                 raise ValueError("Provided model is not a valid lmstudio model.")
         # Pass the required fields to the BaseModel constructor.
@@ -42,7 +94,6 @@ class LmstudioLLM(LLM):
             verbose=True,
             lm_model=lm_model,  #type: ignore
             prompt_prefix=prompt_prefix, #type: ignore
-            last_metadata={}, #type: ignore
             **kwargs
         )
 
@@ -51,64 +102,297 @@ class LmstudioLLM(LLM):
         return "lmstudio"
 
     def _call(self, prompt: str, stop: Optional[Sequence[str]] = None, run_manager: Any = None, **kwargs: Any) -> str:
+        return self._generate_one(prompt, stop).text
+
+    async def _acall(self, prompt: str, stop: Optional[Sequence[str]] = None, run_manager: Any = None, **kwargs: Any) -> str:
+        return (await self._agenerate_one(prompt, stop, run_manager)).text
+
+    def _generate(self, prompts: List[str], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> LLMResult:
+        return self._result([[self._generate_one(prompt, stop)] for prompt in prompts])
+
+    def _generate_one(self, prompt: str, stop: Optional[Sequence[str]] = None) -> Generation:
+        if self.session_mode:
+            text, metrics = self.chat_session.turn(prompt, stop)
+            return Generation(text=text, generation_info=metrics)
+        key = self._cache_key(prompt, stop)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        raw, metrics = self._respond_chat(self._new_chat(prompt), stop)
+        return self._finish(key, raw, metrics)
+
+    async def _agenerate_one(self, prompt: str, stop: Optional[Sequence[str]] = None, run_manager: Any = None) -> Generation:
+        if self.session_mode:
+            text, metrics = await self.chat_session.aturn(prompt, stop)
+            return Generation(text=text, generation_info=metrics)
+        if self._should_stream(run_manager):
+            # Inside astream_events (e.g. an agent served over SSE): stream, so
+            # token events reach the caller while the call still returns text.
+            generation: Optional[GenerationChunk] = None
+            async for chunk in self._astream(prompt, stop, run_manager):
+                generation = chunk if generation is None else generation + chunk
+            return Generation(text=generation.text, generation_info=generation.generation_info) if generation else Generation(text="")
+        key = self._cache_key(prompt, stop)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        raw, metrics = await self._arespond_messages(self._chat_messages(prompt), stop)
+        return self._finish(key, raw, metrics)
+
+    def _respond_chat(self, chat: lms.Chat, stop: Optional[Sequence[str]] = None) -> Tuple[str, Dict[str, Any]]:
+        """Blocking SDK call; returns the raw response text and its metrics."""
+        started = time.perf_counter()
+        first_token: List[float] = []
+        response = self.lm_model.respond(
+            chat,
+            config=self._prediction_config(stop),
+            on_first_token=lambda: first_token.append(time.perf_counter()),
+        )
+        latency = time.perf_counter() - started
+        text = response if isinstance(response, str) else response.content
+        return text, self._sdk_metrics(getattr(response, "stats", None), started, first_token, latency)
+
+    async def _arespond_messages(self, messages: List[Dict[str, str]], stop: Optional[Sequence[str]] = None) -> Tuple[str, Dict[str, Any]]:
+        # Native async path: the request goes over the pooled HTTP client, so
+        # concurrent calls share one event loop instead of one thread each.
+        started = time.perf_counter()
+        data = await self._get_async_client().chat_completion(
+            model=self.lm_model.identifier,
+            messages=messages,
+            stop=stop,
+        )
+        latency = time.perf_counter() - started
+        text = data["choices"][0]["message"].get("content") or ""
+        return text, self._usage_metrics(data.get("usage") or {}, latency)
+
+    @staticmethod
+    def _sdk_metrics(stats: Any, started: float, first_token: List[float], latency: float) -> Dict[str, Any]:
+        # Server-side stats win; the client-side first-token time is the fallback.
+        time_to_first_token = getattr(stats, "time_to_first_token_sec", None)
+        if time_to_first_token is None and first_token:
+            time_to_first_token = first_token[0] - started
+        return call_metrics(
+            getattr(stats, "prompt_tokens_count", None),
+            getattr(stats, "predicted_tokens_count", None),
+            latency,
+            time_to_first_token,
+            getattr(stats, "tokens_per_second", None),
+        )
+
+    @staticmethod
+    def _usage_metrics(usage: Dict[str, Any], latency: float, time_to_first_token: Optional[float] = None) -> Dict[str, Any]:
+        extra: Dict[str, Any] = {}
+        cached_tokens = (usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+        if cached_tokens is not None:
+            extra["cached_tokens"] = cached_tokens
+        return call_metrics(usage.get("prompt_tokens"), usage.get("completion_tokens"), latency, time_to_first_token, **extra)
+
+    @staticmethod
+    def _prediction_config(stop: Optional[Sequence[str]]) -> Optional[Dict[str, Any]]:
+        return {"stopStrings": list(stop)} if stop else None
+
+    def _new_chat(self, prompt: str) -> lms.Chat:
         # Create a fresh chat with the prompt prefix, then add the user prompt.
         chat = lms.Chat(self.prompt_prefix)
         chat.add_user_message(prompt)
-        # Call the model synchronously.
-        response = self.lm_model.respond(chat)
-        # Extract response text and metadata.
-        if not isinstance(response, str):
-            try:
-                text = response.content
-                meta = getattr(response, "metadata", {})
-            except AttributeError:
-                text = str(response)
-                meta = {}
-        else:
-            text = response
-            meta = {}
-
-        # --- Extract LLM Metadata ---
-        if "tokens_used" not in meta:
-            meta["estimated_tokens"] = len(text.split())
-        object.__setattr__(self, "last_metadata", meta)
-        # --- End of Metadata Extraction ---
-
-        # --- Temporary Fix Start ---
-        if "</think>" in text and "<think>" not in text:
-            index = text.find("</think>")
-            text = text[:index] + "<think>" + text[index:]
-        # --- Temporary Fix End ---
-
-        text = re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL)
-        return text.strip()
+        return chat
 
-    async def _acall(self, prompt: str, stop: Optional[Sequence[str]] = None, run_manager: Any = None, **kwargs: Any) -> str:
-        return await asyncio.to_thread(self._call, prompt, stop=stop, run_manager=run_manager, **kwargs)
-
-    def predict(self, text: str, *, stop: Optional[Sequence[str]] = None, **kwargs: Any) -> str:
-        return self._call(text, stop=stop, **kwargs)
-
-    def invoke(self, input: Any, config: Optional[Any] = None, **kwargs: Any) -> str:
-        # Assumes that input has a to_string() method.
-        stop = config.stop if config and hasattr(config, "stop") else None
-        if isinstance(input, str):
-            inp = input
-        elif hasattr(input, "to_string"):
-            inp = input.to_string()
-        else:
-            inp = str(input)
-        return self._call(inp, stop=stop, **kwargs)
-
-def get_llm() -> Optional[LmstudioLLM]:
-    try:
-        model = default_client.list_loaded_models()[0]
-        print(f"Loaded model: {model}")
-        llm = LmstudioLLM(
-            lm_model=model,  # type: ignore
-            prompt_prefix="You are a helpful assistant, who just answers questions promptly"
+    def _result(self, generations: List[List[Generation]]) -> LLMResult:
+        # Per-call metrics stay in each generation_info; llm_output carries the
+        # summed usage in the shape token-counting callbacks expect.
+        usage = {key: 0 for key in TOKEN_USAGE_KEYS}
+        for generation in generations:
+            info = generation[0].generation_info or {}
+            for key in TOKEN_USAGE_KEYS:
+                usage[key] += info.get(key) or 0
+        return LLMResult(generations=generations, llm_output={"token_usage": usage, "model_name": self.lm_model.identifier})
+
+    # --- Sessions ---
+
+    def start_session(self, system_prompt: Optional[str] = None) -> ChatSession:
+        """A new append-only chat with this model, independent of session mode."""
+        return ChatSession(self, system_prompt)
+
+    @property
+    def chat_session(self) -> ChatSession:
+        """The chat that calls append to in session mode, created on first use."""
+        if self._session is None:
+            self._session = self.start_session()
+        return self._session
+
+    def reset_session(self) -> None:
+        self._session = None
+
+    # --- Response Cache ---
+
+    def _cache_key(self, prompt: str, stop: Optional[Sequence[str]]) -> CacheKey:
+        return CacheKey.build(self.lm_model.identifier, self.prompt_prefix, prompt, stop)
+
+    def _cache_get(self, key: CacheKey) -> Optional[Generation]:
+        if self.response_cache is None:
+            return None
+        started = time.perf_counter()
+        cached = self.response_cache.get(key)
+        if cached is None:
+            return None
+        # A hit costs the server nothing; the original call's metrics ride along.
+        metrics = call_metrics(0, 0, time.perf_counter() - started, cache_hit=True, cached_call=cached.metadata)
+        return Generation(text=cached.text, generation_info=metrics)
+
+    def _finish(self, key: CacheKey, raw_text: str, metrics: Dict[str, Any]) -> Generation:
+        text = self._clean_text(raw_text)
+        if self.response_cache is not None:
+            self.response_cache.put(key, CachedResponse(text, metrics))
+        return Generation(text=text, generation_info=metrics)
+
+    async def _agenerate(self, prompts: List[str], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> LLMResult:
+        # The base class awaits each prompt in turn; send them concurrently over
+        # the pooled client instead, bounded by batch_concurrency.
+        semaphore = asyncio.Semaphore(self.batch_concurrency)
+
+        async def generate_one(prompt: str) -> List[Generation]:
+            queued = time.perf_counter()
+            async with semaphore:
+                queue_wait = time.perf_counter() - queued
+                generation = await self._agenerate_one(prompt, stop, run_manager)
+            generation.generation_info = {**(generation.generation_info or {}), "queue_wait": queue_wait}
+            return [generation]
+
+        generations = await asyncio.gather(*(generate_one(prompt) for prompt in prompts))
+        return self._result(list(generations))
+
+    def _stream(self, prompt: str, stop: Optional[Sequence[str]] = None, run_manager: Any = None, **kwargs: Any) -> Iterator[GenerationChunk]:
+        key = self._cache_key(prompt, stop)
+        # A session turn is appended to the chat whole and bypasses the cache,
+        # so it arrives as one chunk, like a cache hit.
+        whole = self._generate_one(prompt, stop) if self.session_mode else self._cache_get(key)
+        if whole is not None:
+            chunk = self._visible_chunk(whole.text)
+            if chunk:
+                if run_manager:
+                    run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
+            yield GenerationChunk(text="", generation_info=whole.generation_info)
+            return
+        started = time.perf_counter()
+        first_token: List[float] = []
+        think_filter = self._think_filter()
+        visible: List[str] = []
+        stream = self.lm_model.respond_stream(self._new_chat(prompt), config=self._prediction_config(stop))
+        for fragment in stream:
+            if not first_token:
+                first_token.append(time.perf_counter())
+            chunk = self._visible_chunk(think_filter.feed(fragment.content))
+            if chunk:
+                visible.append(chunk.text)
+                if run_manager:
+                    run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
+        chunk = self._visible_chunk(think_filter.flush())
+        if chunk:
+            visible.append(chunk.text)
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+        metrics = self._sdk_metrics(getattr(stream, "stats", None), started, first_token, time.perf_counter() - started)
+        yield self._finish_stream(key, think_filter, visible, metrics)
+
+    async def _astream(self, prompt: str, stop: Optional[Sequence[str]] = None, run_manager: Any = None, **kwargs: Any) -> AsyncIterator[GenerationChunk]:
+        key = self._cache_key(prompt, stop)
+        whole = await self._agenerate_one(prompt, stop) if self.session_mode else self._cache_get(key)
+        if whole is not None:
+            chunk = self._visible_chunk(whole.text)
+            if chunk:
+                if run_manager:
+                    await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
+            yield GenerationChunk(text="", generation_info=whole.generation_info)
+            return
+        started = time.perf_counter()
+        first_token: List[float] = []
+        usage: Dict[str, Any] = {}
+        think_filter = self._think_filter()
+        deltas = self._get_async_client().stream_chat_completion(
+            model=self.lm_model.identifier,
+            messages=self._chat_messages(prompt),
+            stop=stop,
+            usage=usage,
         )
-        return llm
+        visible: List[str] = []
+        fragments = 0
+        async for delta in deltas:
+            fragments += 1
+            if not first_token:
+                first_token.append(time.perf_counter())
+            chunk = self._visible_chunk(think_filter.feed(delta))
+            if chunk:
+                visible.append(chunk.text)
+                if run_manager:
+                    await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
+        chunk = self._visible_chunk(think_filter.flush())
+        if chunk:
+            visible.append(chunk.text)
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+        time_to_first_token = first_token[0] - started if first_token else None
+        metrics = self._usage_metrics(usage, time.perf_counter() - started, time_to_first_token)
+        if "completion_tokens" not in usage:
+            # The server ignored include_usage. Deltas are only roughly one per
+            # token, so they are reported apart and never summed as usage.
+            metrics["estimated_completion_tokens"] = fragments
+        yield self._finish_stream(key, think_filter, visible, metrics)
+
+    @staticmethod
+    def _should_stream(run_manager: Any) -> bool:
+        # Same check chat models use to stream under astream_events.
+        handlers = getattr(run_manager, "handlers", None) or []
+        return any(isinstance(handler, _StreamingCallbackHandler) for handler in handlers)
+
+    @staticmethod
+    def _visible_chunk(text: str) -> Optional[GenerationChunk]:
+        return GenerationChunk(text=text) if text else None
+
+    def _think_filter(self) -> ThinkTagFilter:
+        implicit_think = self.implicit_think
+        if implicit_think is None:
+            implicit_think = self._detected_implicit_think
+        return ThinkTagFilter(implicit_think)
+
+    def _finish_stream(self, key: CacheKey, think_filter: ThinkTagFilter, visible: List[str], metrics: Dict[str, Any]) -> GenerationChunk:
+        # A model keeps either closing a think block it never opened or not;
+        # start the next stream decided instead of holding text back.
+        if think_filter.detected is not None:
+            self._detected_implicit_think = think_filter.detected
+        if self.response_cache is not None:
+            self.response_cache.put(key, CachedResponse("".join(visible), metrics))
+        # Text-less last chunk: the metrics land in the merged generation_info.
+        return GenerationChunk(text="", generation_info=metrics)
+
+    def _get_async_client(self) -> AsyncLmstudioClient:
+        return get_async_client(self.api_base, max_connections=self.max_connections)
+
+    def _chat_messages(self, prompt: str) -> List[Dict[str, str]]:
+        # Same layout as the lms.Chat built in _new_chat: system prefix, then the prompt.
+        return [
+            {"role": "system", "content": self.prompt_prefix},
+            {"role": "user", "content": prompt},
+        ]
+
+    @staticmethod
+    def _clean_text(text: str) -> str:
+        # Same state machine as the streaming path, fed the whole response at
+        # once. A dangling </think> (the chat template opened the block for the
+        # model) hides everything before it.
+        think_filter = ThinkTagFilter()
+        return think_filter.feed(text) + think_filter.flush()
+
+def get_llm(identifier: Optional[str] = None) -> Optional[LmstudioLLM]:
+    """Return the shared LmstudioLLM for a loaded model, or None if none is available."""
+    from llms.registry import get_registry
+    try:
+        return get_registry().get_llm(identifier)
     except Exception as e:
         print(f"Error loading model: {e}")
         return None
@@ -116,8 +400,8 @@ def get_llm() -> Optional[LmstudioLLM]:
 if __name__ == "__main__":
     llm = get_llm()
     if llm:
-        result = llm.invoke("What is the capital of France?")
-        print(result)
-        print("Metadata:", llm.last_metadata)
+        result = llm.generate(["What is the capital of France?"])
+        print(result.generations[0][0].text)
+        print("Metrics:", result.generations[0][0].generation_info)
     else:
         print("No model available.")
@@ -0,0 +1,173 @@
+"""
+LLM Registry
+------------
+
+Process-wide owner of the LM Studio client connection and of the LmstudioLLM
+instances built on top of it.
+
+Nothing here touches the network at import time. The client is created on
+first use, loaded models are listed once and refreshed by a background thread,
+and one LmstudioLLM is cached per model identifier. Tools and agents can ask
+for an LLM on every call without paying for model discovery again.
+
+Usage::
+
+    from llms.registry import get_registry
+    llm = get_registry().get_llm()            # first loaded model
+    llm = get_registry().get_llm("qwen2.5-7b-instruct")
+"""
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, List, Optional
+
+import lmstudio as lms
+
+from llms.lmstudio_llm import SERVER_API_HOST, LmstudioLLM
+
+DEFAULT_REFRESH_INTERVAL = 30.0
+
+
+class LLMRegistry:
+    """Lazily connects to LM Studio and caches one LmstudioLLM per model identifier."""
+
+    def __init__(
+        self,
+        api_host: str = SERVER_API_HOST,
+        refresh_interval: Optional[float] = DEFAULT_REFRESH_INTERVAL,
+        **llm_kwargs: Any
+    ):
+        self.api_host = api_host
+        self.refresh_interval = refresh_interval
+        self.llm_kwargs = llm_kwargs
+        self._lock = threading.RLock()
+        self._first_listing = threading.Lock()
+        self._client: Optional[lms.Client] = None
+        self._models: Optional[List[lms.LLM]] = None
+        self._llms: Dict[str, LmstudioLLM] = {}
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+
+    @property
+    def client(self) -> lms.Client:
+        """The shared SDK client, created on first access."""
+        with self._lock:
+            if self._client is None:
+                self._client = lms.Client(self.api_host)
+            return self._client
+
+    def loaded_models(self) -> List[lms.LLM]:
+        """Loaded LLMs as of the last refresh; lists them on the first call."""
+        with self._lock:
+            models = self._models
+        if models is None:
+            # Listing is a server round-trip, made without holding _lock so
+            # cached LLMs are still served meanwhile. Only the first caller
+            # lists; concurrent first callers wait for its result.
+            with self._first_listing:
+                with self._lock:
+                    models = self._models
+                if models is None:
+                    models = self.refresh()
+                    with self._lock:
+                        self._start_refresher()
+        return list(models)
+
+    def refresh(self) -> List[lms.LLM]:
+        """Re-list the loaded models and drop cached LLMs whose model was unloaded."""
+        models = [model for model in self.client.llm.list_loaded() if isinstance(model, lms.LLM)]
+        with self._lock:
+            self._models = models
+            by_identifier = {model.identifier: model for model in models}
+            for identifier, llm in list(self._llms.items()):
+                if identifier not in by_identifier:
+                    del self._llms[identifier]
+                else:
+                    # Rebind to the fresh handle; the LLM object itself is kept,
+                    # so agents built on it stay valid.
+                    object.__setattr__(llm, "lm_model", by_identifier[identifier])
+        return models
+
+    def get_llm(self, identifier: Optional[str] = None) -> LmstudioLLM:
+        """Return the cached LmstudioLLM for ``identifier`` (default: first loaded model)."""
+        if identifier is not None:
+            with self._lock:
+                llm = self._llms.get(identifier)
+            if llm is not None:
+                return llm
+        models = self.loaded_models()
+        if identifier is None:
+            if not models:
+                raise ValueError("No models loaded. Please load a model first.")
+            model = models[0]
+        else:
+            matches = [model for model in models if model.identifier == identifier]
+            # model() loads a model that is not loaded yet, which can take a
+            # while; it must not hold up callers of models that are ready.
+            model = matches[0] if matches else self.client.llm.model(identifier)
+        with self._lock:
+            # Another caller may have resolved the same model meanwhile.
+            llm = self._llms.get(model.identifier)
+            if llm is None:
+                llm = LmstudioLLM(lm_model=model, **self.llm_kwargs)
+                self._llms[model.identifier] = llm
+            return llm
+
+    def after_fork(self) -> None:
+        """Reconnect in a forked worker process; cached LLMs keep their identity."""
+        # Threads and sockets do not survive fork, and the lock may have been
+        # held by the refresher when the parent forked.
+        self._lock = threading.RLock()
+        self._first_listing = threading.Lock()
+        self._stop = threading.Event()
+        self._refresher = None
+        self._client = None
+        if self._models is None:
+            return
+        try:
+            self.refresh()
+            self._start_refresher()
+        except Exception as e:
+            print(f"Error reconnecting to LM Studio after fork: {e}")
+
+    def close(self) -> None:
+        """Stop the background refresh and close the client connection."""
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.join()
+        self._stop = threading.Event()
+        self._refresher = None
+        with self._lock:
+            self._llms.clear()
+            self._models = None
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    def _start_refresher(self) -> None:
+        if self.refresh_interval is None or self._refresher is not None:
+            return
+        self._refresher = threading.Thread(target=self._refresh_loop, name="llm-registry-refresh", daemon=True)
+        self._refresher.start()
+
+    def _refresh_loop(self) -> None:
+        assert self.refresh_interval is not None
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                # Keep serving the last known list; LM Studio may just be restarting.
+                print(f"Error refreshing loaded models: {e}")
+
+
+_registry: Optional[LLMRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> LLMRegistry:
+    """Return the process-wide registry, creating it (without connecting) on first use."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = LLMRegistry()
+        return _registry
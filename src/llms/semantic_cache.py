@@ -0,0 +1,280 @@
+"""
+Semantic Response Cache
+-----------------------
+
+Embedding-similarity cache for near-duplicate prompts. Incoming prompts are
+embedded and compared against a NumPy matrix of earlier prompts; when the best
+cosine similarity reaches ``threshold`` the earlier answer is returned.
+
+It implements the ``ResponseCache`` interface, so it plugs into the same
+``response_cache`` slot of LmstudioLLM. Put it behind an exact cache so exact
+repeats never pay for an embedding::
+
+    cache = TieredCache(InMemoryLRUCache(), SemanticCache(HashingVectorizer(), threshold=0.9))
+    llm = LmstudioLLM(response_cache=cache)
+
+Two embedders are provided: ``LmstudioEmbedder`` uses a small embedding model
+loaded in LM Studio, ``HashingVectorizer`` is deterministic and dependency-free
+(tests, offline runs).
+
+Only the variable part of a prompt is embedded. In a long agent template, the
+instructions and tool list would otherwise dominate the vector, and any two
+questions would look alike. Pass the templates the prompts are rendered from
+and the cache embeds just the values filled into them. A ``CacheKey`` can
+also carry the text to compare directly as ``semantic_text``::
+
+    cache = SemanticCache(HashingVectorizer(), templates=[agent_prompt])
+"""
+from __future__ import annotations
+
+import re
+import string
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from llms.cache import CacheKey, CachedResponse, ResponseCache
+
+Embedder = Callable[[Sequence[str]], np.ndarray]
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class HashingVectorizer:
+    """Deterministic bag-of-ngrams embedder using the hashing trick."""
+
+    def __init__(self, n_features: int = 1024, ngram_range: Tuple[int, int] = (1, 2)):
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+
+    def _features(self, text: str) -> List[str]:
+        tokens = _TOKEN_RE.findall(text.lower())
+        low, high = self.ngram_range
+        return [
+            " ".join(tokens[i:i + n])
+            for n in range(low, high + 1)
+            for i in range(len(tokens) - n + 1)
+        ]
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.n_features), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                # crc32 rather than hash(): stable across processes.
+                digest = zlib.crc32(feature.encode("utf-8"))
+                sign = 1.0 if digest & 0x80000000 else -1.0
+                matrix[row, digest % self.n_features] += sign
+        return _normalize(matrix)
+
+
+class LmstudioEmbedder:
+    """Embeds texts with an embedding model loaded in LM Studio."""
+
+    def __init__(self, model_key: Optional[str] = None):
+        self.model_key = model_key
+        self._model: Any = None
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        if self._model is None:
+            from llms.registry import get_registry
+            self._model = get_registry().client.embedding.model(self.model_key)
+        vectors = self._model.embed(list(texts))
+        return _normalize(np.asarray(vectors, dtype=np.float32))
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class TemplatePattern:
+    """Matches prompts rendered from an f-string template and returns the values filled into it."""
+
+    def __init__(self, template: Any, constants: Iterable[str] = ("tools", "tool_names")):
+        # A template string or a PromptTemplate; partials are template text, not user input.
+        text = getattr(template, "template", template)
+        constants = {*constants, *getattr(template, "partial_variables", {})}
+        pattern = []
+        for literal, field, _, _ in string.Formatter().parse(text):
+            pattern.append(re.escape(literal))
+            if field is not None:
+                pattern.append("(?:.*?)" if field in constants else "(.*?)")
+        self._regex = re.compile("".join(pattern) + r"\Z", re.DOTALL)
+
+    def variable_text(self, prompt: str) -> Optional[str]:
+        """The filled-in values of ``prompt``, or None if it was not rendered from this template."""
+        match = self._regex.match(prompt)
+        if match is None:
+            return None
+        return "\n".join(value.strip() for value in match.groups() if value.strip())
+
+
+class _Index:
+    """Embedding matrix and payloads for one (model, prefix, stop) namespace."""
+
+    def __init__(self, dim: int, capacity: int = 64):
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.prompts: List[str] = []
+        self.responses: List[CachedResponse] = []
+        self.created: List[float] = []
+        self.last_used: List[float] = []
+        # prompt -> row; the namespace is fixed, so the prompt is the exact key.
+        self.positions: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.responses)
+
+    def add(self, prompt: str, vector: np.ndarray, response: CachedResponse, now: float) -> None:
+        """Append a row, or replace the row already stored for ``prompt``."""
+        position = self.positions.get(prompt)
+        if position is not None:
+            self.vectors[position] = vector
+            self.responses[position] = response
+            self.created[position] = now
+            self.last_used[position] = now
+            return
+        size = len(self.responses)
+        if size == self.vectors.shape[0]:
+            grown = np.zeros((size * 2, self.vectors.shape[1]), dtype=np.float32)
+            grown[:size] = self.vectors
+            self.vectors = grown
+        self.vectors[size] = vector
+        self.prompts.append(prompt)
+        self.responses.append(response)
+        self.created.append(now)
+        self.last_used.append(now)
+        self.positions[prompt] = size
+
+    def nearest(self, vector: np.ndarray) -> Tuple[int, float]:
+        scores = self.vectors[:len(self.responses)] @ vector
+        best = int(np.argmax(scores))
+        return best, float(scores[best])
+
+    def remove(self, position: int) -> None:
+        # Swap with the last row so removal stays O(dim).
+        del self.positions[self.prompts[position]]
+        last = len(self.responses) - 1
+        if position != last:
+            self.vectors[position] = self.vectors[last]
+            self.prompts[position] = self.prompts[last]
+            self.responses[position] = self.responses[last]
+            self.created[position] = self.created[last]
+            self.last_used[position] = self.last_used[last]
+            self.positions[self.prompts[position]] = position
+        self.prompts.pop()
+        self.responses.pop()
+        self.created.pop()
+        self.last_used.pop()
+
+
+class SemanticCache(ResponseCache):
+    """Returns a cached answer when a new prompt is close enough to an earlier one."""
+
+    def __init__(
+        self,
+        embedder: Optional[Embedder] = None,
+        threshold: float = 0.92,
+        max_entries: int = 2048,
+        ttl: Optional[float] = None,
+        templates: Iterable[Any] = (),
+    ):
+        super().__init__()
+        self.embedder = embedder or HashingVectorizer()
+        self.templates = [TemplatePattern(template) for template in templates]
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_total = 0.0
+        self._indexes: Dict[Tuple[Any, ...], _Index] = {}
+        # A miss is normally followed by a put for the same prompt; keep the
+        # last few embeddings so the prompt is only embedded once.
+        self._recent: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return sum(len(index) for index in self._indexes.values())
+
+    def stats_dict(self) -> Dict[str, Any]:
+        data = self.stats.as_dict()
+        data["entries"] = len(self)
+        data["mean_hit_similarity"] = self.similarity_total / self.stats.hits if self.stats.hits else 0.0
+        return data
+
+    def get(self, key: CacheKey) -> Optional[CachedResponse]:
+        vector = self._embed(self._semantic_text(key))
+        now = time.time()
+        with self._lock:
+            index = self._indexes.get(key.namespace)
+            if index is None or not len(index):
+                self.stats.misses += 1
+                return None
+            position, similarity = index.nearest(vector)
+            if self.ttl is not None and now - index.created[position] > self.ttl:
+                index.remove(position)
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+            if similarity < self.threshold:
+                self.stats.misses += 1
+                return None
+            index.last_used[position] = now
+            self.stats.hits += 1
+            self.similarity_total += similarity
+            response = index.responses[position]
+        return CachedResponse(response.text, {**response.metadata, "semantic_similarity": similarity})
+
+    def put(self, key: CacheKey, response: CachedResponse) -> None:
+        vector = self._embed(self._semantic_text(key))
+        with self._lock:
+            index = self._indexes.get(key.namespace)
+            if index is None:
+                index = self._indexes[key.namespace] = _Index(vector.shape[0])
+            index.add(key.prompt, vector, response, time.time())
+            self.stats.puts += 1
+            while len(self) > self.max_entries:
+                self._evict_least_recently_used()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indexes.clear()
+            self._recent.clear()
+
+    def _semantic_text(self, key: CacheKey) -> str:
+        if key.semantic_text is not None:
+            return key.semantic_text
+        for template in self.templates:
+            text = template.variable_text(key.prompt)
+            if text is not None:
+                return text
+        return key.prompt
+
+    def _embed(self, prompt: str) -> np.ndarray:
+        with self._lock:
+            vector = self._recent.get(prompt)
+            if vector is not None:
+                self._recent.move_to_end(prompt)
+                return vector
+        vector = np.asarray(self.embedder([prompt])[0], dtype=np.float32)
+        with self._lock:
+            self._recent[prompt] = vector
+            if len(self._recent) > 64:
+                self._recent.popitem(last=False)
+        return vector
+
+    def _evict_least_recently_used(self) -> None:
+        victim: Optional[Tuple[_Index, int]] = None
+        oldest = float("inf")
+        for index in self._indexes.values():
+            if len(index):
+                position = int(np.argmin(index.last_used))
+                if index.last_used[position] < oldest:
+                    oldest = index.last_used[position]
+                    victim = (index, position)
+        if victim is not None:
+            victim[0].remove(victim[1])
+            self.stats.evictions += 1
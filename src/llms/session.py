@@ -0,0 +1,159 @@
+"""
+Chat Sessions
+-------------
+
+An append-only chat against one model, laid out so the server can reuse its
+prompt-prefix (KV) cache between turns.
+
+A stateless call builds a fresh ``[system, user]`` chat. A multi-turn caller
+that rebuilds its message list on every turn sends the model a new prompt
+each time, so the server reprocesses all of it. A ``ChatSession`` keeps one
+message list. The system prompt is the first message and is never edited.
+Each turn appends the user message and then the model's reply, exactly as
+generated. The prompt of turn N+1 is therefore the prompt of turn N, plus the
+reply, plus the new message. Only that tail has to be processed.
+
+Every turn records how much of its prompt was reused from the previous turn
+and how much was reprocessed. When the server reports cached prompt tokens
+(``usage.prompt_tokens_details.cached_tokens``), that number is used. If it
+does not, the estimate is the previous prompt plus the previous reply, which
+is exactly the unchanged prefix.
+
+Usage::
+
+    session = llm.start_session()
+    session.send("Who wrote Dune?")
+    session.send("When was it published?")
+    print(session.totals())
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import weakref
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+import lmstudio as lms
+
+if TYPE_CHECKING:
+    from llms.lmstudio_llm import LmstudioLLM
+
+
+@dataclass
+class TurnStats:
+    prompt_tokens: int
+    completion_tokens: int
+    reused_tokens: int
+    # True when the server reported the cached tokens, False when estimated.
+    reported: bool = False
+
+    @property
+    def reprocessed_tokens(self) -> int:
+        return self.prompt_tokens - self.reused_tokens
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "reprocessed_tokens": self.reprocessed_tokens}
+
+
+class ChatSession:
+    """A stable, append-only chat with one ``LmstudioLLM``; turns run one at a time."""
+
+    def __init__(self, llm: "LmstudioLLM", system_prompt: Optional[str] = None):
+        self.llm = llm
+        self.system_prompt = llm.prompt_prefix if system_prompt is None else system_prompt
+        self.messages: List[Dict[str, str]] = [{"role": "system", "content": self.system_prompt}]
+        self.stats: List[TurnStats] = []
+        # The SDK chat mirrors ``messages``; it is appended to, never rebuilt.
+        self._chat = lms.Chat(self.system_prompt)
+        # Held for a whole turn, sync or async, so turns are recorded in the order they ran.
+        self._lock = threading.Lock()
+        # Queues async turns on each event loop; an asyncio.Lock is bound to one loop.
+        self._alocks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+        self._alocks_lock = threading.Lock()
+
+    # --- Turns ---
+
+    def send(self, content: str, stop: Optional[Sequence[str]] = None) -> str:
+        """Append a user message, get the reply and append it; returns the visible reply."""
+        return self.turn(content, stop)[0]
+
+    async def asend(self, content: str, stop: Optional[Sequence[str]] = None) -> str:
+        """Async ``send`` over the pooled OpenAI-compatible client."""
+        return (await self.aturn(content, stop))[0]
+
+    def turn(self, content: str, stop: Optional[Sequence[str]] = None) -> Tuple[str, Dict[str, Any]]:
+        """``send`` that also returns the call metrics, including this turn's reuse stats."""
+        with self._lock:
+            self._chat.add_user_message(content)
+            try:
+                raw, metrics = self.llm._respond_chat(self._chat, stop)
+            except BaseException:
+                # Drop the unanswered user message so the chat matches ``messages`` again.
+                self._chat = lms.Chat.from_history({"messages": self.messages})
+                raise
+            self._chat.add_assistant_response(raw)
+            metrics.update(self._record(content, raw, metrics).as_dict())
+        return self.llm._clean_text(raw), metrics
+
+    async def aturn(self, content: str, stop: Optional[Sequence[str]] = None) -> Tuple[str, Dict[str, Any]]:
+        async with self._loop_lock():
+            await self._acquire_lock()
+            try:
+                messages = [*self.messages, {"role": "user", "content": content}]
+                raw, metrics = await self.llm._arespond_messages(messages, stop)
+                self._chat.add_user_message(content)
+                self._chat.add_assistant_response(raw)
+                metrics.update(self._record(content, raw, metrics).as_dict())
+            finally:
+                self._lock.release()
+        return self.llm._clean_text(raw), metrics
+
+    def _loop_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        with self._alocks_lock:
+            lock = self._alocks.get(loop)
+            if lock is None:
+                lock = self._alocks[loop] = asyncio.Lock()
+            return lock
+
+    async def _acquire_lock(self, poll_interval: float = 0.005) -> None:
+        # Poll rather than block: a sync turn on another thread may hold the
+        # lock, and waiting in an executor would leak it if this task is cancelled.
+        while not self._lock.acquire(blocking=False):
+            await asyncio.sleep(poll_interval)
+
+    def _record(self, content: str, raw: str, metrics: Dict[str, Any]) -> TurnStats:
+        self.messages.append({"role": "user", "content": content})
+        self.messages.append({"role": "assistant", "content": raw})
+        prompt_tokens = metrics.get("prompt_tokens") or 0
+        completion_tokens = metrics.get("completion_tokens") or 0
+        cached_tokens = metrics.get("cached_tokens")
+        if cached_tokens is not None:
+            reused, reported = cached_tokens, True
+        elif self.stats:
+            # The whole previous prompt and reply are an unchanged prefix of this prompt.
+            previous = self.stats[-1]
+            reused, reported = previous.prompt_tokens + previous.completion_tokens, False
+        else:
+            reused, reported = 0, False
+        stats = TurnStats(prompt_tokens, completion_tokens, min(reused, prompt_tokens), reported)
+        self.stats.append(stats)
+        return stats
+
+    # --- Reporting ---
+
+    @property
+    def last_stats(self) -> Optional[TurnStats]:
+        return self.stats[-1] if self.stats else None
+
+    def totals(self) -> Dict[str, Any]:
+        prompt = sum(turn.prompt_tokens for turn in self.stats)
+        reused = sum(turn.reused_tokens for turn in self.stats)
+        return {
+            "turns": len(self.stats),
+            "prompt_tokens": prompt,
+            "reused_tokens": reused,
+            "reprocessed_tokens": prompt - reused,
+            "reuse_ratio": reused / prompt if prompt else 0.0,
+        }
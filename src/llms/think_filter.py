@@ -0,0 +1,163 @@
+"""
+Incremental <think> Tag Filter
+------------------------------
+
+Reasoning models wrap their chain of thought in ``<think>...</think>``. The
+blocking path strips those spans with a regex once the whole completion is in;
+this module does the same job chunk by chunk so streamed output can be shown
+as soon as it is visible.
+
+Only the tail of a chunk that could still turn into a tag is held back, so
+memory stays bounded by the tag length, not by the response length.
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+OPEN_TAG = "<think>"
+CLOSE_TAG = "</think>"
+
+# States of the filter.
+PENDING = "pending"  # not yet known whether the stream starts inside a think block
+VISIBLE = "visible"
+THINKING = "thinking"
+
+
+def _partial_tag_len(text: str, tag: str) -> int:
+    """Length of the longest suffix of ``text`` that is a proper prefix of ``tag``."""
+    for size in range(min(len(text), len(tag) - 1), 0, -1):
+        if tag.startswith(text[-size:]):
+            return size
+    return 0
+
+
+class ThinkTagFilter:
+    """
+    Streaming state machine that suppresses ``<think>...</think>`` spans.
+
+    ``implicit_think`` covers the dangling ``</think>`` case, where the chat
+    template already opened the think block and the model only emits the
+    closing tag:
+
+    * ``True``  - the stream starts inside a think block.
+    * ``False`` - the stream starts visible.
+    * ``None``  - auto: a stream whose first non-whitespace text is ``<think>``
+      is decided at once. Any other text is held until a tag shows up, or
+      until ``max_pending_chars`` have arrived without one, in which case it is
+      released as visible text. ``detected`` tells the caller which case the
+      stream was, so the next stream need not wait.
+
+    Once a closing tag shows up, no text before it is ever shown, even if the
+    lookahead ran out first. Like the blocking path, surrounding whitespace of
+    the visible text is stripped. A think block that never closes is
+    suppressed.
+    """
+
+    def __init__(self, implicit_think: Optional[bool] = None, max_pending_chars: int = 2048):
+        self._auto = implicit_think is None
+        if implicit_think is None:
+            self.state = PENDING
+        else:
+            self.state = THINKING if implicit_think else VISIBLE
+        self.max_pending_chars = max_pending_chars
+        # True once a closing tag was seen without a matching opening tag.
+        self.dangling = False
+        # Auto mode only: whether the stream started inside an implicit think
+        # block, once the stream showed it; None while undecided.
+        self.detected: Optional[bool] = None
+        self._buffer = ""
+        self._started = False
+        self._held_whitespace = ""
+        # Pending text was released on the lookahead limit, so a dangling
+        # closing tag can still follow.
+        self._released = False
+
+    def feed(self, chunk: str) -> str:
+        """Consume the next chunk and return the text that is safe to show."""
+        self._buffer += chunk
+        out = []
+        while True:
+            if self.state == PENDING:
+                head = self._buffer.lstrip()
+                open_at = self._buffer.find(OPEN_TAG)
+                close_at = self._buffer.find(CLOSE_TAG)
+                if head.startswith(OPEN_TAG):
+                    # An explicit block: the model opens its own tags.
+                    self.detected = False
+                    self.state = VISIBLE
+                elif OPEN_TAG.startswith(head):
+                    # Only whitespace or the start of an opening tag so far.
+                    break
+                elif close_at != -1 and (open_at == -1 or close_at < open_at):
+                    self._close_dangling(close_at)
+                elif open_at != -1:
+                    self.detected = False
+                    self.state = VISIBLE
+                elif len(self._buffer) > self.max_pending_chars:
+                    self._released = True
+                    self.state = VISIBLE
+                else:
+                    break
+            elif self.state == VISIBLE:
+                open_at = self._buffer.find(OPEN_TAG)
+                close_at = self._buffer.find(CLOSE_TAG) if self._released else -1
+                if close_at != -1 and (open_at == -1 or close_at < open_at):
+                    # The released text was reasoning after all; what is left of it is dropped.
+                    self._close_dangling(close_at)
+                    continue
+                if open_at != -1:
+                    self._released = False
+                    out.append(self._buffer[:open_at])
+                    self._buffer = self._buffer[open_at + len(OPEN_TAG):]
+                    self.state = THINKING
+                    continue
+                keep = _partial_tag_len(self._buffer, OPEN_TAG)
+                if self._released:
+                    keep = max(keep, _partial_tag_len(self._buffer, CLOSE_TAG))
+                out.append(self._buffer[:len(self._buffer) - keep])
+                self._buffer = self._buffer[len(self._buffer) - keep:]
+                break
+            else:
+                close_at = self._buffer.find(CLOSE_TAG)
+                if close_at != -1:
+                    self._buffer = self._buffer[close_at + len(CLOSE_TAG):]
+                    self.state = VISIBLE
+                    continue
+                keep = _partial_tag_len(self._buffer, CLOSE_TAG)
+                self._buffer = self._buffer[len(self._buffer) - keep:]
+                break
+        return self._emit("".join(out))
+
+    def _close_dangling(self, close_at: int) -> None:
+        # Everything so far was reasoning without an opening tag.
+        self.dangling = True
+        self.detected = True
+        self._released = False
+        self._buffer = self._buffer[close_at + len(CLOSE_TAG):]
+        self.state = VISIBLE
+
+    def flush(self) -> str:
+        """Return whatever visible text is still held once the stream has ended."""
+        text = self._buffer if self.state in (PENDING, VISIBLE) else ""
+        self._buffer = ""
+        if self.state == PENDING:
+            self.state = VISIBLE
+        if self._auto and self.detected is None:
+            # Ended without a dangling closing tag.
+            self.detected = False
+        self._released = False
+        # Trailing whitespace is dropped, matching text.strip() on the full response.
+        text = self._emit(text)
+        self._held_whitespace = ""
+        return text
+
+    def _emit(self, text: str) -> str:
+        if not self._started:
+            text = text.lstrip()
+            if not text:
+                return ""
+            self._started = True
+        text = self._held_whitespace + text
+        stripped = text.rstrip()
+        self._held_whitespace = text[len(stripped):]
+        return stripped
@@ -1,16 +1,311 @@
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+import gc
+import json
+import os
+import signal
+import socket
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
 import uvicorn
 
-app = FastAPI()
+from agents.serving import AgentPool, AgentSaturated, build_agent_pool
+
+
+DEFAULT_GRACEFUL_TIMEOUT = 30.0
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Executors are built once here and reused by every request. A pool set
+    # on app.state beforehand (tests, preloading) is used as is.
+    if getattr(app.state, "agents", None) is None:
+        app.state.agents = build_agent_pool()
+    forked_at = getattr(app.state, "forked_at", None)
+    if forked_at is not None:
+        print(f"Worker {os.getpid()} ready in {time.perf_counter() - forked_at:.3f}s after fork")
+    yield
+    # Uvicorn has stopped accepting and waited for open connections; give
+    # runs that are still going the rest of the grace period.
+    timeout = getattr(app.state, "graceful_timeout", DEFAULT_GRACEFUL_TIMEOUT)
+    if not await app.state.agents.drain(timeout=timeout):
+        print(f"Worker {os.getpid()}: {app.state.agents.in_flight} agent runs still in flight at shutdown")
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+class InvokeRequest(BaseModel):
+    input: str
+
+
+def get_agent(request: Request, name: str):
+    pool: AgentPool = request.app.state.agents
+    executor = pool.get(name)
+    if executor is None:
+        raise HTTPException(status_code=404, detail=f"Unknown agent '{name}'. Available: {pool.names()}")
+    return pool, executor
+
+
+def saturated(error: AgentSaturated) -> HTTPException:
+    return HTTPException(status_code=429, detail=str(error), headers={"Retry-After": "1"})
+
+
+class SlotStreamingResponse(StreamingResponse):
+    """Streams while holding a run slot of ``pool``; the slot is released however the response ends.
+
+    The generator's own ``finally`` is not enough: a client that disconnects
+    before the first event means the generator never starts, and background
+    tasks are skipped when sending fails.
+    """
+
+    def __init__(self, content: Any, pool: AgentPool, **kwargs: Any):
+        super().__init__(content, **kwargs)
+        self.pool = pool
+
+    async def __call__(self, scope: Any, receive: Any, send: Any) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.pool.release()
+
+
+def sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
 
 @app.get("/")
 def home():
     return JSONResponse(content={"message": "Hello, World! This is Agentic Framework simple server using FastAPI."})
 
-def main():
-    # Run the server on all interfaces on port 8000 with auto-reload enabled.
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+
+@app.get("/agents")
+async def list_agents(request: Request):
+    return request.app.state.agents.stats()
+
+
+@app.post("/agents/{name}/invoke")
+async def invoke_agent(name: str, body: InvokeRequest, request: Request):
+    pool, executor = get_agent(request, name)
+    try:
+        async with pool.slot():
+            result = await executor.ainvoke({"input": body.input})
+    except AgentSaturated as e:
+        raise saturated(e)
+    return {"agent": name, "output": result["output"]}
+
+
+@app.post("/agents/{name}/stream")
+async def stream_agent(name: str, body: InvokeRequest, request: Request):
+    pool, executor = get_agent(request, name)
+    # Take the slot before responding so a saturated server answers 429
+    # instead of opening a stream it cannot serve; the response releases it.
+    try:
+        pool.acquire()
+    except AgentSaturated as e:
+        raise saturated(e)
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            async for event in executor.astream_events({"input": body.input}, version="v2"):
+                kind = event["event"]
+                if kind == "on_llm_stream":
+                    text = getattr(event["data"]["chunk"], "text", str(event["data"]["chunk"]))
+                    # The LLM's last chunk carries only its call metrics.
+                    if text:
+                        yield sse("token", {"text": text})
+                elif kind == "on_tool_start":
+                    yield sse("tool_start", {"tool": event["name"], "input": event["data"].get("input")})
+                elif kind == "on_tool_end":
+                    yield sse("tool_end", {"tool": event["name"], "output": event["data"].get("output")})
+                elif kind == "on_chain_end" and not event["parent_ids"]:
+                    yield sse("end", {"agent": name, "output": event["data"]["output"]["output"]})
+        except Exception as e:
+            yield sse("error", {"message": str(e)})
+
+    return SlotStreamingResponse(events(), pool, media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+# --- Production Server ---
+
+
+def preload() -> Dict[str, float]:
+    """Build the LLM client, tools and agent executors in this process and report timings."""
+    timings: Dict[str, float] = {}
+    start = time.perf_counter()
+    import tools
+    tools.load_tools()  # imported lazily otherwise; build them before forking workers
+    timings["tools"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    from llms.lmstudio_llm import get_llm
+    llm = get_llm()
+    if llm is None:
+        raise RuntimeError("No LLM available to serve agents. Is LM Studio running with a model loaded?")
+    timings["llm"] = time.perf_counter() - start
+
+    app.state.agents = build_agent_pool(llm=llm)
+    for name, seconds in app.state.agents.build_seconds.items():
+        timings[f"agent {name}"] = seconds
+
+    # Move everything built so far out of the collector's reach: collections
+    # in a worker then never write to (and un-share) these pages.
+    start = time.perf_counter()
+    gc.collect()
+    gc.freeze()
+    timings["gc freeze"] = time.perf_counter() - start
+    return timings
+
+
+def print_startup_report(timings: Dict[str, float], workers: int, mode: str) -> None:
+    print("Agentic Framework startup")
+    for phase, seconds in timings.items():
+        print(f"  {phase:<24} {seconds:8.3f}s")
+    print(f"  {'total':<24} {sum(timings.values()):8.3f}s")
+    print(f"  frozen objects: {gc.get_freeze_count()}, workers: {workers} ({mode})")
+
+
+def run_gunicorn(host: str, port: int, workers: int, graceful_timeout: float) -> None:
+    """Serve the preloaded app with gunicorn's pre-fork master and uvicorn workers."""
+    from gunicorn.app.base import BaseApplication
+
+    try:
+        import uvicorn_worker  # noqa: F401
+        worker_class = "uvicorn_worker.UvicornWorker"
+    except ImportError:
+        worker_class = "uvicorn.workers.UvicornWorker"
+
+    def post_fork(server: Any, worker: Any) -> None:
+        from llms.registry import get_registry
+        app.state.forked_at = time.perf_counter()
+        get_registry().after_fork()
+
+    class PreloadedApplication(BaseApplication):
+        def load_config(self) -> None:
+            self.cfg.set("bind", f"{host}:{port}")
+            self.cfg.set("workers", workers)
+            self.cfg.set("worker_class", worker_class)
+            self.cfg.set("preload_app", True)
+            self.cfg.set("graceful_timeout", graceful_timeout)
+            self.cfg.set("post_fork", post_fork)
+
+        def load(self) -> FastAPI:
+            return app
+
+    PreloadedApplication().run()
+
+
+def run_prefork(host: str, port: int, workers: int, graceful_timeout: float) -> None:
+    """
+    Minimal pre-fork supervisor for when gunicorn is not installed.
+
+    ``uvicorn --workers`` spawns fresh interpreters, which would re-import and
+    rebuild everything per worker. Instead the listening socket is bound
+    here, the preloaded process is forked, and each child runs a uvicorn
+    server on the shared socket. SIGTERM/SIGINT are forwarded to the
+    workers, which stop accepting and drain before exiting.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    children: Dict[int, float] = {}
+    stopping = False
+
+    def spawn() -> None:
+        pid = os.fork()
+        if pid:
+            children[pid] = time.perf_counter()
+            return
+        # --- Worker ---
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        from llms.registry import get_registry
+        app.state.forked_at = time.perf_counter()
+        get_registry().after_fork()
+        config = uvicorn.Config(app, lifespan="on", timeout_graceful_shutdown=int(graceful_timeout))
+        uvicorn.Server(config).run(sockets=[sock])
+        os._exit(0)
+
+    def stop(signum: int, frame: Any) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        spawn()
+    print(f"Serving on http://{host}:{port} with {workers} pre-forked workers (pids {sorted(children)})")
+
+    deadline: Optional[float] = None
+    while children:
+        if stopping and deadline is None:
+            deadline = time.monotonic() + graceful_timeout + 5.0
+        if deadline is not None and time.monotonic() > deadline:
+            for pid in list(children):
+                print(f"Worker {pid} did not drain in time; killing it")
+                os.kill(pid, signal.SIGKILL)
+            deadline = float("inf")
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid == 0:
+            time.sleep(0.1)
+            continue
+        started = children.pop(pid, None)
+        if not stopping and started is not None:
+            print(f"Worker {pid} exited with status {status}; starting a replacement")
+            spawn()
+    sock.close()
+
+
+def main(
+    production: Optional[bool] = None,
+    host: str = "0.0.0.0",
+    port: int = 8000,
+    workers: Optional[int] = None,
+    graceful_timeout: float = DEFAULT_GRACEFUL_TIMEOUT,
+):
+    """
+    Run the server. Development mode (the default) runs one auto-reloading
+    worker. Production mode (``production=True`` or AGENTIC_ENV=production)
+    preloads agents, forks ``workers`` processes (default $WEB_CONCURRENCY or
+    2) with reload off, and drains in-flight runs on shutdown.
+    """
+    if production is None:
+        production = os.environ.get("AGENTIC_ENV", "development") == "production"
+    if not production:
+        # Run the server on all interfaces on port 8000 with auto-reload enabled.
+        uvicorn.run("main:app", host=host, port=port, reload=True)
+        return
+
+    workers = workers or int(os.environ.get("WEB_CONCURRENCY", "2"))
+    app.state.graceful_timeout = graceful_timeout
+    timings = preload()
+    try:
+        import gunicorn  # noqa: F401
+        mode = "gunicorn"
+    except ImportError:
+        mode = "prefork" if hasattr(os, "fork") else "single"
+    print_startup_report(timings, workers if mode != "single" else 1, mode)
+    if mode == "gunicorn":
+        run_gunicorn(host, port, workers, graceful_timeout)
+    elif mode == "prefork":
+        run_prefork(host, port, workers, graceful_timeout)
+    else:
+        # No fork on this platform: one worker that still shares the preload.
+        uvicorn.run(app, host=host, port=port, timeout_graceful_shutdown=int(graceful_timeout))
 
 if __name__ == "__main__":
     main()
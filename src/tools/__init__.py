@@ -2,16 +2,48 @@
 Agentic Framework Tools Package
 ---------------------------------
 
-This package consolidates utility functions into a single namespace by
-dynamically importing all functions and methods from the modules and sub-packages
-in this directory, and exposing them as tools.
+This package consolidates the tools into a single namespace. Tools are
+declared in ``tools.registry`` and their modules are imported on first use.
 
 Implemented by: Sheshank Joshi
 Version: 1.0.0
 Last Modified: 2025-04-03
 """
 
-from .basic_tools import *
+from tools.registry import TOOL_SPECS, get_tool, load_tools, resolve, tool_specs
+
+# Tools and implementation helpers resolve on first attribute access (PEP 562),
+# so ``import tools`` does not import pptx, the Google client or langchain.agents.
+_LAZY_ATTRIBUTES = {
+    **{spec.export: spec.target for spec in TOOL_SPECS},
+    "generate_presentation": "tools.implementation.web_tools:generate_presentation",
+    "process_references": "tools.implementation.web_tools:process_references",
+    "google_search_web": "tools.implementation.web_tools:google_search_web",
+    "fetch_text": "tools.implementation.text_extraction:fetch_text",
+    "WikipediaFetcher": "tools.implementation.wiki_tools:WikipediaFetcher",
+    "fetch_wikipedia_articles": "tools.implementation.wiki_tools:fetch_wikipedia_articles",
+    "get_wikipedia_fetcher": "tools.implementation.wiki_tools:get_wikipedia_fetcher",
+    "load_registered_tools": "tools.persist_tools.loader:load_registered_tools",
+    "ToolIndex": "tools.retrieval:ToolIndex",
+}
+_TOOL_EXPORTS = {spec.export for spec in TOOL_SPECS}
+
+__all__ = ["TOOL_SPECS", "get_tool", "load_tools", "tool_specs", *_LAZY_ATTRIBUTES]
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if name in _TOOL_EXPORTS:
+        value = get_tool(name)
+    else:
+        value = resolve(_LAZY_ATTRIBUTES[name])
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *_LAZY_ATTRIBUTES})
 
 
 # Iterate over all modules and sub-packages in the current directory
@@ -1,12 +1,12 @@
 import requests
-import os
-from functools import partial
-from langchain.agents import initialize_agent, tool
+from typing import List
 # from langchain_deepseek.tools import load_deepseek_age
 # from langchain_deepseek.chat_models import ChatDeepSeek
-from langchain_core.tools import Tool
-from langchain_google_community import GoogleSearchAPIWrapper
-from tools.implementation import *
+from langchain_core.tools import Tool, tool
+from tools.implementation.text_extraction import fetch_text
+from tools.implementation.web_tools import generate_presentation, google_search_web, process_references
+from tools.implementation.wiki_tools import fetch_wikipedia_articles
+from tools.registry import tool_spec
 # from dotenv import load_dotenv
 # load_dotenv()
 
@@ -14,36 +14,42 @@ from tools.implementation import *
 # Set up environment variables with necessary credentials and keys.
 # os.environ["GOOGLE_API_KEY"] = "YOUR_GOOGLE_API_KEY"
 # os.environ["CUSTOM_SEARCH_ENGINE_ID"] = "YOUR_CSE_ID"
-print("Google Search ID : ", os.getenv("GOOGLE_API_KEY"))
+# Names and descriptions are declared in tools.registry.
 
 
 web_search_google = Tool(
-    name="google_search",
-    description="Search Google for recent results.",
+    name=tool_spec("web_search_google").name,
+    description=tool_spec("web_search_google").description,
     func=google_search_web() # NOTE : The difference here is very clearly formatted the way partial implementation is given, for pre-configuration
 )
 
 ppt_tool = Tool(
-    name="create_ppt",
+    name=tool_spec("ppt_tool").name,
     func=generate_presentation,
-    description="Generates a PowerPoint presentation with provided title, content and references."
+    description=tool_spec("ppt_tool").description
 )
 ref_tool = Tool(
-    name="add_references",
+    name=tool_spec("ref_tool").name,
     func=process_references,
-    description="Processes and formats a list of references."
+    description=tool_spec("ref_tool").description
 )
 
 @tool
 def analyze_url_text(url: str) -> dict:
     """Analyze the text content of a given URL and returns the first 1500 words of it."""
-    response = requests.get(url)  # WE can use much better scraper here
-    if response.status_code == 200:
-        # Limit to first 1500 characters for analysis
-        text_content = response.text[:1500]
-        return {"content": text_content, "status": "success"}
-    else:
+    # Streams the page and stops reading once 1500 words of text are extracted.
+    try:
+        result = fetch_text(url, max_words=1500, cache_namespace="analyze_url_text")
+    except requests.RequestException:
         return {"content": "", "status": "failed"}
+    return {"content": result["content"], "status": result["status"]}
+
+
+@tool
+def wikipedia_lookup(queries: List[str]) -> list:
+    """Fetch the introduction of the most relevant Wikipedia article for each query. Pass all topics in one call."""
+    # Exact titles are resolved together in one request; the rest fall back to search.
+    return fetch_wikipedia_articles(queries)
 
 
 @tool
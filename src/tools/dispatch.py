@@ -0,0 +1,127 @@
+"""
+Tool Dispatch Engine
+--------------------
+
+Runs the tool calls of one model turn concurrently. Async tools are awaited
+on the event loop, sync tools run on a bounded thread pool, every call gets
+its own timeout, and results come back in the order the model issued the
+calls. A multi-tool turn therefore takes as long as its slowest call rather
+than the sum of all of them.
+
+Usage::
+
+    dispatcher = ToolDispatcher({"fetch_wikipedia_content": fetch_wikipedia_content})
+    calls = [ToolCall.from_openai(tc) for tc in response.choices[0].message.tool_calls]
+    for result in dispatcher.dispatch(calls):
+        print(result.call.name, result.output if result.ok else result.error)
+"""
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Union
+
+from langchain_core.tools import BaseTool
+
+ToolLike = Union[BaseTool, Callable[..., Any]]
+
+
+@dataclass
+class ToolCall:
+    name: str
+    arguments: Dict[str, Any] = field(default_factory=dict)
+    id: Optional[str] = None
+
+    @classmethod
+    def from_openai(cls, tool_call: Any) -> "ToolCall":
+        """Build a call from an OpenAI-style tool call (object or dict)."""
+        if isinstance(tool_call, dict):
+            function = tool_call["function"]
+            name, arguments, call_id = function["name"], function.get("arguments"), tool_call.get("id")
+        else:
+            name, arguments, call_id = tool_call.function.name, tool_call.function.arguments, tool_call.id
+        if isinstance(arguments, str):
+            arguments = json.loads(arguments) if arguments.strip() else {}
+        return cls(name=name, arguments=arguments or {}, id=call_id)
+
+
+@dataclass
+class ToolResult:
+    call: ToolCall
+    output: Any = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class ToolDispatcher:
+    """Executes independent tool calls concurrently with per-tool timeouts."""
+
+    def __init__(
+        self,
+        tools: Union[Mapping[str, ToolLike], Sequence[BaseTool]],
+        max_workers: int = 8,
+        default_timeout: Optional[float] = 30.0,
+        timeouts: Optional[Dict[str, float]] = None,
+    ):
+        if isinstance(tools, Mapping):
+            self.tools: Dict[str, ToolLike] = dict(tools)
+        else:
+            self.tools = {tool.name: tool for tool in tools}
+        self.default_timeout = default_timeout
+        self.timeouts = timeouts or {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool-dispatch")
+
+    def dispatch(self, calls: Sequence[ToolCall]) -> List[ToolResult]:
+        """Blocking entry point; runs the calls on a private event loop.
+
+        ``asyncio.run`` cannot nest, so when the calling thread already runs a
+        loop (e.g. a sync tool invoked from async code), the private loop runs
+        on a helper thread instead. Async callers should await ``adispatch``.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.adispatch(calls))
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="tool-dispatch-loop") as runner:
+            return runner.submit(asyncio.run, self.adispatch(calls)).result()
+
+    async def adispatch(self, calls: Sequence[ToolCall]) -> List[ToolResult]:
+        """Run all calls concurrently; results are in the same order as ``calls``."""
+        return list(await asyncio.gather(*(self._run(call) for call in calls)))
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, call: ToolCall) -> ToolResult:
+        start = time.perf_counter()
+        tool = self.tools.get(call.name)
+        if tool is None:
+            return ToolResult(call, error=f"Unknown tool '{call.name}'")
+        timeout = self.timeouts.get(call.name, self.default_timeout)
+        try:
+            output = await asyncio.wait_for(self._invoke(tool, call.arguments), timeout)
+        except asyncio.TimeoutError:
+            # A sync tool keeps running in its worker thread; we only stop waiting.
+            return ToolResult(call, error=f"Tool '{call.name}' timed out after {timeout}s", elapsed=time.perf_counter() - start)
+        except Exception as e:
+            return ToolResult(call, error=str(e), elapsed=time.perf_counter() - start)
+        return ToolResult(call, output=output, elapsed=time.perf_counter() - start)
+
+    async def _invoke(self, tool: ToolLike, arguments: Dict[str, Any]) -> Any:
+        loop = asyncio.get_running_loop()
+        if isinstance(tool, BaseTool):
+            if getattr(tool, "coroutine", None) is not None:
+                return await tool.ainvoke(arguments)
+            return await loop.run_in_executor(self._executor, partial(tool.invoke, arguments))
+        if inspect.iscoroutinefunction(tool):
+            return await tool(**arguments)
+        return await loop.run_in_executor(self._executor, partial(tool, **arguments))
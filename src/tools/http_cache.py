@@ -0,0 +1,313 @@
+"""
+HTTP Response Cache
+-------------------
+
+Shared in-memory plus on-disk cache for web tool responses.
+
+* Freshness follows ``Cache-Control`` (``max-age``, ``s-maxage``, ``no-cache``,
+  ``no-store``) and ``Expires``, unless the tool has a TTL override.
+* Stale entries carrying an ``ETag`` or ``Last-Modified`` are revalidated with
+  a conditional request; a ``304`` refreshes the entry without a body download.
+* Entries are namespaced per tool, and hit rates are tracked per namespace.
+
+Responses that are not plain HTTP can be cached too (``cached_call``); those
+only use the TTL override of their namespace, e.g. ``google_search``.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, replace
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+from urllib.parse import urlencode
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "agentic_framework", "http_cache.sqlite")
+
+# Tools whose upstream does not send useful caching headers.
+DEFAULT_TTL_OVERRIDES: Dict[str, float] = {
+    "google_search": 600.0,
+    "fetch_wikipedia_content": 3600.0,
+}
+
+
+def parse_cache_control(value: str) -> Dict[str, Optional[str]]:
+    directives: Dict[str, Optional[str]] = {}
+    for part in value.split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') if argument else None
+    return directives
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class HTTPCacheEntry:
+    url: str
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+    stored_at: float
+    expires_at: float
+    from_cache: bool = False
+
+    @property
+    def status_code(self) -> int:
+        return self.status
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    @property
+    def etag(self) -> Optional[str]:
+        return self.headers.get("etag")
+
+    @property
+    def last_modified(self) -> Optional[str]:
+        return self.headers.get("last-modified")
+
+    @property
+    def text(self) -> str:
+        return self.body.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+@dataclass
+class NamespaceStats:
+    hits: int = 0
+    revalidated: int = 0
+    misses: int = 0
+    stores: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.revalidated + self.misses
+        return (self.hits + self.revalidated) / lookups if lookups else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": self.hit_rate,
+        }
+
+
+class HTTPResponseCache:
+    """LRU memory tier in front of an optional SQLite tier."""
+
+    def __init__(
+        self,
+        path: Optional[str] = DEFAULT_CACHE_PATH,
+        max_memory_entries: int = 512,
+        default_ttl: float = 0.0,
+        ttl_overrides: Optional[Mapping[str, float]] = None,
+    ):
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self.default_ttl = default_ttl
+        self.ttl_overrides: Dict[str, float] = dict(DEFAULT_TTL_OVERRIDES if ttl_overrides is None else ttl_overrides)
+        self.stats: Dict[str, NamespaceStats] = defaultdict(NamespaceStats)
+        self._memory: "OrderedDict[str, HTTPCacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS http_cache ("
+                " key TEXT PRIMARY KEY, url TEXT NOT NULL, status INTEGER NOT NULL, headers TEXT NOT NULL,"
+                " body BLOB NOT NULL, stored_at REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    # --- Keys and policy ---
+
+    @staticmethod
+    def key(namespace: str, url: str, params: Optional[Mapping[str, Any]] = None, variant: str = "") -> str:
+        if params:
+            url = f"{url}?{urlencode(sorted((k, str(v)) for k, v in params.items()))}"
+        return hashlib.sha256(f"{namespace}\n{url}\n{variant}".encode("utf-8")).hexdigest()
+
+    def set_ttl(self, namespace: str, ttl: Optional[float]) -> None:
+        """Override freshness for a tool; ``None`` goes back to honouring headers."""
+        if ttl is None:
+            self.ttl_overrides.pop(namespace, None)
+        else:
+            self.ttl_overrides[namespace] = ttl
+
+    def freshness_lifetime(self, namespace: str, headers: Mapping[str, str]) -> float:
+        if namespace in self.ttl_overrides:
+            return self.ttl_overrides[namespace]
+        directives = parse_cache_control(headers.get("cache-control", ""))
+        if "no-cache" in directives:
+            return 0.0
+        for name in ("s-maxage", "max-age"):
+            if directives.get(name):
+                try:
+                    return max(float(directives[name]) - float(headers.get("age", 0)), 0.0)  # type: ignore
+                except ValueError:
+                    pass
+        expires = _http_date(headers.get("expires"))
+        if expires is not None:
+            date = _http_date(headers.get("date")) or time.time()
+            return max(expires - date, 0.0)
+        return self.default_ttl
+
+    @staticmethod
+    def storable(status: int, headers: Mapping[str, str]) -> bool:
+        return status == 200 and "no-store" not in parse_cache_control(headers.get("cache-control", ""))
+
+    # --- Storage ---
+
+    def lookup(self, key: str) -> Optional[HTTPCacheEntry]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+            if self._conn is None:
+                return None
+            row = self._conn.execute(
+                "SELECT url, status, headers, body, stored_at, expires_at FROM http_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            entry = HTTPCacheEntry(row[0], row[1], json.loads(row[2]), bytes(row[3]), row[4], row[5])
+            self._remember(key, entry)
+            return entry
+
+    def store(self, namespace: str, key: str, url: str, status: int, headers: Mapping[str, str], body: bytes) -> Optional[HTTPCacheEntry]:
+        headers = {name.lower(): value for name, value in headers.items()}
+        if not self.storable(status, headers):
+            return None
+        now = time.time()
+        entry = HTTPCacheEntry(url, status, headers, body, now, now + self.freshness_lifetime(namespace, headers))
+        if entry.expires_at <= now and not (entry.etag or entry.last_modified):
+            # Never fresh and cannot be revalidated: nothing to gain.
+            return None
+        self._write(key, entry)
+        self.stats[namespace].stores += 1
+        return entry
+
+    def refresh(self, namespace: str, key: str, entry: HTTPCacheEntry, headers: Mapping[str, str]) -> HTTPCacheEntry:
+        """Apply a 304 response: merge its headers and restart the freshness clock."""
+        merged = {**entry.headers, **{name.lower(): value for name, value in headers.items()}}
+        now = time.time()
+        refreshed = HTTPCacheEntry(entry.url, entry.status, merged, entry.body, now, now + self.freshness_lifetime(namespace, merged))
+        self._write(key, refreshed)
+        return refreshed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM http_cache")
+                self._conn.commit()
+
+    def stats_dict(self) -> Dict[str, Dict[str, Any]]:
+        return {namespace: stats.as_dict() for namespace, stats in self.stats.items()}
+
+    def _remember(self, key: str, entry: HTTPCacheEntry) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _write(self, key: str, entry: HTTPCacheEntry) -> None:
+        with self._lock:
+            self._remember(key, entry)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO http_cache (key, url, status, headers, body, stored_at, expires_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, entry.url, entry.status, json.dumps(entry.headers), entry.body, entry.stored_at, entry.expires_at),
+                )
+                self._conn.commit()
+
+    # --- Helpers ---
+
+    def cached_get(
+        self,
+        client: Any,
+        url: str,
+        params: Optional[Mapping[str, Any]] = None,
+        namespace: str = "default",
+        **kwargs: Any
+    ) -> HTTPCacheEntry:
+        """GET through ``client`` (an HTTPClient), serving and revalidating from the cache."""
+        key = self.key(namespace, url, params)
+        stats = self.stats[namespace]
+        entry = self.lookup(key)
+        if entry is not None and entry.fresh:
+            stats.hits += 1
+            return replace(entry, from_cache=True)
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry is not None:
+            headers.update(entry.conditional_headers())
+        response = client.get(url, params=params, headers=headers, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            stats.revalidated += 1
+            return replace(self.refresh(namespace, key, entry, response.headers), from_cache=True)
+        stats.misses += 1
+        stored = self.store(namespace, key, response.url, response.status_code, response.headers, response.content)
+        if stored is not None:
+            return stored
+        return HTTPCacheEntry(response.url, response.status_code, {k.lower(): v for k, v in response.headers.items()},
+                              response.content, time.time(), 0.0)
+
+    def cached_call(self, namespace: str, key_parts: Tuple[Any, ...], func: Callable[[], Any]) -> Any:
+        """Cache a JSON-serializable result of a non-HTTP call (e.g. an SDK search) by TTL override."""
+        ttl = self.ttl_overrides.get(namespace, self.default_ttl)
+        key = self.key(namespace, json.dumps(key_parts, default=str))
+        stats = self.stats[namespace]
+        entry = self.lookup(key)
+        if entry is not None and entry.fresh:
+            stats.hits += 1
+            return entry.json()
+        stats.misses += 1
+        result = func()
+        if ttl > 0:
+            now = time.time()
+            self._write(key, HTTPCacheEntry(namespace, 200, {}, json.dumps(result).encode("utf-8"), now, now + ttl))
+            stats.stores += 1
+        return result
+
+
+_http_cache: Optional[HTTPResponseCache] = None
+_http_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> HTTPResponseCache:
+    """Process-wide cache; the on-disk tier lives at $AGENTIC_HTTP_CACHE or ~/.cache."""
+    global _http_cache
+    with _http_cache_lock:
+        if _http_cache is None:
+            _http_cache = HTTPResponseCache(os.environ.get("AGENTIC_HTTP_CACHE", DEFAULT_CACHE_PATH))
+        return _http_cache
@@ -0,0 +1,185 @@
+"""
+Shared HTTP Client
+------------------
+
+One HTTP layer for all web tools. Connections are pooled per host and kept
+alive, every request has a timeout, and idempotent requests are retried with
+exponential backoff. Fan-out tool calls reuse warm connections instead of
+doing a TCP/TLS handshake each time.
+
+``get_http_client()`` returns the blocking client (requests), and
+``get_async_http_client()`` returns the async variant (httpx). Both are
+process-wide.
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import weakref
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from tools.http_cache import HTTPCacheEntry, HTTPResponseCache, get_http_cache
+
+DEFAULT_TIMEOUT: Tuple[float, float] = (5.0, 30.0)  # (connect, read)
+DEFAULT_HEADERS = {"User-Agent": "agentic_framework/0.1.0 (+https://github.com/SheshankJoshi/agentic_framework_ext)"}
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class HTTPClient:
+    """Blocking client: a requests.Session with pooled adapters, timeouts and retries."""
+
+    def __init__(
+        self,
+        timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        pool_connections: int = 16,
+        pool_maxsize: int = 32,
+        status_forcelist: Iterable[int] = RETRY_STATUSES,
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        self.timeout = timeout
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=tuple(status_forcelist),
+            allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        # pool_connections: how many hosts keep a pool; pool_maxsize: connections per host.
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, **kwargs: Any) -> requests.Response:
+        return self.request("GET", url, params=params, **kwargs)
+
+    def get_json(self, url: str, params: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Any:
+        response = self.get(url, params=params, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    def get_cached(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        namespace: str = "default",
+        cache: Optional[HTTPResponseCache] = None,
+        **kwargs: Any
+    ) -> HTTPCacheEntry:
+        """GET served from the shared HTTP cache when fresh, revalidated when stale."""
+        return (cache or get_http_cache()).cached_get(self, url, params=params, namespace=namespace, **kwargs)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class AsyncHTTPClient:
+    """Async client: httpx.AsyncClient with connection limits, timeouts and retries."""
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_TIMEOUT[1],
+        connect_timeout: float = DEFAULT_TIMEOUT[0],
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 32,
+        status_forcelist: Iterable[int] = RETRY_STATUSES,
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections)
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.status_forcelist = frozenset(status_forcelist)
+        self.headers = headers or DEFAULT_HEADERS
+        # httpx.AsyncClient is bound to the loop it was first used on.
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits, headers=self.headers, follow_redirects=True)
+            self._clients[loop] = client
+        return client
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        retry_allowed = method.upper() in ("GET", "HEAD", "OPTIONS")
+        attempt = 0
+        while True:
+            try:
+                response = await self._client().request(method, url, **kwargs)
+                if not retry_allowed or response.status_code not in self.status_forcelist or attempt >= self.retries:
+                    return response
+                delay = self._retry_after(response) or self._backoff(attempt)
+            except (httpx.ConnectError, httpx.ReadTimeout, httpx.ConnectTimeout, httpx.RemoteProtocolError):
+                if not retry_allowed or attempt >= self.retries:
+                    raise
+                delay = self._backoff(attempt)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def get(self, url: str, params: Optional[Dict[str, Any]] = None, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, params=params, **kwargs)
+
+    async def get_json(self, url: str, params: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Any:
+        response = await self.get(url, params=params, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    async def aclose(self) -> None:
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def _backoff(self, attempt: int) -> float:
+        # Same schedule as urllib3's Retry, with a little jitter.
+        return self.backoff_factor * (2 ** attempt) * (1 + random.random() * 0.1)
+
+    @staticmethod
+    def _retry_after(response: httpx.Response) -> Optional[float]:
+        value = response.headers.get("Retry-After")
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
+
+
+_http_client: Optional[HTTPClient] = None
+_async_http_client: Optional[AsyncHTTPClient] = None
+_lock = threading.Lock()
+
+
+def get_http_client() -> HTTPClient:
+    """Return the process-wide blocking HTTP client."""
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            _http_client = HTTPClient()
+        return _http_client
+
+
+def get_async_http_client() -> AsyncHTTPClient:
+    """Return the process-wide async HTTP client."""
+    global _async_http_client
+    with _lock:
+        if _async_http_client is None:
+            _async_http_client = AsyncHTTPClient()
+        return _async_http_client
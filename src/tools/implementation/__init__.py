@@ -1 +1,2 @@
 from .web_tools import *
+from .wiki_tools import WikipediaFetcher, fetch_wikipedia_articles, get_wikipedia_fetcher
@@ -0,0 +1,171 @@
+"""
+Streaming Text Extraction
+-------------------------
+
+Fetch a URL and extract readable text without downloading the whole page.
+The body is read in chunks, decoded incrementally, fed through a streaming
+HTML parser, and the download stops as soon as enough words have been
+extracted (or a byte budget is hit). A multi-megabyte page therefore costs
+only as many bytes as it takes to produce the requested words.
+"""
+from __future__ import annotations
+
+import codecs
+import json
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional
+
+# Elements whose content is never visible text.
+SKIPPED_TAGS = {"script", "style", "noscript", "template", "svg", "iframe", "object"}
+# Elements that separate words; inline elements (<b>, <a>, ...) do not.
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt", "figcaption",
+    "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "nav",
+    "ol", "p", "pre", "section", "table", "td", "th", "title", "tr", "ul",
+}
+
+DEFAULT_MAX_WORDS = 1500
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024
+DEFAULT_CHUNK_SIZE = 16 * 1024
+
+
+class WordCollector:
+    """Collects whitespace-separated words from text that arrives in pieces."""
+
+    def __init__(self, max_words: int):
+        self.max_words = max_words
+        self.words: List[str] = []
+        self._partial = ""
+
+    @property
+    def done(self) -> bool:
+        return len(self.words) >= self.max_words
+
+    def add(self, text: str) -> None:
+        if self.done or not text:
+            return
+        text = self._partial + text
+        pieces = text.split()
+        # A piece touching the end of the text may continue in the next chunk.
+        self._partial = pieces.pop() if pieces and not text[-1].isspace() else ""
+        self.words.extend(pieces[: self.max_words - len(self.words)])
+
+    def boundary(self) -> None:
+        """Mark a word boundary, e.g. between two HTML elements."""
+        if self._partial:
+            partial, self._partial = self._partial, ""
+            self.add(partial + " ")
+
+    def text(self) -> str:
+        self.boundary()
+        return " ".join(self.words[: self.max_words])
+
+
+class StreamingTextExtractor(HTMLParser):
+    """Incremental HTML-to-text parser that drops markup and invisible elements."""
+
+    def __init__(self, max_words: int = DEFAULT_MAX_WORDS):
+        super().__init__(convert_charrefs=True)
+        self.collector = WordCollector(max_words)
+        self._skip_depth = 0
+
+    @property
+    def done(self) -> bool:
+        return self.collector.done
+
+    def handle_starttag(self, tag: str, attrs: Any) -> None:
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+        if tag in BLOCK_TAGS or tag in SKIPPED_TAGS:
+            self.collector.boundary()
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        if tag in BLOCK_TAGS or tag in SKIPPED_TAGS:
+            self.collector.boundary()
+
+    def handle_data(self, data: str) -> None:
+        if not self._skip_depth:
+            self.collector.add(data)
+
+    def text(self) -> str:
+        return self.collector.text()
+
+
+def fetch_text(
+    url: str,
+    max_words: int = DEFAULT_MAX_WORDS,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    client: Optional[Any] = None,
+    cache_namespace: Optional[str] = None,
+    cache: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """
+    Stream ``url`` and return up to ``max_words`` words of extracted text.
+
+    Reading stops once ``max_words`` words have been produced or ``max_bytes``
+    bytes have been read, whichever comes first. With ``cache_namespace`` the
+    extracted result is cached under the page's HTTP caching headers and
+    revalidated with a conditional request once stale.
+    """
+    if client is None:
+        from tools.http_client import get_http_client
+        client = get_http_client()
+    entry = cache_key = None
+    if cache_namespace is not None:
+        if cache is None:
+            from tools.http_cache import get_http_cache
+            cache = get_http_cache()
+        cache_key = cache.key(cache_namespace, url, variant=f"words={max_words}")
+        entry = cache.lookup(cache_key)
+        if entry is not None and entry.fresh:
+            cache.stats[cache_namespace].hits += 1
+            return entry.json()
+    headers = entry.conditional_headers() if entry is not None else {}
+    response = client.get(url, stream=True, headers=headers)
+    try:
+        if response.status_code == 304 and entry is not None:
+            cache.stats[cache_namespace].revalidated += 1
+            cache.refresh(cache_namespace, cache_key, entry, response.headers)
+            return entry.json()
+        if response.status_code != 200:
+            return {"content": "", "status": "failed", "status_code": response.status_code}
+        content_type = response.headers.get("Content-Type", "").lower()
+        is_html = "html" in content_type or "xml" in content_type or not content_type
+        extractor: Any = StreamingTextExtractor(max_words) if is_html else WordCollector(max_words)
+        # requests falls back to ISO-8859-1 for text/* without a charset; most
+        # pages without one are UTF-8.
+        encoding = response.encoding if "charset=" in content_type else "utf-8"
+        decoder = codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+        bytes_read = 0
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            bytes_read += len(chunk)
+            if is_html:
+                extractor.feed(decoder.decode(chunk))
+            else:
+                extractor.add(decoder.decode(chunk))
+            if extractor.done or bytes_read >= max_bytes:
+                break
+        else:
+            tail = decoder.decode(b"", final=True)
+            if is_html:
+                extractor.feed(tail)
+                extractor.close()
+            else:
+                extractor.add(tail)
+        result = {
+            "content": extractor.text(),
+            "status": "success",
+            "truncated": extractor.done or bytes_read >= max_bytes,
+            "bytes_read": bytes_read,
+        }
+        if cache_key is not None:
+            cache.stats[cache_namespace].misses += 1
+            cache.store(cache_namespace, cache_key, url, response.status_code, response.headers, json.dumps(result).encode("utf-8"))
+        return result
+    finally:
+        # Closing a partially read body drops the connection instead of
+        # draining the rest of a large page.
+        response.close()
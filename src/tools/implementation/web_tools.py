@@ -1,22 +1,32 @@
-from langchain_core.tools import Tool
-from langchain_google_community import GoogleSearchAPIWrapper
-from functools import partial
+from functools import lru_cache, partial
 import os
-from pptx import Presentation
 
 # # -- should be removed later
 # from dotenv import load_dotenv
 # load_dotenv()
 # # -- should be removed later
 
+@lru_cache(maxsize=1)
+def _google_search_client():
+    # Built on the first search: the client reads the API keys and imports googleapiclient.
+    from langchain_google_community import GoogleSearchAPIWrapper
+    return GoogleSearchAPIWrapper()
+
+
 def google_search_web(num_results=5):
-    search = GoogleSearchAPIWrapper()
-    func = partial(search.results, num_results=num_results)
-    return func
+    def search(query: str):
+        return _google_search_client().results(query, num_results=num_results)
+
+    def cached_search(query: str):
+        # Results are cached for the "google_search" TTL of the shared HTTP cache.
+        from tools.http_cache import get_http_cache
+        return get_http_cache().cached_call("google_search", (query, num_results), partial(search, query))
+    return cached_search
 
 # Function: Generate a PowerPoint presentation with a references slide
 def generate_presentation(title: str, content: str, references: list):
     """"Generates a PowerPoint presentation with provided title, content and references."""
+    from pptx import Presentation
     prs = Presentation()
 
     # Create title slide
@@ -0,0 +1,228 @@
+"""
+Batched Wikipedia Lookup
+------------------------
+
+Resolves many queries against Wikipedia with as few round-trips as possible.
+
+* Queries are first tried as titles, up to 20 per ``prop=extracts`` request.
+  20 is the extracts limit when ``exintro`` is set. Redirects and title
+  normalization are followed and mapped back to the query that asked.
+* A query that is not an article title, is missing, or lands on a
+  disambiguation page is resolved with ``generator=search``. That fetches the
+  search hit and its extract in the same request. These requests run
+  concurrently.
+* Resolved ``title -> extract`` mappings (and ``query -> title``) are cached,
+  so a repeated topic costs no request at all. API responses also go through
+  the shared HTTP cache under the ``fetch_wikipedia_content`` namespace, so
+  other processes and fetchers reuse them for its TTL override.
+
+Five topics the model already spelled as titles cost one request instead of
+the ten made by a search-then-extract lookup per topic.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+WIKIPEDIA_API = "https://en.wikipedia.org/w/api.php"
+# Namespace in the shared HTTP cache; its TTL is set in DEFAULT_TTL_OVERRIDES.
+CACHE_NAMESPACE = "fetch_wikipedia_content"
+# exlimit maximum when exintro is set.
+EXTRACTS_BATCH_SIZE = 20
+
+_EXTRACT_PARAMS = {
+    "action": "query",
+    "format": "json",
+    "formatversion": 2,
+    "prop": "extracts|pageprops",
+    "ppprop": "disambiguation",
+    "exintro": 1,
+    "explaintext": 1,
+    "exlimit": "max",
+    "redirects": 1,
+}
+
+
+def _not_found(query: str) -> Dict[str, Any]:
+    return {"status": "error", "message": f"No Wikipedia article found for '{query}'"}
+
+
+class WikipediaFetcher:
+    """Batched, cached Wikipedia intro lookup for a list of queries."""
+
+    def __init__(
+        self,
+        api_url: str = WIKIPEDIA_API,
+        client: Optional[Any] = None,
+        max_entries: int = 1024,
+        ttl: Optional[float] = 3600.0,
+        max_workers: int = 8,
+    ):
+        self.api_url = api_url
+        self._client = client
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_workers = max_workers
+        self.requests_made = 0
+        # title -> (stored_at, article); query -> title
+        self._articles: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._titles: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            from tools.http_client import get_http_client
+            self._client = get_http_client()
+        return self._client
+
+    def fetch(self, queries: Sequence[str]) -> List[Dict[str, Any]]:
+        """Return one result per query, in order, shaped like ``fetch_wikipedia_content``."""
+        results: Dict[str, Dict[str, Any]] = {}
+        pending = []
+        for query in dict.fromkeys(query.strip() for query in queries):
+            cached = self._cached(query)
+            if cached is not None:
+                results[query] = cached
+            elif query:
+                pending.append(query)
+
+        unresolved = self._fetch_titles(pending, results)
+        if unresolved:
+            workers = min(self.max_workers, len(unresolved))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="wikipedia") as pool:
+                for query, result in zip(unresolved, pool.map(self._search, unresolved)):
+                    results[query] = result
+        return [results.get(query.strip()) or _not_found(query) for query in queries]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._articles.clear()
+            self._titles.clear()
+
+    # --- Requests ---
+
+    def _query(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Run an API query, following the extracts ``continue`` until every page has its extract.
+
+        Only the prop module's ``excontinue`` is followed. A ``generator=search``
+        query also gets ``gsroffset``, which pages through further search hits;
+        following it would walk the whole result set for a one-hit search.
+        """
+        data: Dict[str, Any] = {}
+        pages: Dict[str, Dict[str, Any]] = {}
+        continuation: Dict[str, Any] = {}
+        while True:
+            data = self._get({**params, **continuation})
+            query = data.get("query", {})
+            for page in query.get("pages", []):
+                merged = pages.setdefault(page["title"], page)
+                if "extract" in page:
+                    merged["extract"] = page["extract"]
+            continuation = {key: value for key, value in data.get("continue", {}).items() if not key.startswith("gsr")}
+            if data.get("batchcomplete") or "excontinue" not in continuation:
+                break
+        data.setdefault("query", {})["pages"] = list(pages.values())
+        return data
+
+    def _get(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        entry = self.client.get_cached(self.api_url, params=params, namespace=CACHE_NAMESPACE)
+        if not entry.from_cache:
+            with self._lock:
+                self.requests_made += 1
+        if entry.status >= 400:
+            raise RuntimeError(f"Wikipedia API returned HTTP {entry.status}")
+        return entry.json()
+
+    def _fetch_titles(self, queries: List[str], results: Dict[str, Dict[str, Any]]) -> List[str]:
+        """Resolve queries as titles in batches; return the queries that need a search."""
+        unresolved = [query for query in queries if "|" in query]
+        candidates = [query for query in queries if "|" not in query]
+        for start in range(0, len(candidates), EXTRACTS_BATCH_SIZE):
+            batch = candidates[start:start + EXTRACTS_BATCH_SIZE]
+            try:
+                data = self._query({**_EXTRACT_PARAMS, "titles": "|".join(batch)})
+            except Exception as e:
+                for query in batch:
+                    results[query] = {"status": "error", "message": str(e)}
+                continue
+            query_data = data["query"]
+            aliases = {item["from"]: item["to"] for item in query_data.get("normalized", [])}
+            redirects = {item["from"]: item["to"] for item in query_data.get("redirects", [])}
+            pages = {page["title"]: page for page in query_data["pages"]}
+            for query in batch:
+                title = aliases.get(query, query)
+                title = redirects.get(title, title)
+                article = self._article(pages.get(title))
+                if article is None:
+                    unresolved.append(query)
+                else:
+                    results[query] = self._remember(query, article)
+        return unresolved
+
+    def _search(self, query: str) -> Dict[str, Any]:
+        params = {**_EXTRACT_PARAMS, "generator": "search", "gsrsearch": query, "gsrlimit": 1}
+        try:
+            data = self._query(params)
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+        pages = sorted(data["query"]["pages"], key=lambda page: page.get("index", 0))
+        article = self._article(pages[0] if pages else None, allow_disambiguation=True)
+        if article is None:
+            return _not_found(query)
+        return self._remember(query, article)
+
+    @staticmethod
+    def _article(page: Optional[Dict[str, Any]], allow_disambiguation: bool = False) -> Optional[Dict[str, Any]]:
+        if page is None or page.get("missing") or page.get("invalid") or "extract" not in page:
+            return None
+        if not allow_disambiguation and "disambiguation" in page.get("pageprops", {}):
+            return None
+        return {"status": "success", "content": page["extract"].strip(), "title": page["title"]}
+
+    # --- Cache ---
+
+    def _cached(self, query: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            title = self._titles.get(query, query)
+            entry = self._articles.get(title)
+            if entry is None:
+                return None
+            stored_at, article = entry
+            if self.ttl is not None and time.time() - stored_at > self.ttl:
+                del self._articles[title]
+                return None
+            self._articles.move_to_end(title)
+            return article
+
+    def _remember(self, query: str, article: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self._titles[query] = article["title"]
+            self._articles[article["title"]] = (time.time(), article)
+            self._articles.move_to_end(article["title"])
+            while len(self._articles) > self.max_entries:
+                evicted, _ = self._articles.popitem(last=False)
+                for alias in [alias for alias, title in self._titles.items() if title == evicted]:
+                    del self._titles[alias]
+        return article
+
+
+_fetcher: Optional[WikipediaFetcher] = None
+_fetcher_lock = threading.Lock()
+
+
+def get_wikipedia_fetcher() -> WikipediaFetcher:
+    """Return the process-wide fetcher, so the title cache is shared by all callers."""
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = WikipediaFetcher()
+        return _fetcher
+
+
+def fetch_wikipedia_articles(queries: Iterable[str]) -> List[Dict[str, Any]]:
+    """Fetch the introduction of the best-matching Wikipedia article for each query."""
+    return get_wikipedia_fetcher().fetch(list(queries))
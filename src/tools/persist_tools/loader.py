@@ -0,0 +1,321 @@
+"""
+Dynamic Tool Loader
+-------------------
+
+Loads the tools stored in ``registered_tools.json`` (or a ``ToolStore``) as
+LangChain ``Tool`` objects.
+
+Each entry keeps its function as a source string (``code``), the modules it
+needs (``metadata.imports``) and its settings (``config``). Loading a
+registry does not compile or run anything: every entry becomes a ``Tool``
+whose function is built on the first call. To build it, the source is
+compiled once to a code object. The bytecode is cached on disk, keyed by a
+hash of the source, so a restart only unmarshals it, and an edited entry
+only recompiles itself. The declared imports are bound as lazy modules,
+which are imported when the tool first uses them. Config values become
+environment variables unless the environment already sets them.
+
+Usage::
+
+    loader = DynamicToolLoader("registered_tools.json")
+    tools = loader.tools()          # no source is compiled yet
+    tools[0].invoke("query")        # compiles (or unmarshals) and runs it
+    loader.refresh()                # picks up edited entries only
+"""
+from __future__ import annotations
+
+import builtins
+import hashlib
+import importlib
+import importlib.util
+import json
+import marshal
+import os
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from functools import cached_property
+from types import CodeType
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from langchain_core.tools import Tool
+
+DEFAULT_REGISTRY_PATH = "registered_tools.json"
+DEFAULT_BYTECODE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "agentic_framework", "tool_bytecode")
+
+
+@dataclass(frozen=True)
+class RegisteredTool:
+    name: str
+    func_name: str
+    description: str
+    code: str
+    imports: Sequence[Mapping[str, Any]] = ()
+    config: Mapping[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_entry(cls, name: str, entry: Mapping[str, Any]) -> "RegisteredTool":
+        metadata = entry.get("metadata") or {}
+        return cls(
+            name=name,
+            func_name=entry.get("func_name") or name,
+            description=entry.get("description") or "",
+            code=entry["code"],
+            imports=tuple(metadata.get("imports") or ()),
+            config=dict(entry.get("config") or {}),
+        )
+
+    @cached_property
+    def digest(self) -> str:
+        """Bytecode cache key; the interpreter's magic number keeps versions apart."""
+        hasher = hashlib.sha256(importlib.util.MAGIC_NUMBER)
+        hasher.update(self.func_name.encode("utf-8") + b"\0" + self.code.encode("utf-8"))
+        return hasher.hexdigest()
+
+
+class LazyModule:
+    """Stands in for an imported module and imports it on first attribute access."""
+
+    def __init__(self, module: str, bound: Optional[str] = None):
+        self._module = module
+        # ``import a.b`` binds ``a``; ``import a.b as c`` binds ``a.b``.
+        self._bound = bound or module.split(".")[0]
+        self._loaded: Any = None
+
+    def _load(self) -> Any:
+        if self._loaded is None:
+            importlib.import_module(self._module)
+            self._loaded = importlib.import_module(self._bound)
+        return self._loaded
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self._load(), attribute)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._loaded is not None else "not loaded"
+        return f"<lazy module {self._bound!r} ({state})>"
+
+
+class BytecodeCache:
+    """Marshalled code objects on disk, one file per source hash."""
+
+    def __init__(self, directory: str = DEFAULT_BYTECODE_DIR):
+        self.directory = directory
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, f"{digest}.bin")
+
+    def get(self, digest: str) -> Optional[CodeType]:
+        try:
+            with open(self._path(digest), "rb") as handle:
+                code = marshal.load(handle)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        return code if isinstance(code, CodeType) else None
+
+    def put(self, digest: str, code: CodeType) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        # Written to a temporary file and renamed, so readers never see half a file.
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                marshal.dump(code, handle)
+            os.replace(tmp_path, self._path(digest))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def prune(self, keep: Sequence[str]) -> int:
+        """Delete cached bytecode for sources no longer registered; returns the count."""
+        keep_files = {f"{digest}.bin" for digest in keep}
+        removed = 0
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return 0
+        for name in names:
+            if name.endswith(".bin") and name not in keep_files:
+                os.unlink(os.path.join(self.directory, name))
+                removed += 1
+        return removed
+
+
+class DynamicToolLoader:
+    """Turns registered tool entries into lazily built LangChain tools."""
+
+    def __init__(self, path: str = DEFAULT_REGISTRY_PATH, cache_dir: Optional[str] = DEFAULT_BYTECODE_DIR):
+        self.path = path
+        # Anything but a JSON file is a ToolStore, read through its change log.
+        self.store = None
+        if not path.endswith(".json"):
+            from tools.persist_tools.store import ToolStore
+            self.store = ToolStore(path)
+        self._seq: Optional[int] = None
+        self.bytecode = BytecodeCache(cache_dir) if cache_dir else None
+        self.stats = {"compiled": 0, "cache_hits": 0, "built": 0}
+        self._entries: Dict[str, RegisteredTool] = {}
+        self._mtime: Optional[int] = None
+        self._codes: Dict[str, CodeType] = {}
+        self._functions: Dict[str, Callable[..., Any]] = {}
+        self._tools: Dict[str, Tool] = {}
+        self._lock = threading.RLock()
+
+    # --- Registry ---
+
+    def read_entries(self) -> Dict[str, RegisteredTool]:
+        with open(self.path, "r", encoding="utf-8") as handle:
+            raw = json.load(handle)
+        return {name: RegisteredTool.from_entry(name, entry) for name, entry in raw.items()}
+
+    def entries(self) -> Dict[str, RegisteredTool]:
+        with self._lock:
+            if self._mtime is None and self._seq is None:
+                self.refresh()
+            return self._entries
+
+    def refresh(self) -> List[str]:
+        """Re-read the registry if it changed; returns the names of added, edited or removed entries."""
+        with self._lock:
+            if self.store is not None:
+                return self._refresh_from_store()
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime == self._mtime:
+                return []
+            entries = self.read_entries()
+            changed = [
+                name for name in set(entries) | set(self._entries)
+                if name not in entries or name not in self._entries or entries[name] != self._entries[name]
+            ]
+            self._mtime = mtime
+            return self._apply(entries, changed)
+
+    def _refresh_from_store(self) -> List[str]:
+        changes = self.store.changes_since(self._seq) if self._seq is not None else None
+        if changes is None:
+            # First load, or the change log no longer reaches back to our position.
+            self._seq = self.store.last_seq()
+            entries = self.store.tools()
+            changed = [
+                name for name in set(entries) | set(self._entries)
+                if name not in entries or name not in self._entries or entries[name] != self._entries[name]
+            ]
+            return self._apply(entries, changed)
+        if not changes:
+            return []
+        entries = dict(self._entries)
+        names = {change.name for change in changes}
+        for name in names:
+            entry = self.store.get(name)
+            if entry is None:
+                entries.pop(name, None)
+            else:
+                entries[name] = RegisteredTool.from_entry(name, entry)
+        self._seq = changes[-1].seq
+        return self._apply(entries, names)
+
+    def _apply(self, entries: Dict[str, RegisteredTool], changed: Iterable[str]) -> List[str]:
+        for name in changed:
+            self._functions.pop(name, None)
+            self._tools.pop(name, None)
+        digests = {entry.digest for entry in entries.values()}
+        self._codes = {digest: code for digest, code in self._codes.items() if digest in digests}
+        # Replaced, never mutated, so callers can keep the mapping they were given.
+        self._entries = entries
+        return sorted(changed)
+
+    def _entry(self, name: str) -> RegisteredTool:
+        entry = self.entries().get(name)
+        if entry is None:
+            raise KeyError(f"Unknown registered tool: {name}")
+        return entry
+
+    # --- Building ---
+
+    def code(self, name: str) -> CodeType:
+        """The entry's code object: from memory, else from the bytecode cache, else compiled."""
+        entry = self._entry(name)
+        digest = entry.digest
+        with self._lock:
+            code = self._codes.get(digest)
+            if code is None and self.bytecode is not None:
+                code = self.bytecode.get(digest)
+                if code is not None:
+                    self.stats["cache_hits"] += 1
+            if code is None:
+                code = compile(entry.code, f"<registered tool {name}>", "exec")
+                self.stats["compiled"] += 1
+                if self.bytecode is not None:
+                    self.bytecode.put(digest, code)
+            self._codes[digest] = code
+            return code
+
+    def function(self, name: str) -> Callable[..., Any]:
+        """Run the entry's code in its own namespace and return the function it defines."""
+        with self._lock:
+            function = self._functions.get(name)
+            if function is not None:
+                return function
+            entry = self._entry(name)
+            namespace: Dict[str, Any] = {"__name__": f"registered_tools.{name}", "__builtins__": builtins}
+            for spec in entry.imports:
+                module = LazyModule(spec["module"], spec["module"] if spec.get("as") else None)
+                namespace[spec.get("as") or spec["module"].split(".")[0]] = module
+            for key, value in entry.config.items():
+                os.environ.setdefault(key, str(value))
+            exec(self.code(name), namespace)
+            function = namespace.get(entry.func_name)
+            if not callable(function):
+                raise ValueError(f"Registered tool {name!r} does not define a function {entry.func_name!r}")
+            self._functions[name] = function
+            self.stats["built"] += 1
+            return function
+
+    def _call(self, name: str, *args: Any, **kwargs: Any) -> Any:
+        function = self._functions.get(name) or self.function(name)
+        return function(*args, **kwargs)
+
+    # --- Tools ---
+
+    def tool(self, name: str) -> Tool:
+        with self._lock:
+            tool = self._tools.get(name)
+            if tool is None:
+                entry = self._entry(name)
+
+                def run(*args: Any, **kwargs: Any) -> Any:
+                    return self._call(name, *args, **kwargs)
+
+                tool = Tool(name=entry.name, description=entry.description, func=run)
+                self._tools[name] = tool
+            return tool
+
+    def tools(self, names: Optional[Sequence[str]] = None) -> List[Tool]:
+        return [self.tool(name) for name in (names if names is not None else self.entries())]
+
+    def prune_cache(self) -> int:
+        if self.bytecode is None:
+            return 0
+        return self.bytecode.prune([entry.digest for entry in self.entries().values()])
+
+
+_loader: Optional[DynamicToolLoader] = None
+_loader_lock = threading.Lock()
+
+
+def get_dynamic_tool_loader() -> DynamicToolLoader:
+    """Process-wide loader for $AGENTIC_TOOL_REGISTRY: a JSON file (default ./registered_tools.json) or a ToolStore."""
+    global _loader
+    with _loader_lock:
+        if _loader is None:
+            _loader = DynamicToolLoader(
+                os.environ.get("AGENTIC_TOOL_REGISTRY", DEFAULT_REGISTRY_PATH),
+                os.environ.get("AGENTIC_TOOL_BYTECODE", DEFAULT_BYTECODE_DIR),
+            )
+        return _loader
+
+
+def load_registered_tools(names: Optional[Sequence[str]] = None) -> List[Tool]:
+    """The registered tools as LangChain tools, after picking up registry edits."""
+    loader = get_dynamic_tool_loader()
+    loader.refresh()
+    return loader.tools(names)
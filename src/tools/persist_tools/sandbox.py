@@ -0,0 +1,374 @@
+"""
+Sandboxed Tool Pool
+-------------------
+
+Runs dynamically registered tools in a warm pool of worker processes.
+
+Registered tools are arbitrary Python. Running them in the serving process
+blocks the event loop and shares the GIL with request handling. Each worker
+here is a long-lived process started before the first call:
+
+* It applies a memory limit (``RLIMIT_AS``), imports the ``preload`` modules
+  and every module the registry declares, and builds all registered tools
+  from the shared bytecode cache. It then reports ready.
+* Calls go over a pipe as msgpack messages, one call at a time per worker.
+  Arguments and results should be JSON-like; other values are sent as
+  ``str``.
+* A call that exceeds its timeout, or a worker that dies, kills that worker.
+  A fresh one is started in its place, so a runaway tool never blocks the
+  pool. A replacement that fails to start is retried with backoff.
+* Waiting for a free worker is bounded by ``acquire_timeout``, and ``close``
+  wakes every waiter.
+
+``arun`` waits for a worker on the pool's own threads, one per worker, so a
+CPU-heavy tool only occupies its own worker and never the event loop of the
+other agents.
+
+Usage::
+
+    with SandboxPool(size=4, timeout=10.0) as pool:
+        pool.run("dynamic_example_tool", "hello")
+        tools = pool.tools()        # LangChain tools backed by the pool
+"""
+from __future__ import annotations
+
+import asyncio
+import importlib
+import multiprocessing
+import os
+import queue
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, List, Optional, Sequence
+
+import ormsgpack
+from langchain_core.tools import Tool
+
+from tools.persist_tools.loader import DEFAULT_BYTECODE_DIR, DEFAULT_REGISTRY_PATH, DynamicToolLoader
+
+_PACK_OPTIONS = ormsgpack.OPT_NON_STR_KEYS
+# Longest pause between attempts to restart a worker that failed to start.
+_MAX_RESPAWN_BACKOFF = 30.0
+
+
+class ToolTimeout(TimeoutError):
+    """Raised when a sandboxed tool call exceeds its timeout (its worker was replaced) or no worker came free."""
+
+
+class ToolCrashed(RuntimeError):
+    """Raised when a worker died during a call, e.g. on its memory limit; it was replaced."""
+
+
+class ToolFailed(RuntimeError):
+    """Raised in the caller when a sandboxed tool raised; carries the worker's traceback."""
+
+    def __init__(self, tool: str, error: str, message: str, details: str = ""):
+        super().__init__(f"{tool} raised {error}: {message}")
+        self.tool = tool
+        self.error = error
+        self.details = details
+
+
+def _pack(message: Any) -> bytes:
+    return ormsgpack.packb(message, default=str, option=_PACK_OPTIONS)
+
+
+# --- Worker process ---
+
+
+def _apply_memory_limit(limit_mb: Optional[int]) -> None:
+    if not limit_mb:
+        return
+    import resource
+
+    limit = limit_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _worker_main(connection, registry_path: str, cache_dir: Optional[str], preload: Sequence[str], memory_limit_mb: Optional[int]) -> None:
+    try:
+        _apply_memory_limit(memory_limit_mb)
+        loader = DynamicToolLoader(registry_path, cache_dir)
+        entries = loader.entries()
+        declared = {spec["module"] for entry in entries.values() for spec in entry.imports}
+        for module in [*preload, *sorted(declared)]:
+            importlib.import_module(module)
+        for name in entries:
+            loader.function(name)
+    except BaseException as exc:
+        connection.send_bytes(_pack({"ready": False, "error": type(exc).__name__, "message": str(exc)}))
+        return
+    try:
+        connection.send_bytes(_pack({"ready": True, "pid": os.getpid()}))
+    except (BrokenPipeError, OSError):
+        # The pool closed while this worker started.
+        return
+
+    while True:
+        try:
+            request = ormsgpack.unpackb(connection.recv_bytes())
+        except (EOFError, OSError):
+            return
+        if request is None:
+            return
+        try:
+            loader.refresh()
+            result = loader.function(request["tool"])(*request["args"], **request["kwargs"])
+            reply = {"ok": True, "result": result}
+        except Exception as exc:
+            reply = {"ok": False, "error": type(exc).__name__, "message": str(exc), "details": traceback.format_exc()}
+        try:
+            connection.send_bytes(_pack(reply))
+        except (BrokenPipeError, OSError):
+            return
+
+
+# --- Parent side ---
+
+
+class _Worker:
+    def __init__(self, context, args: tuple):
+        self.connection, child = context.Pipe(duplex=True)
+        self.process = context.Process(target=_worker_main, args=(child, *args), daemon=True)
+        self.process.start()
+        child.close()
+        self.calls = 0
+
+    def wait_ready(self, timeout: float) -> None:
+        if not self.connection.poll(timeout):
+            self.kill()
+            raise ToolTimeout(f"Sandbox worker did not start within {timeout}s")
+        try:
+            message = ormsgpack.unpackb(self.connection.recv_bytes())
+        except (EOFError, OSError):
+            message = {"error": "exit code", "message": self.process.exitcode}
+        if not message.get("ready"):
+            self.kill()
+            raise RuntimeError(f"Sandbox worker failed to start: {message.get('error')}: {message.get('message')}")
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(5)
+        self.connection.close()
+
+
+class SandboxPool:
+    """A fixed number of warm worker processes running registered tools."""
+
+    def __init__(
+        self,
+        size: Optional[int] = None,
+        registry_path: str = DEFAULT_REGISTRY_PATH,
+        cache_dir: Optional[str] = DEFAULT_BYTECODE_DIR,
+        preload: Sequence[str] = (),
+        timeout: float = 30.0,
+        memory_limit_mb: Optional[int] = 1024,
+        start_timeout: float = 60.0,
+        start_method: str = "spawn",
+        acquire_timeout: float = 60.0,
+    ):
+        self.size = size or os.cpu_count() or 1
+        self.timeout = timeout
+        self.start_timeout = start_timeout
+        self.acquire_timeout = acquire_timeout
+        # Descriptions for the LangChain tools; nothing is compiled in this process.
+        self.loader = DynamicToolLoader(registry_path, cache_dir)
+        self.stats = {"calls": 0, "timeouts": 0, "crashes": 0, "respawns": 0, "respawn_failures": 0}
+        self._context = multiprocessing.get_context(start_method)
+        self._args = (registry_path, cache_dir, tuple(preload), memory_limit_mb)
+        # None is the closed marker: whoever takes it puts it back and raises.
+        self._idle: "queue.Queue[Optional[_Worker]]" = queue.Queue()
+        self._workers: List[_Worker] = []
+        self._starting: List[_Worker] = []
+        self._stats_lock = threading.Lock()
+        # Guards _workers, _starting and _closed between callers, respawn threads and close().
+        self._workers_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._closed = False
+        self._stop = threading.Event()
+        started = [_Worker(self._context, self._args) for _ in range(self.size)]
+        try:
+            for worker in started:
+                worker.wait_ready(self.start_timeout)
+        except BaseException:
+            for worker in started:
+                worker.kill()
+            raise
+        for worker in started:
+            self._workers.append(worker)
+            self._idle.put(worker)
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _replace(self, worker: _Worker) -> None:
+        """Kill a worker and start a fresh one in the background; the caller does not wait for it."""
+        worker.kill()
+        with self._workers_lock:
+            # close() may already have dropped it.
+            if worker in self._workers:
+                self._workers.remove(worker)
+            closed = self._closed
+        if not closed:
+            threading.Thread(target=self._respawn, name="sandbox-respawn", daemon=True).start()
+
+    def _respawn(self) -> None:
+        # Retried until it works or the pool closes, so a failed start (e.g. a
+        # broken tool in the registry) never shrinks the pool for good.
+        backoff = 0.5
+        while not self._closed:
+            fresh = _Worker(self._context, self._args)
+            with self._workers_lock:
+                self._starting.append(fresh)
+            try:
+                fresh.wait_ready(self.start_timeout)
+            except Exception as exc:
+                if self._closed:
+                    return
+                self._count("respawn_failures")
+                print(f"Sandbox worker failed to restart, retrying in {backoff:.1f}s: {exc}")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, _MAX_RESPAWN_BACKOFF)
+                continue
+            finally:
+                with self._workers_lock:
+                    self._starting.remove(fresh)
+            with self._workers_lock:
+                closed = self._closed
+                if not closed:
+                    self._workers.append(fresh)
+            if closed:
+                fresh.kill()
+                return
+            self._count("respawns")
+            self._idle.put(fresh)
+            return
+
+    # --- Calls ---
+
+    def _acquire(self) -> _Worker:
+        try:
+            worker = self._idle.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            raise ToolTimeout(f"No sandbox worker became free within {self.acquire_timeout}s") from None
+        if worker is None:
+            self._idle.put(None)
+            raise RuntimeError("SandboxPool is closed")
+        return worker
+
+    def run(self, tool: str, *args: Any, timeout: Optional[float] = None, **kwargs: Any) -> Any:
+        """Run a registered tool in a worker; waits up to ``acquire_timeout`` for a free one."""
+        if self._closed:
+            raise RuntimeError("SandboxPool is closed")
+        timeout = self.timeout if timeout is None else timeout
+        worker = self._acquire()
+        self._count("calls")
+        try:
+            worker.connection.send_bytes(_pack({"tool": tool, "args": list(args), "kwargs": kwargs}))
+            finished = worker.connection.poll(timeout)
+            reply = ormsgpack.unpackb(worker.connection.recv_bytes()) if finished else None
+        except (EOFError, OSError) as exc:
+            if self._closed:
+                # close() killed the worker under this call.
+                self._replace(worker)
+                raise RuntimeError("SandboxPool is closed") from exc
+            self._count("crashes")
+            code = worker.process.exitcode
+            self._replace(worker)
+            raise ToolCrashed(f"Sandbox worker running {tool} died (exit code {code})") from exc
+        if reply is None:
+            self._replace(worker)
+            if self._closed:
+                raise RuntimeError("SandboxPool is closed")
+            self._count("timeouts")
+            raise ToolTimeout(f"{tool} did not finish within {timeout}s")
+        worker.calls += 1
+        self._idle.put(worker)
+        if not reply["ok"]:
+            raise ToolFailed(tool, reply["error"], reply["message"], reply.get("details", ""))
+        return reply["result"]
+
+    async def arun(self, tool: str, *args: Any, timeout: Optional[float] = None, **kwargs: Any) -> Any:
+        """Async ``run``; the wait happens on the pool's threads, so the event loop stays free."""
+        call = partial(self.run, tool, *args, timeout=timeout, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), call)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # One thread per worker: queued calls wait in the executor's queue
+        # instead of each parking a thread of the loop's default executor.
+        with self._stats_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="sandbox")
+            return self._executor
+
+    # --- Tools ---
+
+    def tool(self, name: str) -> Tool:
+        entry = self.loader.entries()[name]
+
+        def run(*args: Any, **kwargs: Any) -> Any:
+            return self.run(name, *args, **kwargs)
+
+        async def arun(*args: Any, **kwargs: Any) -> Any:
+            return await self.arun(name, *args, **kwargs)
+
+        return Tool(name=entry.name, description=entry.description, func=run, coroutine=arun)
+
+    def tools(self, names: Optional[Sequence[str]] = None) -> List[Tool]:
+        self.loader.refresh()
+        return [self.tool(name) for name in (names if names is not None else self.loader.entries())]
+
+    @property
+    def pids(self) -> List[int]:
+        with self._workers_lock:
+            return [worker.process.pid for worker in self._workers]
+
+    # --- Lifecycle ---
+
+    def close(self) -> None:
+        with self._workers_lock:
+            self._closed = True
+            workers, self._workers = self._workers, []
+            starting = list(self._starting)
+        self._stop.set()
+        # Wakes every caller waiting for a worker.
+        self._idle.put(None)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        for worker in workers:
+            try:
+                worker.connection.send_bytes(_pack(None))
+            except OSError:
+                pass
+            worker.process.join(1)
+            worker.kill()
+        for worker in starting:
+            worker.kill()
+
+    def __enter__(self) -> "SandboxPool":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+_pool: Optional[SandboxPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_sandbox_pool() -> SandboxPool:
+    """Process-wide pool with $AGENTIC_SANDBOX_WORKERS workers (default: CPU count)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = os.environ.get("AGENTIC_SANDBOX_WORKERS")
+            _pool = SandboxPool(
+                size=int(workers) if workers else None,
+                registry_path=os.environ.get("AGENTIC_TOOL_REGISTRY", DEFAULT_REGISTRY_PATH),
+                cache_dir=os.environ.get("AGENTIC_TOOL_BYTECODE", DEFAULT_BYTECODE_DIR),
+            )
+        return _pool
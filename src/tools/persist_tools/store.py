@@ -0,0 +1,300 @@
+"""
+Tool Store
+----------
+
+SQLite store for registered tools. It replaces rewriting the whole
+``registered_tools.json`` on every change.
+
+* ``put`` and ``remove`` touch one row plus its full-text index entry and
+  append one row to a change log, all in a single transaction. Writing an
+  unchanged tool is a no-op.
+* ``search`` looks tools up by keywords in their name and description
+  through an FTS5 index, ranked by bm25.
+* Every write gets a sequence number in the change log. ``changes_since``
+  lets a reader apply only what changed since it last looked. Subscribers
+  are notified after each local write. ``watch`` also notifies them of
+  writes made by other processes.
+
+``DynamicToolLoader`` and ``SandboxPool`` accept a store path in place of
+the JSON file. A running server then hot-reloads only the changed tools.
+
+Usage::
+
+    store = ToolStore("tools.sqlite")
+    store.import_json("registered_tools.json")
+    store.put("shout", {"code": "def shout(text):\\n    return text.upper()\\n", "description": "Shout."})
+    store.search("search dummy")          # -> [RegisteredTool(...)]
+    store.subscribe(lambda changes: print(changes))
+    store.watch()                         # also notify of other processes' writes
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+from tools.persist_tools.loader import RegisteredTool
+
+DEFAULT_STORE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "agentic_framework", "tools.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tools (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    func_name TEXT NOT NULL,
+    description TEXT NOT NULL,
+    code TEXT NOT NULL,
+    config TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS tools_fts USING fts5(
+    name, description, content='tools', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS tools_ai AFTER INSERT ON tools BEGIN
+    INSERT INTO tools_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS tools_ad AFTER DELETE ON tools BEGIN
+    INSERT INTO tools_fts(tools_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS tools_au AFTER UPDATE ON tools BEGIN
+    INSERT INTO tools_fts(tools_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+    INSERT INTO tools_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+END;
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    op TEXT NOT NULL,
+    digest TEXT,
+    at REAL NOT NULL
+);
+"""
+
+_COLUMNS = "name, func_name, description, code, config, metadata"
+
+
+@dataclass(frozen=True)
+class ToolChange:
+    seq: int
+    name: str
+    # "put" or "remove"
+    op: str
+    digest: Optional[str]
+
+
+def _row_entry(row: tuple) -> Dict[str, Any]:
+    name, func_name, description, code, config, metadata = row
+    return {
+        "func_name": func_name,
+        "description": description,
+        "config": json.loads(config),
+        "code": code,
+        "metadata": json.loads(metadata),
+    }
+
+
+def _match_query(keywords: str) -> str:
+    # Each word as a quoted prefix term, so user input never reaches FTS5 syntax.
+    return " OR ".join(f'"{word}"*' for word in re.findall(r"\w+", keywords.lower()))
+
+
+class ToolStore:
+    """Registered tools in SQLite with keyword search and a change log."""
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self._subscribers: List[Callable[[List[ToolChange]], None]] = []
+        self._notified_seq = self.last_seq()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+        with self._lock:
+            self._conn.close()
+
+    # --- Writes ---
+
+    def put(self, name: str, entry: Mapping[str, Any]) -> bool:
+        """Add or update one tool in a registered_tools.json-style entry; False if it was unchanged."""
+        tool = RegisteredTool.from_entry(name, entry)
+        row = (
+            name,
+            tool.func_name,
+            tool.description,
+            tool.code,
+            json.dumps(dict(tool.config), sort_keys=True),
+            json.dumps(entry.get("metadata") or {}, sort_keys=True),
+        )
+        with self._lock:
+            current = self._conn.execute(f"SELECT {_COLUMNS} FROM tools WHERE name = ?", (name,)).fetchone()
+            if current == row:
+                return False
+            with self._conn:
+                self._conn.execute(
+                    f"INSERT INTO tools ({_COLUMNS}, digest, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET func_name = excluded.func_name, "
+                    "description = excluded.description, code = excluded.code, config = excluded.config, "
+                    "metadata = excluded.metadata, digest = excluded.digest, updated_at = excluded.updated_at",
+                    (*row, tool.digest, time.time()),
+                )
+                self._log(name, "put", tool.digest)
+        self._dispatch()
+        return True
+
+    def remove(self, name: str) -> bool:
+        with self._lock:
+            with self._conn:
+                removed = self._conn.execute("DELETE FROM tools WHERE name = ?", (name,)).rowcount
+                if removed:
+                    self._log(name, "remove", None)
+        if removed:
+            self._dispatch()
+        return bool(removed)
+
+    def _log(self, name: str, op: str, digest: Optional[str]) -> None:
+        self._conn.execute("INSERT INTO changes (name, op, digest, at) VALUES (?, ?, ?, ?)", (name, op, digest, time.time()))
+
+    def import_json(self, path: str) -> int:
+        """Copy the entries of a registered_tools.json file; returns how many changed."""
+        with open(path, "r", encoding="utf-8") as handle:
+            entries = json.load(handle)
+        return sum(self.put(name, entry) for name, entry in entries.items())
+
+    def export_json(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(self.entries(), handle, indent=2)
+
+    # --- Reads ---
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {_COLUMNS} FROM tools WHERE name = ?", (name,)).fetchone()
+        return _row_entry(row) if row else None
+
+    def entries(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {_COLUMNS} FROM tools ORDER BY name").fetchall()
+        return {row[0]: _row_entry(row) for row in rows}
+
+    def tools(self) -> Dict[str, RegisteredTool]:
+        return {name: RegisteredTool.from_entry(name, entry) for name, entry in self.entries().items()}
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT name FROM tools ORDER BY name")]
+
+    def search(self, keywords: str, limit: int = 10) -> List[RegisteredTool]:
+        """Tools whose name or description matches any keyword (as a prefix), best first."""
+        query = _match_query(keywords)
+        if not query:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join('tools.' + column for column in _COLUMNS.split(', '))} "
+                "FROM tools_fts JOIN tools ON tools.id = tools_fts.rowid "
+                "WHERE tools_fts MATCH ? ORDER BY bm25(tools_fts) LIMIT ?",
+                (query, limit),
+            ).fetchall()
+        return [RegisteredTool.from_entry(row[0], _row_entry(row)) for row in rows]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM tools").fetchone()[0]
+
+    # --- Change log ---
+
+    def last_seq(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+
+    def changes_since(self, seq: int) -> Optional[List[ToolChange]]:
+        """Changes after ``seq``, oldest first; None if the log was trimmed past it (reload everything)."""
+        with self._lock:
+            oldest = self._conn.execute("SELECT MIN(seq) FROM changes").fetchone()[0]
+            if oldest is None:
+                # An empty log after writes means it was trimmed; AUTOINCREMENT remembers the last seq.
+                row = self._conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'").fetchone()
+                return None if row is not None and seq < row[0] else []
+            if oldest > seq + 1:
+                return None
+            rows = self._conn.execute(
+                "SELECT seq, name, op, digest FROM changes WHERE seq > ? ORDER BY seq", (seq,)
+            ).fetchall()
+        return [ToolChange(*row) for row in rows]
+
+    def trim_changes(self, keep: int = 10000) -> int:
+        """Drop all but the newest ``keep`` change rows; readers further behind reload everything."""
+        with self._lock:
+            with self._conn:
+                return self._conn.execute(
+                    "DELETE FROM changes WHERE seq <= (SELECT COALESCE(MAX(seq), 0) FROM changes) - ?", (keep,)
+                ).rowcount
+
+    # --- Notifications ---
+
+    def subscribe(self, callback: Callable[[List[ToolChange]], None]) -> Callable[[], None]:
+        """Call ``callback(changes)`` after each write; returns a function that unsubscribes."""
+        with self._lock:
+            self._subscribers.append(callback)
+        return lambda: self._subscribers.remove(callback)
+
+    def _dispatch(self) -> None:
+        with self._lock:
+            changes = self.changes_since(self._notified_seq) or []
+            if not changes:
+                return
+            self._notified_seq = changes[-1].seq
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(changes)
+            except Exception as exc:
+                print(f"Tool store subscriber failed: {exc}")
+
+    def watch(self, interval: float = 1.0) -> None:
+        """Poll for writes by other processes in a background thread and notify subscribers."""
+        if self._watcher is not None:
+            return
+
+        def poll() -> None:
+            version = None
+            while not self._stop.wait(interval):
+                with self._lock:
+                    # Changes only when another connection commits.
+                    current = self._conn.execute("PRAGMA data_version").fetchone()[0]
+                if current != version:
+                    version = current
+                    self._dispatch()
+
+        self._watcher = threading.Thread(target=poll, name="tool-store-watch", daemon=True)
+        self._watcher.start()
+
+
+_store: Optional[ToolStore] = None
+_store_lock = threading.Lock()
+
+
+def get_tool_store() -> ToolStore:
+    """Process-wide store at $AGENTIC_TOOL_STORE or ~/.cache."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ToolStore(os.environ.get("AGENTIC_TOOL_STORE", DEFAULT_STORE_PATH))
+        return _store
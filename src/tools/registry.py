@@ -0,0 +1,113 @@
+"""
+Tool Registry
+-------------
+
+Tools are declared here by name and description. Their implementations and
+dependencies are imported on first use.
+
+``import tools`` used to import every implementation module (``pptx``,
+``langchain_google_community``, all of ``langchain.agents``), build the
+Google search client and print the API key. Now it only reads this table.
+Touching a tool, either as ``tools.web_search_google`` or through
+``get_tool("google_search")``, imports the module that defines it. The built
+tool is cached after that. The Google client itself is built on the first
+search.
+
+Listing tools (``tool_specs``) never imports an implementation.
+"""
+from __future__ import annotations
+
+import importlib
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class ToolSpec:
+    # Attribute of the ``tools`` package.
+    export: str
+    # Name the model sees.
+    name: str
+    description: str
+    # "module:attribute" of the built tool.
+    target: str
+
+
+TOOL_SPECS: Tuple[ToolSpec, ...] = (
+    ToolSpec(
+        "web_search_google",
+        "google_search",
+        "Search Google for recent results.",
+        "tools.basic_tools:web_search_google",
+    ),
+    ToolSpec(
+        "ppt_tool",
+        "create_ppt",
+        "Generates a PowerPoint presentation with provided title, content and references.",
+        "tools.basic_tools:ppt_tool",
+    ),
+    ToolSpec(
+        "ref_tool",
+        "add_references",
+        "Processes and formats a list of references.",
+        "tools.basic_tools:ref_tool",
+    ),
+    ToolSpec(
+        "analyze_url_text",
+        "analyze_url_text",
+        "Analyze the text content of a given URL and returns the first 1500 words of it.",
+        "tools.basic_tools:analyze_url_text",
+    ),
+    ToolSpec(
+        "wikipedia_lookup",
+        "wikipedia_lookup",
+        "Fetch the introduction of the most relevant Wikipedia article for each query. Pass all topics in one call.",
+        "tools.basic_tools:wikipedia_lookup",
+    ),
+    ToolSpec(
+        "summarize_text",
+        "summarize_text",
+        "Summarize the given text.",
+        "tools.basic_tools:summarize_text",
+    ),
+)
+
+_by_export: Dict[str, ToolSpec] = {spec.export: spec for spec in TOOL_SPECS}
+_by_name: Dict[str, ToolSpec] = {spec.name: spec for spec in TOOL_SPECS}
+_built: Dict[str, Any] = {}
+_built_lock = threading.Lock()
+
+
+def resolve(target: str) -> Any:
+    """Import ``module:attribute`` and return the attribute."""
+    module_name, _, attribute = target.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def tool_spec(name: str) -> ToolSpec:
+    """Spec by tool name or export name."""
+    spec = _by_name.get(name) or _by_export.get(name)
+    if spec is None:
+        raise KeyError(f"Unknown tool: {name}")
+    return spec
+
+
+def tool_specs() -> List[ToolSpec]:
+    return list(TOOL_SPECS)
+
+
+def get_tool(name: str) -> Any:
+    """The built tool for a tool or export name, imported on first use."""
+    spec = tool_spec(name)
+    tool = _built.get(spec.export)
+    if tool is None:
+        tool = resolve(spec.target)
+        with _built_lock:
+            tool = _built.setdefault(spec.export, tool)
+    return tool
+
+
+def load_tools(names: Optional[Iterable[str]] = None) -> List[Any]:
+    """Build the named tools (default: all), e.g. to preload them before forking workers."""
+    return [get_tool(name) for name in (names if names is not None else _by_export)]
@@ -0,0 +1,215 @@
+"""
+Tool Retrieval
+--------------
+
+Selects the tools relevant to a query so that only those reach the prompt.
+
+Every tool description in a prompt costs prompt tokens, so prefill time grows
+linearly with the catalogue. A ``ToolIndex`` ranks tools by their name and
+description with BM25. Names are split on ``_`` so ``wikipedia_lookup``
+matches "wikipedia". Scores can optionally be blended with the cosine
+similarity of embeddings, from ``HashingVectorizer`` or ``LmstudioEmbedder``
+(see llms.semantic_cache). ``select`` returns the top-k tools for a query.
+
+The catalogue comes from the declared tools in ``tools.registry`` and from
+the registered (dynamic) tools. Tools are indexed by name and description
+only, and are built when they are selected. ``add`` and ``remove`` touch a
+single tool, so a ``ToolStore`` subscriber can keep the index live.
+
+Usage::
+
+    index = ToolIndex.from_catalog(loader=get_dynamic_tool_loader())
+    tools = index.select("make slides about solar panels", k=3)
+    agent = AdvancedAgent(llm=llm, tools=all_tools, prompt_template=prompt, tool_index=index, max_tools=3)
+"""
+from __future__ import annotations
+
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Any, Callable, Container, Dict, Iterable, List, Optional, Sequence, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class _Entry:
+    __slots__ = ("name", "description", "tool", "length", "terms")
+
+    def __init__(self, name: str, description: str, tool: Any, terms: Counter):
+        self.name = name
+        self.description = description
+        # A tool, or a zero-argument callable that builds it on first selection.
+        self.tool = tool
+        self.terms = terms
+        self.length = sum(terms.values())
+
+
+class ToolIndex:
+    """BM25 (plus optional embedding) index over tool names and descriptions."""
+
+    def __init__(
+        self,
+        tools: Iterable[Any] = (),
+        *,
+        embedder: Optional[Callable[[Sequence[str]], Any]] = None,
+        vector_weight: float = 0.3,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ):
+        self.embedder = embedder
+        self.vector_weight = vector_weight
+        self.k1 = k1
+        self.b = b
+        self._entries: Dict[str, _Entry] = {}
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._total_length = 0
+        self._vectors: Dict[str, Any] = {}
+        self._matrix: Optional[Tuple[List[str], Any]] = None
+        self._lock = threading.RLock()
+        for tool in tools:
+            self.add(tool.name, tool.description, tool)
+
+    # --- Catalogue ---
+
+    @classmethod
+    def from_catalog(cls, loader: Any = None, **kwargs: Any) -> "ToolIndex":
+        """Index the declared tools and, given a ``DynamicToolLoader``, the registered ones; builds nothing."""
+        from tools.registry import get_tool, tool_specs
+
+        index = cls(**kwargs)
+        for spec in tool_specs():
+            index.add(spec.name, spec.description, lambda export=spec.export: get_tool(export))
+        if loader is not None:
+            for name, entry in loader.entries().items():
+                index.add(name, entry.description, lambda name=name: loader.tool(name))
+        return index
+
+    def add(self, name: str, description: str, tool: Any) -> None:
+        """Add or replace one tool; ``tool`` may be a callable that builds it."""
+        terms = Counter(tokenize(f"{name} {description}"))
+        with self._lock:
+            self._remove(name)
+            entry = _Entry(name, description, tool, terms)
+            self._entries[name] = entry
+            self._total_length += entry.length
+            for term, count in terms.items():
+                self._postings[term][name] = count
+            if self.embedder is not None:
+                self._vectors[name] = self.embedder([f"{name.replace('_', ' ')}: {description}"])[0]
+                self._matrix = None
+
+    def remove(self, name: str) -> bool:
+        with self._lock:
+            return self._remove(name)
+
+    def _remove(self, name: str) -> bool:
+        entry = self._entries.pop(name, None)
+        if entry is None:
+            return False
+        self._total_length -= entry.length
+        for term in entry.terms:
+            postings = self._postings[term]
+            postings.pop(name, None)
+            if not postings:
+                del self._postings[term]
+        if self._vectors.pop(name, None) is not None:
+            self._matrix = None
+        return True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    # --- Ranking ---
+
+    def _bm25(self, query_terms: Sequence[str]) -> Dict[str, float]:
+        count = len(self._entries)
+        average = self._total_length / count if count else 0.0
+        scores: Dict[str, float] = defaultdict(float)
+        for term in set(query_terms):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1.0 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for name, frequency in postings.items():
+                norm = self.k1 * (1.0 - self.b + self.b * self._entries[name].length / average)
+                scores[name] += idf * frequency * (self.k1 + 1.0) / (frequency + norm)
+        return scores
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[str, float]]:
+        """The ``k`` best ``(name, score)`` pairs for ``query``; tools with no signal are left out."""
+        with self._lock:
+            scores = self._bm25(tokenize(query))
+            if self.embedder is not None and self._vectors:
+                top = max(scores.values(), default=0.0)
+                if top > 0:
+                    scores = {name: score / top for name, score in scores.items()}
+                names, matrix = self._vector_matrix()
+                similarities = (matrix @ self.embedder([query])[0]).clip(min=0.0).tolist()
+                weight = self.vector_weight
+                blended: Dict[str, float] = {}
+                for name, similarity in zip(names, similarities):
+                    score = (1.0 - weight) * scores.get(name, 0.0) + weight * similarity
+                    if score > 0:
+                        blended[name] = score
+                scores = blended
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:k]
+
+    def _vector_matrix(self) -> Tuple[List[str], Any]:
+        # Stacked once per change to the catalogue, not per query.
+        if self._matrix is None:
+            import numpy as np
+
+            names = list(self._vectors)
+            self._matrix = (names, np.stack([self._vectors[name] for name in names]))
+        return self._matrix
+
+    def select_names(
+        self,
+        query: str,
+        k: int = 5,
+        always: Sequence[str] = (),
+        allowed: Optional[Container[str]] = None,
+    ) -> List[str]:
+        """Names of the top-``k`` tools for ``query`` plus the ``always`` ones, limited to ``allowed``.
+
+        A query that matches no tool at all gets the first ``k`` tools in
+        catalogue order rather than none, so the model is never left without
+        tools.
+        """
+        with self._lock:
+            candidates = [name for name in self._entries if allowed is None or name in allowed]
+            names = [name for name in always if name in candidates]
+            limit = len(names) + k
+            ranked = [name for name, _ in self.search(query, len(self._entries)) if allowed is None or name in allowed]
+            for name in ranked or candidates:
+                if len(names) >= limit:
+                    break
+                if name not in names:
+                    names.append(name)
+        return names
+
+    def select(
+        self,
+        query: str,
+        k: int = 5,
+        always: Sequence[str] = (),
+        allowed: Optional[Container[str]] = None,
+    ) -> List[Any]:
+        """The tools of ``select_names``, built on first selection."""
+        return [self.tool(name) for name in self.select_names(query, k, always, allowed)]
+
+    def tool(self, name: str) -> Any:
+        with self._lock:
+            entry = self._entries[name]
+            if callable(entry.tool) and not hasattr(entry.tool, "name"):
+                entry.tool = entry.tool()
+            return entry.tool
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+from langchain_core.language_models.fake import FakeListLLM, FakeStreamingListLLM
+from langchain_core.prompts import PromptTemplate
+from langchain_core.tools import Tool
+
+from agents.advanced_agent import AdvancedAgent
+
+PROMPT = PromptTemplate.from_template("User Query: {input}")
+TOOLS = [Tool(name="echo", func=lambda text: text, description="Echo the input.")]
+
+
+def make_agent(llm, **kwargs):
+    return AdvancedAgent(llm=llm, tools=TOOLS, prompt_template=PROMPT, **kwargs)
+
+
+def test_scratchpad_is_appended_without_touching_the_callers_prompt():
+    agent = make_agent(FakeListLLM(responses=["ok"]))
+    assert agent.prompt_template.input_variables == ["input", "agent_scratchpad"]
+    assert PROMPT.input_variables == ["input"]
+
+
+def test_executor_runs_sync_and_async():
+    executor = AdvancedAgent.create_executor(FakeListLLM(responses=["sync", "async"]), TOOLS, PROMPT)
+    assert executor.invoke({"input": "hi"})["output"] == "sync"
+    assert asyncio.run(executor.ainvoke({"input": "hi"}))["output"] == "async"
+
+
+def test_batch_plan_returns_one_finish_per_input():
+    agent = make_agent(FakeListLLM(responses=["a", "b", "c"]))
+    plans = agent.batch_plan([{"input": "1"}, {"input": "2"}, {"input": "3"}])
+    assert sorted(plan.return_values["output"] for plan in plans) == ["a", "b", "c"]
+    plans = asyncio.run(agent.abatch_plan([{"input": "1"}, {"input": "2"}]))
+    assert len(plans) == 2
+
+
+def test_stream_yields_chunks_of_the_answer():
+    agent = make_agent(FakeStreamingListLLM(responses=["Paris"]))
+    assert "".join(agent.stream([], input="Capital of France?")) == "Paris"
+
+
+def test_llm_chain_is_opt_in():
+    with pytest.raises(AttributeError):
+        make_agent(FakeListLLM(responses=["ok"])).llm_chain
+    agent = make_agent(FakeListLLM(responses=["legacy"]), legacy_llm_chain=True)
+    assert agent.llm_chain.invoke({"input": "hi", "agent_scratchpad": ""})["text"] == "legacy"
+    assert agent.llm_chain is agent.llm_chain
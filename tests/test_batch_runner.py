@@ -0,0 +1,95 @@
+import asyncio
+import json
+
+from langchain_core.language_models.fake import FakeListLLM
+from langchain_core.prompts import PromptTemplate
+from langchain_core.tools import Tool
+
+from agents.advanced_agent import AdvancedAgent
+from agents.batch_runner import BatchRunner, completed_ids, percentile
+
+
+class FakeExecutor:
+    """Stands in for an AgentExecutor: echoes the input, fails on request."""
+
+    def __init__(self, delay=0.0, fail=()):
+        self.delay = delay
+        self.fail = set(fail)
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def ainvoke(self, inputs):
+        self.calls.append(inputs["input"])
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if inputs["input"] in self.fail:
+                raise RuntimeError("boom")
+            return {"input": inputs["input"], "output": inputs["input"].upper()}
+        finally:
+            self.in_flight -= 1
+
+
+def read(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def test_runs_with_bounded_concurrency_and_writes_every_result(tmp_path):
+    executor = FakeExecutor(delay=0.01)
+    output = tmp_path / "out.jsonl"
+    stats = BatchRunner(executor, concurrency=4).run((f"q{i}" for i in range(40)), str(output))
+    assert stats.completed == 40 and stats.failed == 0
+    assert executor.max_in_flight == 4
+    records = read(output)
+    assert sorted(record["id"] for record in records) == sorted(str(i) for i in range(40))
+    assert all(record["output"] == record["input"].upper() for record in records)
+    assert stats.as_dict()["latency_p99"] >= 0.01
+
+
+def test_resume_skips_completed_and_retries_failed(tmp_path):
+    source = tmp_path / "in.jsonl"
+    source.write_text("".join(json.dumps({"id": f"r{i}", "input": f"q{i}"}) + "\n" for i in range(10)))
+    output = tmp_path / "out.jsonl"
+
+    first = BatchRunner(FakeExecutor(fail={"q3"}), concurrency=2).run(str(source), str(output))
+    assert (first.completed, first.failed) == (9, 1)
+    # Simulate a crash in the middle of writing a record.
+    with open(output, "a") as f:
+        f.write('{"id": "r9", "inp')
+
+    retry = FakeExecutor()
+    second = BatchRunner(retry, concurrency=2).run(str(source), str(output))
+    assert retry.calls == ["q3"]
+    assert (second.completed, second.skipped) == (1, 9)
+    assert completed_ids(str(output)) == {f"r{i}" for i in range(10)}
+
+
+def test_runs_a_real_agent_executor(tmp_path):
+    executor = AdvancedAgent.create_executor(
+        llm=FakeListLLM(responses=["first", "second", "third"]),
+        tools=[Tool(name="echo", func=lambda text: text, description="Echo the input.")],
+        prompt_template=PromptTemplate.from_template("User Query: {input}"),
+    )
+    output = tmp_path / "out.jsonl"
+    stats = BatchRunner(executor, concurrency=1).run(["a", "b", "c"], str(output))
+    assert (stats.completed, stats.failed) == (3, 0)
+    records = read(output)
+    assert [record["input"] for record in records] == ["a", "b", "c"]
+    assert [record["output"] for record in records] == ["first", "second", "third"]
+
+
+def test_timeouts_are_recorded_as_failures(tmp_path):
+    output = tmp_path / "out.jsonl"
+    stats = BatchRunner(FakeExecutor(delay=1.0), concurrency=2, timeout=0.01).run(["slow"], str(output))
+    assert stats.failed == 1
+    assert "timed out" in read(output)[0]["error"]
+
+
+def test_percentile_uses_nearest_rank():
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 0.5) == 50.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile([], 0.5) == 0.0
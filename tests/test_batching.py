@@ -0,0 +1,113 @@
+import asyncio
+import concurrent.futures
+import threading
+
+import pytest
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import Generation, LLMResult
+
+from llms.batching import MicroBatchedLLM, MicroBatchScheduler
+
+
+class RecordingLLM(LLM):
+    """Answers each prompt in upper case and records every batch it was sent."""
+
+    batches: list = []
+    release: object = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "recording"
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+        raise AssertionError("the scheduler must use agenerate")
+
+    async def _agenerate(self, prompts, stop=None, run_manager=None, **kwargs):
+        self.batches.append((list(prompts), stop))
+        if self.release is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self.release.wait)
+        if any("bad" in prompt for prompt in prompts):
+            raise ValueError("bad prompt in batch")
+        return LLMResult(generations=[[Generation(text=prompt.upper())] for prompt in prompts])
+
+
+@pytest.fixture
+def llm():
+    return RecordingLLM(batches=[])
+
+
+def submit_together(scheduler, prompts, stops=None):
+    async def run():
+        return await asyncio.gather(
+            *(scheduler.asubmit(prompt, stop=stop) for prompt, stop in zip(prompts, stops or [None] * len(prompts))),
+            return_exceptions=True,
+        )
+
+    return asyncio.run(run())
+
+
+def test_prompts_within_the_window_share_one_batch(llm):
+    scheduler = MicroBatchScheduler(llm, max_batch_size=8, max_wait_ms=50)
+    try:
+        results = submit_together(scheduler, ["a", "b", "c", "d"])
+    finally:
+        scheduler.close()
+    # Each caller gets the answer to its own prompt.
+    assert results == ["A", "B", "C", "D"]
+    assert [sorted(prompts) for prompts, _ in llm.batches] == [["a", "b", "c", "d"]]
+    assert scheduler.stats()["batch_size_histogram"] == {4: 1}
+
+
+def test_batches_are_capped_and_blocking_callers_share_them(llm):
+    scheduler = MicroBatchScheduler(llm, max_batch_size=2, max_wait_ms=50)
+    batched = MicroBatchedLLM(scheduler=scheduler)
+    try:
+        with concurrent.futures.ThreadPoolExecutor(4) as pool:
+            results = list(pool.map(batched.invoke, ["a", "b", "c", "d"]))
+    finally:
+        scheduler.close()
+    assert results == ["A", "B", "C", "D"]
+    assert all(len(prompts) <= 2 for prompts, _ in llm.batches)
+    assert scheduler.stats()["submitted"] == 4
+
+
+def test_prompts_are_routed_by_stop_sequences(llm):
+    scheduler = MicroBatchScheduler(llm, max_batch_size=8, max_wait_ms=50)
+    try:
+        results = submit_together(scheduler, ["a", "b", "c"], [["\n"], None, ["\n"]])
+    finally:
+        scheduler.close()
+    assert results == ["A", "B", "C"]
+    calls = sorted((sorted(prompts), stop) for prompts, stop in llm.batches)
+    assert calls == [(["a", "c"], ["\n"]), (["b"], None)]
+
+
+def test_a_failed_batch_is_split_so_only_the_bad_prompt_fails(llm):
+    scheduler = MicroBatchScheduler(llm, max_batch_size=8, max_wait_ms=50)
+    try:
+        good, bad, other = submit_together(scheduler, ["good", "bad", "other"])
+    finally:
+        scheduler.close()
+    assert (good, other) == ("GOOD", "OTHER")
+    assert isinstance(bad, ValueError)
+    assert scheduler.stats()["failed_batches"] == 1
+    # One batch of three, then each prompt on its own.
+    assert sorted(len(prompts) for prompts, _ in llm.batches) == [1, 1, 1, 3]
+
+
+def test_close_cancels_pending_prompts_and_the_scheduler_restarts(llm):
+    llm.release = threading.Event()
+    scheduler = MicroBatchScheduler(llm, max_batch_size=8, max_wait_ms=1)
+    with concurrent.futures.ThreadPoolExecutor(1) as pool:
+        pending = pool.submit(scheduler.submit, "stuck")
+        while not llm.batches:
+            threading.Event().wait(0.01)
+        scheduler.close()
+        llm.release.set()
+        with pytest.raises(concurrent.futures.CancelledError):
+            pending.result(timeout=5)
+    llm.release = None
+    try:
+        assert scheduler.submit("again") == "AGAIN"
+    finally:
+        scheduler.close()
@@ -0,0 +1,74 @@
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import HumanMessage, RemoveMessage
+from langgraph.graph import START, MessagesState, StateGraph
+
+from agents.checkpoint import SQLiteDeltaSaver
+
+
+def build_app(saver):
+    model = FakeListChatModel(responses=[f"reply {i}" for i in range(100)])
+    workflow = StateGraph(state_schema=MessagesState)
+    workflow.add_node("model", lambda state: {"messages": model.invoke(state["messages"])})
+    workflow.add_edge(START, "model")
+    return workflow.compile(checkpointer=saver)
+
+
+def config(thread_id):
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def chat(app, thread_id, turns):
+    result = None
+    for i in range(turns):
+        result = app.invoke({"messages": [HumanMessage(content=f"message {i}")]}, config(thread_id))
+    return [message.content for message in result["messages"]]
+
+
+def message_rows(saver, kind):
+    return saver._conn.execute("SELECT COUNT(*) FROM blobs WHERE channel = 'messages' AND kind = ?", (kind,)).fetchone()[0]
+
+
+def test_history_survives_a_new_saver_and_is_stored_as_deltas(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite")
+    saver = SQLiteDeltaSaver(path, snapshot_every=4)
+    history = chat(build_app(saver), "t1", turns=10)
+    assert len(history) == 20
+    # Two message writes per turn; one in five is a snapshot.
+    assert message_rows(saver, "full") == 4
+    assert message_rows(saver, "delta") == 16
+    saver.close()
+
+    reopened = SQLiteDeltaSaver(path)
+    app = build_app(reopened)
+    assert [m.content for m in app.get_state(config("t1")).values["messages"]] == history
+    assert len(chat(app, "t1", turns=1)) == 22
+    first = list(app.get_state_history(config("t1")))[-2]
+    assert [m.content for m in first.values["messages"]] == ["message 0"]
+
+
+def test_rewritten_history_is_stored_as_a_snapshot():
+    saver = SQLiteDeltaSaver(":memory:")
+    app = build_app(saver)
+    chat(app, "t1", turns=2)
+    messages = app.get_state(config("t1")).values["messages"]
+    app.update_state(config("t1"), {"messages": [RemoveMessage(id=messages[0].id)]})
+    assert message_rows(saver, "full") == 2
+    saver._threads.clear()
+    assert [m.content for m in app.get_state(config("t1")).values["messages"]] == ["reply 0", "message 1", "reply 1"]
+
+
+def test_idle_threads_are_evicted_and_bulk_loaded():
+    saver = SQLiteDeltaSaver(":memory:", max_threads=2, idle_ttl=None)
+    app = build_app(saver)
+    for thread_id in ("a", "b", "c"):
+        chat(app, thread_id, turns=1)
+    assert saver.cached_threads == ["b", "c"]
+
+    saver.idle_ttl = 0.0
+    assert saver.evict_idle() == 2
+    assert saver.cached_threads == []
+
+    loaded = saver.bulk_load(["a", "b", "missing"])
+    assert sorted(loaded) == ["a", "b"]
+    assert [m.content for m in loaded["a"].checkpoint["channel_values"]["messages"]] == ["message 0", "reply 0"]
+    assert len(chat(app, "a", turns=1)) == 4
@@ -0,0 +1,69 @@
+import asyncio
+import time
+
+from langchain_core.tools import Tool
+
+from tools.dispatch import ToolCall, ToolDispatcher
+
+
+def slow_echo(text, seconds=0.2):
+    time.sleep(seconds)
+    return text
+
+
+async def async_echo(text, seconds=0.2):
+    await asyncio.sleep(seconds)
+    return text.upper()
+
+
+def make_dispatcher(**kwargs):
+    tools = {
+        "slow_echo": slow_echo,
+        "async_echo": async_echo,
+        "lc_echo": Tool(name="lc_echo", func=lambda text: f"lc {text}", description="Echo."),
+    }
+    return ToolDispatcher(tools, **kwargs)
+
+
+def test_results_keep_the_order_of_the_calls():
+    dispatcher = make_dispatcher()
+    calls = [
+        ToolCall("slow_echo", {"text": "first", "seconds": 0.2}),
+        ToolCall("async_echo", {"text": "second", "seconds": 0.0}),
+        ToolCall("lc_echo", {"text": "third"}),
+        ToolCall("missing", {}, id="call-4"),
+    ]
+    results = dispatcher.dispatch(calls)
+    assert [result.call for result in results] == calls
+    assert [result.output for result in results[:3]] == ["first", "SECOND", "lc third"]
+    assert not results[3].ok and "Unknown tool" in results[3].error
+
+
+def test_calls_run_concurrently():
+    dispatcher = make_dispatcher()
+    calls = [ToolCall("slow_echo", {"text": str(i)}) for i in range(3)] + [ToolCall("async_echo", {"text": "a"})]
+    start = time.perf_counter()
+    results = dispatcher.dispatch(calls)
+    # Four 0.2s calls take about as long as one.
+    assert time.perf_counter() - start < 0.5
+    assert all(result.ok for result in results)
+
+
+def test_each_tool_has_its_own_timeout():
+    dispatcher = make_dispatcher(default_timeout=5.0, timeouts={"async_echo": 0.05})
+    slow, fast = dispatcher.dispatch([
+        ToolCall("async_echo", {"text": "late", "seconds": 1.0}),
+        ToolCall("slow_echo", {"text": "on time", "seconds": 0.1}),
+    ])
+    assert not slow.ok and "timed out after 0.05s" in slow.error and slow.elapsed < 0.5
+    assert fast.output == "on time"
+
+
+def test_dispatch_works_inside_a_running_loop():
+    dispatcher = make_dispatcher()
+
+    async def called_from_async_code():
+        return dispatcher.dispatch([ToolCall("async_echo", {"text": "nested", "seconds": 0.0})])
+
+    [result] = asyncio.run(called_from_async_code())
+    assert result.output == "NESTED"
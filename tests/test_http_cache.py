@@ -0,0 +1,171 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from tools.http_cache import HTTPResponseCache, parse_cache_control
+from tools.http_client import HTTPClient
+from tools.implementation.text_extraction import fetch_text
+
+PAGES = {
+    "/max-age": ({"Cache-Control": "max-age=60"}, b'{"page": "max-age"}'),
+    "/etag": ({"Cache-Control": "no-cache", "ETag": '"v1"'}, b'{"page": "etag"}'),
+    "/no-store": ({"Cache-Control": "no-store"}, b'{"page": "no-store"}'),
+    "/plain": ({}, b'{"page": "plain"}'),
+    "/html": ({"Content-Type": "text/html", "ETag": '"h1"'}, b"<p>one two three four</p>"),
+    # About 8 MB of paragraphs, to check that extraction stops reading early.
+    "/large": (
+        {"Content-Type": "text/html; charset=utf-8"},
+        b"<html><body>" + b"".join(b"<p>paragraph %d with some filler words</p>" % i for i in range(200_000)),
+    ),
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        self.server.hits[path] = self.server.hits.get(path, 0) + 1
+        headers, body = PAGES[path]
+        if "ETag" in headers and self.headers.get("If-None-Match") == headers["ETag"]:
+            self.send_response(304)
+            self.send_header("ETag", headers["ETag"])
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        headers = {"Content-Type": "application/json", **headers}
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except ConnectionError:
+            # The client stopped reading early on purpose.
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    httpd.hits = {}
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd, f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return HTTPResponseCache(path=str(tmp_path / "http_cache.sqlite"), ttl_overrides={})
+
+
+@pytest.fixture
+def client():
+    client = HTTPClient(retries=0)
+    yield client
+    client.close()
+
+
+def test_parse_cache_control():
+    assert parse_cache_control('max-age=60, no-cache, private="x"') == {"max-age": "60", "no-cache": None, "private": "x"}
+
+
+def test_max_age_is_served_without_a_request(server, cache, client):
+    httpd, base = server
+    httpd.hits.clear()
+    first = client.get_cached(f"{base}/max-age", namespace="web", cache=cache)
+    second = client.get_cached(f"{base}/max-age", namespace="web", cache=cache)
+    assert first.json() == second.json() == {"page": "max-age"}
+    assert not first.from_cache and second.from_cache
+    assert httpd.hits["/max-age"] == 1
+    assert cache.stats["web"].hits == 1 and cache.stats["web"].misses == 1
+
+
+def test_etag_is_revalidated_with_304(server, cache, client):
+    httpd, base = server
+    httpd.hits.clear()
+    client.get_cached(f"{base}/etag", namespace="web", cache=cache)
+    again = client.get_cached(f"{base}/etag", namespace="web", cache=cache)
+    assert again.from_cache and again.json() == {"page": "etag"}
+    assert httpd.hits["/etag"] == 2
+    assert cache.stats["web"].revalidated == 1
+
+
+def test_no_store_is_never_cached(server, cache, client):
+    httpd, base = server
+    httpd.hits.clear()
+    for _ in range(3):
+        assert not client.get_cached(f"{base}/no-store", namespace="web", cache=cache).from_cache
+    assert httpd.hits["/no-store"] == 3
+    assert cache.stats["web"].stores == 0
+
+
+def test_ttl_override_applies_per_namespace(server, cache, client):
+    httpd, base = server
+    httpd.hits.clear()
+    cache.set_ttl("wiki", 60)
+    for _ in range(3):
+        client.get_cached(f"{base}/plain", namespace="wiki", cache=cache)
+        client.get_cached(f"{base}/plain", namespace="other", cache=cache)
+    # "wiki" is cached by override; "other" has no headers and no override.
+    assert httpd.hits["/plain"] == 4
+    assert cache.stats_dict()["wiki"]["hit_rate"] == pytest.approx(2 / 3)
+
+
+def test_entries_survive_a_restart(server, cache, client, tmp_path):
+    httpd, base = server
+    httpd.hits.clear()
+    client.get_cached(f"{base}/max-age", namespace="web", cache=cache)
+    reopened = HTTPResponseCache(path=cache.path, ttl_overrides={})
+    assert client.get_cached(f"{base}/max-age", namespace="web", cache=reopened).from_cache
+    assert httpd.hits["/max-age"] == 1
+
+
+def test_fetch_text_caches_extracted_text(server, cache, client):
+    httpd, base = server
+    httpd.hits.clear()
+    first = fetch_text(f"{base}/html", client=client, cache_namespace="analyze_url_text", cache=cache)
+    second = fetch_text(f"{base}/html", client=client, cache_namespace="analyze_url_text", cache=cache)
+    assert first["content"] == second["content"] == "one two three four"
+    assert httpd.hits["/html"] == 2
+    assert cache.stats["analyze_url_text"].revalidated == 1
+
+
+def test_fetch_text_stops_reading_at_max_words(server, client):
+    _, base = server
+    size = len(PAGES["/large"][1])
+    result = fetch_text(f"{base}/large", max_words=50, chunk_size=16 * 1024, client=client)
+    assert result["content"].split()[:6] == ["paragraph", "0", "with", "some", "filler", "words"]
+    assert len(result["content"].split()) == 50 and result["truncated"]
+    # The first chunk already holds 50 words; the rest of the page is never read.
+    assert result["bytes_read"] <= 16 * 1024 < size
+
+
+def test_fetch_text_stops_reading_at_max_bytes(server, client):
+    _, base = server
+    result = fetch_text(f"{base}/large", max_words=10 ** 9, max_bytes=100_000, chunk_size=16 * 1024, client=client)
+    assert result["truncated"]
+    # Reading stops in the chunk that reaches the budget.
+    assert 100_000 <= result["bytes_read"] < 100_000 + 16 * 1024
+    # About 2500 of the 200000 paragraphs, six words each.
+    assert 10_000 < len(result["content"].split()) < 20_000
+
+
+def test_cached_call_uses_ttl_override(cache):
+    calls = []
+    cache.set_ttl("google_search", 60)
+
+    def search():
+        calls.append(1)
+        return [{"title": "result"}]
+
+    assert cache.cached_call("google_search", ("query", 5), search) == [{"title": "result"}]
+    assert cache.cached_call("google_search", ("query", 5), search) == [{"title": "result"}]
+    assert len(calls) == 1
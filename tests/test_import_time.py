@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+SRC = os.path.join(os.path.dirname(__file__), "..", "src")
+
+# Cumulative import time budgets, in seconds, for a cold ``python -X importtime -c "import <module>"``.
+# Generous on purpose: the tools budget catches eager implementation imports, the others catch regressions.
+BUDGETS = {
+    "tools": 0.5,
+    "llms.lmstudio_llm": 4.0,
+    "agents.advanced_agent": 6.0,
+}
+
+
+def run_python(code, *args):
+    env = {key: value for key, value in os.environ.items() if not key.startswith("GOOGLE_")}
+    env["PYTHONPATH"] = SRC
+    return subprocess.run([sys.executable, *args, "-c", code], capture_output=True, text=True, env=env, check=True)
+
+
+@pytest.mark.parametrize("module", sorted(BUDGETS))
+def test_import_time_budget(module):
+    result = run_python(f"import {module}", "-X", "importtime")
+    # The last line is the requested module: "import time: self | cumulative | name".
+    _, cumulative, name = result.stderr.strip().splitlines()[-1].split("|")
+    assert name.strip() == module
+    assert int(cumulative) / 1e6 < BUDGETS[module]
+
+
+def test_importing_tools_builds_nothing():
+    code = (
+        "import sys, tools\n"
+        "heavy = ['pptx', 'langchain_google_community', 'langchain.agents', 'tools.basic_tools']\n"
+        "print(sorted(name for name in heavy if name in sys.modules))\n"
+        "print([spec.name for spec in tools.tool_specs()])\n"
+        "print(tools.ppt_tool.name, 'tools.basic_tools' in sys.modules, 'pptx' in sys.modules)\n"
+    )
+    loaded, names, touched = run_python(code).stdout.splitlines()
+    # No implementation imports and no API key printed on import.
+    assert loaded == "[]"
+    assert "google_search" in names and "wikipedia_lookup" in names
+    # Touching a tool imports its module, but pptx waits for the first presentation.
+    assert touched == "create_ppt True False"
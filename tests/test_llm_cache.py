@@ -0,0 +1,158 @@
+import time
+
+from llms.cache import CacheKey, CachedResponse, InMemoryLRUCache, SQLiteCache, TieredCache
+from llms.semantic_cache import HashingVectorizer, SemanticCache
+
+AGENT_TEMPLATE = (
+    "Answer the following questions as best you can. You have access to the following tools:\n\n{tools}\n\n"
+    "Use the following format:\n\nQuestion: the input question you must answer\n"
+    "Thought: you should always think about what to do\nAction: the action to take, one of [{tool_names}]\n"
+    "Action Input: the input to the action\nObservation: the result of the action\n"
+    "... (this Thought/Action/Action Input/Observation can repeat N times)\n"
+    "Thought: I now know the final answer\nFinal Answer: the final answer to the original input question\n\n"
+    "Begin!\n\nQuestion: {input}\nThought:{agent_scratchpad}"
+)
+TOOLS = "\n".join(f"tool_{i}: Looks up facts about subject number {i} in the knowledge base." for i in range(20))
+
+
+def agent_prompt(question):
+    names = ", ".join(f"tool_{i}" for i in range(20))
+    return AGENT_TEMPLATE.format(tools=TOOLS, tool_names=names, input=question, agent_scratchpad="")
+
+
+def key(prompt, model="model-a", prefix="prefix", stop=None):
+    return CacheKey.build(model, prefix, prompt, stop)
+
+
+def test_key_covers_model_prefix_and_stop():
+    base = key("hello")
+    assert base.digest() == key("hello").digest()
+    assert base.digest() != key("hello", model="model-b").digest()
+    assert base.digest() != key("hello", prefix="other").digest()
+    assert base.digest() != key("hello", stop=["\n"]).digest()
+
+
+def test_lru_evicts_least_recently_used():
+    cache = InMemoryLRUCache(max_entries=2)
+    cache.put(key("a"), CachedResponse("A"))
+    cache.put(key("b"), CachedResponse("B"))
+    assert cache.get(key("a")).text == "A"
+    cache.put(key("c"), CachedResponse("C"))
+    assert cache.get(key("b")) is None
+    assert cache.get(key("a")).text == "A"
+    assert cache.stats.evictions == 1
+
+
+def test_lru_respects_byte_budget():
+    cache = InMemoryLRUCache(max_entries=100, max_bytes=60)
+    for prompt in "abcde":
+        cache.put(key(prompt), CachedResponse(prompt * 20))
+    assert len(cache) <= 2
+    assert cache.get(key("e")) is not None
+
+
+def test_lru_expires_entries(monkeypatch):
+    cache = InMemoryLRUCache(ttl=10)
+    cache.put(key("a"), CachedResponse("A", {"tokens_used": 3}))
+    assert cache.get(key("a")).metadata == {"tokens_used": 3}
+    real_time = time.time
+    monkeypatch.setattr(time, "time", lambda: real_time() + 11)
+    assert cache.get(key("a")) is None
+    assert cache.stats.expirations == 1
+
+
+def test_sqlite_persists_across_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    first = SQLiteCache(path)
+    first.put(key("a"), CachedResponse("A", {"tokens_used": 3}))
+    first.close()
+    second = SQLiteCache(path)
+    cached = second.get(key("a"))
+    assert cached.text == "A" and cached.metadata == {"tokens_used": 3}
+
+
+def test_sqlite_caps_entries(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+    for prompt in "abc":
+        cache.put(key(prompt), CachedResponse(prompt))
+    assert cache.get(key("a")) is None
+    assert cache.get(key("c")).text == "c"
+
+
+def test_tiered_cache_promotes_disk_hits(tmp_path):
+    memory = InMemoryLRUCache()
+    disk = SQLiteCache(str(tmp_path / "cache.sqlite"))
+    disk.put(key("a"), CachedResponse("A"))
+    cache = TieredCache(memory, disk)
+    assert cache.get(key("a")).text == "A"
+    assert memory.get(key("a")).text == "A"
+    assert cache.stats.hits == 1
+
+
+def test_semantic_cache_matches_near_duplicates():
+    cache = SemanticCache(HashingVectorizer(), threshold=0.7)
+    cache.put(key("What is the capital of France?"), CachedResponse("Paris"))
+    hit = cache.get(key("what is the capital of france"))
+    assert hit.text == "Paris" and hit.metadata["semantic_similarity"] >= 0.7
+    assert cache.get(key("How do I bake sourdough bread?")) is None
+
+
+def test_semantic_cache_is_scoped_to_model_and_prefix():
+    cache = SemanticCache(HashingVectorizer(), threshold=0.7)
+    cache.put(key("What is the capital of France?"), CachedResponse("Paris"))
+    assert cache.get(key("What is the capital of France?", model="model-b")) is None
+
+
+def test_semantic_cache_caps_index_size():
+    cache = SemanticCache(HashingVectorizer(), threshold=0.99, max_entries=3)
+    for topic in ["apples", "bananas", "cherries", "dates"]:
+        cache.put(key(f"tell me about {topic}"), CachedResponse(topic))
+    assert len(cache) == 3
+    assert cache.get(key("tell me about apples")) is None
+    assert cache.stats.evictions == 1
+
+
+def test_semantic_cache_replaces_an_exact_repeat():
+    cache = SemanticCache(HashingVectorizer(), threshold=0.99, max_entries=3)
+    for topic in ["apples", "bananas", "cherries"]:
+        cache.put(key(f"tell me about {topic}"), CachedResponse(f"old {topic}"))
+    cache.put(key("tell me about apples"), CachedResponse("new apples"))
+    assert len(cache) == 3 and cache.stats.evictions == 0
+    assert cache.get(key("tell me about apples")).text == "new apples"
+    # The replaced row was also refreshed, so bananas is now the oldest.
+    cache.put(key("tell me about dates"), CachedResponse("dates"))
+    assert cache.get(key("tell me about bananas")) is None
+    assert cache.get(key("tell me about apples")).text == "new apples"
+    assert cache.get(key("tell me about dates")).text == "dates"
+
+
+def test_exact_tier_in_front_of_semantic_tier():
+    exact = InMemoryLRUCache()
+    cache = TieredCache(exact, SemanticCache(HashingVectorizer(), threshold=0.7))
+    cache.put(key("What is the capital of France?"), CachedResponse("Paris"))
+    assert cache.get(key("what is the capital of france")).text == "Paris"
+    # The paraphrase was promoted, so the next lookup is an exact hit.
+    assert exact.get(key("what is the capital of france")) is not None
+
+
+def test_semantic_cache_compares_only_the_templated_values():
+    france, dune = agent_prompt("What is the capital of France?"), agent_prompt("Who wrote Dune?")
+    # Embedding the whole prompt, the shared boilerplate makes any two questions look alike.
+    whole = SemanticCache(HashingVectorizer(), threshold=0.9)
+    whole.put(key(france), CachedResponse("Paris"))
+    assert whole.get(key(dune)) is not None
+
+    cache = SemanticCache(HashingVectorizer(), threshold=0.7, templates=[AGENT_TEMPLATE])
+    cache.put(key(france), CachedResponse("Paris"))
+    assert cache.get(key(dune)) is None
+    assert cache.get(key(agent_prompt("what is the capital of france"))).text == "Paris"
+
+
+def test_semantic_cache_prefers_caller_supplied_text():
+    cache = SemanticCache(HashingVectorizer(), threshold=0.7)
+    cache.put(CacheKey.build("model-a", "prefix", agent_prompt("What is the capital of France?"),
+                             semantic_text="What is the capital of France?"), CachedResponse("Paris"))
+    dune = CacheKey.build("model-a", "prefix", agent_prompt("Who wrote Dune?"), semantic_text="Who wrote Dune?")
+    assert cache.get(dune) is None
+    # semantic_text is not part of the exact key.
+    assert dune == key(agent_prompt("Who wrote Dune?"))
@@ -0,0 +1,119 @@
+import asyncio
+from types import SimpleNamespace
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from llms.async_client import get_async_client
+from llms.cache import InMemoryLRUCache
+from llms.lmstudio_llm import LmstudioLLM
+
+
+class FakeModel:
+    identifier = "fake"
+
+    def respond(self, chat, config=None, on_first_token=None, **callbacks):
+        on_first_token()
+        prompt = chat._messages[-1].content[0].text
+        stats = SimpleNamespace(
+            prompt_tokens_count=len(prompt), predicted_tokens_count=3, time_to_first_token_sec=0.25, tokens_per_second=40.0
+        )
+        return SimpleNamespace(content=f"<think>...</think>echo {prompt}", stats=stats)
+
+
+class FakeClient:
+    """Usage depends on the prompt, and later prompts finish first."""
+
+    async def chat_completion(self, model, messages, stop=None, **params):
+        prompt = messages[-1]["content"]
+        await asyncio.sleep(0.01 * (5 - len(prompt)))
+        return {
+            "choices": [{"message": {"content": prompt.upper()}}],
+            "usage": {"prompt_tokens": len(prompt), "completion_tokens": 2 * len(prompt)},
+        }
+
+    async def stream_chat_completion(self, model, messages, stop=None, usage=None, **params):
+        for token in ["<think>x</think>", "Hello", " world"]:
+            yield token
+        usage.update({"prompt_tokens": 7, "completion_tokens": 3})
+
+
+class Recorder(BaseCallbackHandler):
+    def __init__(self):
+        self.results = []
+
+    def on_llm_end(self, response, **kwargs):
+        self.results.append(response)
+
+
+def make_llm(monkeypatch, **kwargs):
+    monkeypatch.setattr(LmstudioLLM, "_get_async_client", lambda self: FakeClient())
+    return LmstudioLLM.model_construct(lm_model=FakeModel(), **kwargs)
+
+
+def test_sync_call_reports_server_stats_through_callbacks(monkeypatch):
+    llm = make_llm(monkeypatch)
+    recorder = Recorder()
+    assert llm.invoke("hello", config={"callbacks": [recorder]}) == "echo hello"
+    [result] = recorder.results
+    info = result.generations[0][0].generation_info
+    assert info["prompt_tokens"] == 5 and info["completion_tokens"] == 3 and info["total_tokens"] == 8
+    assert info["time_to_first_token"] == 0.25 and info["tokens_per_second"] == 40.0
+    assert result.llm_output["token_usage"] == {"prompt_tokens": 5, "completion_tokens": 3, "total_tokens": 8}
+    assert not hasattr(llm, "last_metadata")
+
+
+def test_concurrent_calls_keep_their_own_metrics(monkeypatch):
+    llm = make_llm(monkeypatch, batch_concurrency=2)
+    prompts = ["a", "bb", "ccc", "dddd"]
+    result = asyncio.run(llm.agenerate(prompts))
+    for prompt, [generation] in zip(prompts, result.generations):
+        assert generation.text == prompt.upper()
+        assert generation.generation_info["prompt_tokens"] == len(prompt)
+        assert generation.generation_info["completion_tokens"] == 2 * len(prompt)
+        assert generation.generation_info["queue_wait"] >= 0.0
+    # Two slots: the last two prompts waited for the first two.
+    assert result.generations[3][0].generation_info["queue_wait"] > 0.0
+    assert result.llm_output["token_usage"]["prompt_tokens"] == 10
+
+
+def test_stream_and_cache_hit_metrics(monkeypatch):
+    llm = make_llm(monkeypatch, response_cache=InMemoryLRUCache())
+
+    async def stream():
+        return [chunk async for chunk in llm.astream("hi")]
+
+    assert "".join(asyncio.run(stream())) == "Hello world"
+    recorder = Recorder()
+    assert asyncio.run(llm.ainvoke("hi", config={"callbacks": [recorder]})) == "Hello world"
+    info = recorder.results[0].generations[0][0].generation_info
+    assert info["cache_hit"] and info["prompt_tokens"] == 0
+    assert info["cached_call"]["prompt_tokens"] == 7 and info["cached_call"]["completion_tokens"] == 3
+    assert info["cached_call"]["time_to_first_token"] is not None
+
+
+def test_stream_without_usage_reports_an_estimate_only(monkeypatch):
+    class NoUsageClient(FakeClient):
+        async def stream_chat_completion(self, model, messages, stop=None, usage=None, **params):
+            for token in ["Hel", "lo", " world"]:
+                yield token
+
+    monkeypatch.setattr(LmstudioLLM, "_get_async_client", lambda self: NoUsageClient())
+    llm = LmstudioLLM.model_construct(lm_model=FakeModel())
+    recorder = Recorder()
+
+    async def stream():
+        return [chunk async for chunk in llm.astream("hi", config={"callbacks": [recorder]})]
+
+    assert "".join(asyncio.run(stream())) == "Hello world"
+    info = recorder.results[0].generations[0][0].generation_info
+    # Delta counts are not token counts: kept out of the usage totals.
+    assert info["completion_tokens"] is None and info["total_tokens"] is None
+    assert info["estimated_completion_tokens"] == 3
+
+
+def test_async_clients_are_shared_per_url_and_options():
+    url = "http://localhost:1234/v1"
+    client = get_async_client(url, max_connections=8)
+    assert get_async_client(url, max_connections=8) is client
+    other = get_async_client(url, max_connections=16)
+    assert other is not client and other.limits.max_connections == 16
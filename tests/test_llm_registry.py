@@ -0,0 +1,103 @@
+import threading
+import time
+
+import lmstudio as lms
+
+from llms.lmstudio_llm import LmstudioLLM
+from llms.registry import LLMRegistry
+
+
+class FakeLLMNamespace:
+    """Stands in for ``client.llm``: lists loaded models and loads others on request."""
+
+    def __init__(self, loaded):
+        self.loaded = [lms.LLM(identifier, None) for identifier in loaded]
+        self.loading = threading.Event()
+        self.finish_loading = threading.Event()
+        self.finish_loading.set()
+        self.loads = []
+        self.listings = 0
+
+    def list_loaded(self):
+        self.listings += 1
+        time.sleep(0.05)
+        return list(self.loaded)
+
+    def model(self, identifier):
+        # Just-in-time load: slow, and only done once the test allows it.
+        self.loads.append(identifier)
+        self.loading.set()
+        assert self.finish_loading.wait(5)
+        return lms.LLM(identifier, None)
+
+
+def make_registry(loaded=("small", "medium")):
+    registry = LLMRegistry(refresh_interval=None, prompt_prefix="Be brief.")
+    registry._client = type("FakeClient", (), {"llm": FakeLLMNamespace(loaded)})()
+    return registry
+
+
+def test_llms_are_cached_per_model():
+    registry = make_registry()
+    first = registry.get_llm()
+    assert isinstance(first, LmstudioLLM) and first.lm_model.identifier == "small"
+    assert first.prompt_prefix == "Be brief."
+    assert registry.get_llm("small") is first
+    assert registry.get_llm("medium") is not first
+    assert registry.client.llm.loads == []
+
+
+def test_loading_a_model_does_not_block_other_callers():
+    registry = make_registry()
+    fake = registry.client.llm
+    fake.finish_loading.clear()
+    loaded = []
+    loader = threading.Thread(target=lambda: loaded.append(registry.get_llm("large")))
+    loader.start()
+    assert fake.loading.wait(5)
+    # While "large" is still loading, a ready model is served at once.
+    start = time.perf_counter()
+    assert registry.get_llm("small").lm_model.identifier == "small"
+    assert time.perf_counter() - start < 1.0
+    fake.finish_loading.set()
+    loader.join(5)
+    assert loaded[0].lm_model.identifier == "large"
+    assert registry.get_llm("large") is loaded[0]
+
+
+def test_concurrent_loads_of_one_model_share_one_llm():
+    registry = make_registry()
+    fake = registry.client.llm
+    fake.finish_loading.clear()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get_llm("large"))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    assert fake.loading.wait(5)
+    time.sleep(0.1)
+    fake.finish_loading.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(results) == 3 and all(llm is results[0] for llm in results)
+
+
+def test_concurrent_first_callers_list_models_once():
+    registry = make_registry()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.loaded_models())) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert registry.client.llm.listings == 1
+    assert [[model.identifier for model in models] for models in results] == [["small", "medium"]] * 4
+
+
+def test_refresh_drops_unloaded_models():
+    registry = make_registry()
+    medium = registry.get_llm("medium")
+    registry.client.llm.loaded = [lms.LLM("small", None)]
+    registry.refresh()
+    assert [model.identifier for model in registry.loaded_models()] == ["small"]
+    assert "medium" not in registry._llms
+    assert medium.lm_model.identifier == "medium"
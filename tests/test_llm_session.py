@@ -0,0 +1,134 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from llms.cache import InMemoryLRUCache
+from llms.lmstudio_llm import LmstudioLLM
+
+
+class FakeModel:
+    """Counts chat tokens as words and remembers each chat it was sent."""
+
+    identifier = "fake"
+
+    def __init__(self):
+        self.prompts = []
+
+    def respond(self, chat, config=None, **callbacks):
+        history = [(m.role, m.content[0].text) for m in chat._messages]
+        self.prompts.append(history)
+        reply = f"<think>hmm</think>reply {len(self.prompts)}"
+        stats = SimpleNamespace(
+            prompt_tokens_count=sum(len(text.split()) for _, text in history), predicted_tokens_count=len(reply.split())
+        )
+        return SimpleNamespace(content=reply, stats=stats)
+
+
+def make_llm(**kwargs):
+    return LmstudioLLM.model_construct(lm_model=FakeModel(), prompt_prefix="Be brief.", **kwargs)
+
+
+def test_session_only_appends_and_reports_reuse():
+    llm = make_llm(session_mode=True)
+    assert llm.invoke("first question") == "reply 1"
+    assert llm.invoke("second question") == "reply 2"
+    first, second = llm.lm_model.prompts
+    # The second prompt starts with the first one, byte for byte, and the raw first reply.
+    assert second[: len(first)] == first
+    assert second[len(first)] == ("assistant", "<think>hmm</think>reply 1")
+    stats = llm.chat_session.stats
+    assert stats[0].reused_tokens == 0
+    assert stats[1].reused_tokens == stats[0].prompt_tokens + stats[0].completion_tokens
+    assert stats[1].reprocessed_tokens == 2
+    assert llm.chat_session.totals()["turns"] == 2
+
+
+def test_stateless_calls_are_unchanged_and_sessions_are_independent():
+    llm = make_llm()
+    llm.invoke("one")
+    llm.invoke("two")
+    assert [len(prompt) for prompt in llm.lm_model.prompts] == [2, 2]
+    session = llm.start_session("Be verbose.")
+    session.send("three")
+    assert llm.lm_model.prompts[-1][0] == ("system", "Be verbose.")
+
+
+def test_async_session_prefers_server_reported_cached_tokens(monkeypatch):
+    sent = []
+
+    class FakeClient:
+        async def chat_completion(self, model, messages, stop=None, **params):
+            sent.append(messages)
+            usage = {"prompt_tokens": 10 * len(messages), "completion_tokens": 3}
+            if len(sent) > 1:
+                usage["prompt_tokens_details"] = {"cached_tokens": 17}
+            return {"choices": [{"message": {"content": "ok"}}], "usage": usage}
+
+    monkeypatch.setattr(LmstudioLLM, "_get_async_client", lambda self: FakeClient())
+    llm = make_llm(session_mode=True)
+
+    async def chat():
+        return [await llm.ainvoke("hello"), await llm.ainvoke("again")]
+
+    assert asyncio.run(chat()) == ["ok", "ok"]
+    assert sent[1][:3] == [*sent[0], {"role": "assistant", "content": "ok"}]
+    assert (llm.chat_session.stats[1].reused_tokens, llm.chat_session.stats[1].reported) == (17, True)
+
+
+def test_streaming_in_session_mode_goes_through_the_session(monkeypatch):
+    sent = []
+
+    class FakeClient:
+        async def chat_completion(self, model, messages, stop=None, **params):
+            sent.append(messages)
+            return {"choices": [{"message": {"content": "<think>x</think>async reply"}}],
+                    "usage": {"prompt_tokens": 5, "completion_tokens": 2}}
+
+    monkeypatch.setattr(LmstudioLLM, "_get_async_client", lambda self: FakeClient())
+    cache = InMemoryLRUCache()
+    llm = make_llm(session_mode=True, response_cache=cache)
+    assert "".join(llm.stream("first question")) == "reply 1"
+
+    async def astream():
+        return "".join([chunk async for chunk in llm.astream("second question")])
+
+    assert asyncio.run(astream()) == "async reply"
+    assert llm.invoke("third question") == "reply 2"
+    # Both streamed turns are in the chat the next call continues.
+    roles = [role for role, _ in llm.lm_model.prompts[-1]]
+    assert roles == ["system", "user", "assistant", "user", "assistant", "user"]
+    assert llm.lm_model.prompts[-1][3] == ("user", "second question")
+    assert sent[0][-1] == {"role": "user", "content": "second question"}
+    assert llm.chat_session.totals()["turns"] == 3
+    # Sessions bypass the response cache, streamed or not.
+    assert len(cache) == 0 and cache.stats.hits == cache.stats.misses == 0
+
+
+def test_sync_and_async_turns_are_recorded_in_the_order_they_ran(monkeypatch):
+    started = threading.Event()
+
+    class FakeClient:
+        async def chat_completion(self, model, messages, stop=None, **params):
+            started.set()
+            await asyncio.sleep(0.1)
+            return {"choices": [{"message": {"content": "async reply"}}], "usage": {}}
+
+    monkeypatch.setattr(LmstudioLLM, "_get_async_client", lambda self: FakeClient())
+    session = make_llm().start_session()
+    worker = threading.Thread(target=lambda: asyncio.run(session.aturn("async question")))
+    worker.start()
+    assert started.wait(5)
+    # Started while the async turn is awaiting its reply: it waits, then continues that chat.
+    assert session.send("sync question") == "reply 1"
+    worker.join(5)
+    assert [message["content"] for message in session.messages[1:]] == [
+        "async question", "async reply", "sync question", "<think>hmm</think>reply 1",
+    ]
+    assert session.llm.lm_model.prompts[0][1:3] == [("user", "async question"), ("assistant", "async reply")]
+
+    async def two_turns():
+        return await asyncio.gather(session.asend("a"), session.asend("b"))
+
+    # Contended async turns on a new event loop each time.
+    assert asyncio.run(two_turns()) == asyncio.run(two_turns()) == ["async reply", "async reply"]
+    assert session.totals()["turns"] == 6
@@ -0,0 +1,59 @@
+import threading
+
+from langchain_core.language_models.fake import FakeListLLM
+
+from agents.memory import BudgetedChatMemory, TokenBudgetMemory, llm_summarizer
+
+
+def add_turn(memory, i, tool=False):
+    memory.add({"role": "user", "content": f"question {i} " * 10})
+    if tool:
+        memory.add({"role": "assistant", "tool_calls": [{"id": f"call_{i}", "function": {"name": "lookup"}}]})
+        memory.add({"role": "tool", "content": "result " * 10, "tool_call_id": f"call_{i}"})
+    memory.add({"role": "assistant", "content": f"answer {i} " * 10})
+
+
+def test_window_stays_under_budget_and_keeps_whole_turns():
+    memory = TokenBudgetMemory(budget=300)
+    memory.add({"role": "system", "content": "You are helpful."})
+    for i in range(50):
+        add_turn(memory, i, tool=i % 2 == 0)
+        assert memory.total_tokens <= 300
+    messages = memory.messages()
+    assert messages[0] == {"role": "system", "content": "You are helpful."}
+    # The window starts at a user message, so no tool result lost its call.
+    assert messages[1]["role"] == "user"
+    assert messages[-1]["content"].startswith("answer 49")
+    assert memory.summarized_turns == 50 - memory.turns
+
+
+def test_evicted_turns_are_summarized_once_in_the_background():
+    release = threading.Event()
+    folded = []
+
+    def summarizer(summary, messages):
+        release.wait(5)
+        folded.append(len(messages))
+        return f"{summary} +{len(messages)}".strip()
+
+    memory = TokenBudgetMemory(budget=300, summarizer=summarizer, summary_budget=50)
+    for i in range(20):
+        add_turn(memory, i)
+    # Adding turns never waits on the summarizer.
+    assert memory.summary == ""
+    release.set()
+    memory.wait()
+    assert sum(folded) == 2 * memory.summarized_turns == 2 * (20 - memory.turns)
+    # Turns evicted while the first fold ran were batched into one more call.
+    assert len(folded) == 2
+    assert memory.messages()[0]["content"].startswith("Summary of the earlier conversation:")
+
+
+def test_langchain_memory_adapter():
+    llm = FakeListLLM(responses=["The user is Bob."])
+    chat_memory = BudgetedChatMemory(memory=TokenBudgetMemory(budget=120, summarizer=llm_summarizer(llm), background=False))
+    chat_memory.save_context({"input": "hi, my name is Bob " * 10}, {"output": "Hello Bob!"})
+    chat_memory.save_context({"input": "what is my name?"}, {"output": "Bob."})
+    history = chat_memory.load_memory_variables({})["chat_history"]
+    assert [type(m).__name__ for m in history] == ["SystemMessage", "HumanMessage", "AIMessage"]
+    assert history[0].content.endswith("The user is Bob.")
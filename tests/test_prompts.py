@@ -0,0 +1,51 @@
+import pytest
+from langchain_core.language_models.fake import FakeListLLM
+from langchain_core.prompts import PromptTemplate
+from langchain_core.tools import Tool
+
+from agents.advanced_agent import AdvancedAgent
+from agents.prompts import CompiledPrompt, compile_prompt
+
+
+def make_tool(name, description="Does things."):
+    return Tool(name=name, func=lambda text: text, description=description)
+
+
+@pytest.mark.parametrize("template", [
+    "User Query: {input}",
+    "{input}",
+    "Literal {{braces}} around {input} and {agent_scratchpad}",
+    "No variables at all",
+    "{input} then {input} again",
+])
+def test_render_matches_prompt_template(template):
+    prompt = PromptTemplate.from_template(template)
+    values = {name: f"<{name}>" for name in prompt.input_variables}
+    assert CompiledPrompt(prompt).render(values) == prompt.format(**values)
+
+
+def test_format_specs_fall_back_to_the_template():
+    prompt = PromptTemplate.from_template("{input:>8}|")
+    assert CompiledPrompt(prompt).render({"input": "x"}) == "       x|"
+
+
+def test_tool_block_is_baked_in_and_follows_tool_changes():
+    prompt = PromptTemplate.from_template("Tools:\n{tools}\nUse one of [{tool_names}].\n{input}")
+    first = compile_prompt(prompt, [make_tool("search"), make_tool("ppt")])
+    assert first.input_variables == ["input"]
+    assert first.render({"input": "q"}) == "Tools:\nsearch: Does things.\nppt: Does things.\nUse one of [search, ppt].\nq"
+    assert compile_prompt(prompt, [make_tool("search"), make_tool("ppt")]) is first
+    changed = compile_prompt(prompt, [make_tool("search", "Searches the web.")])
+    assert changed is not first
+    assert "search: Searches the web." in changed.render({"input": "q"})
+
+
+def test_agent_compiles_once_per_tool_set():
+    prompt = PromptTemplate.from_template("Tools: {tool_names}\nUser Query: {input}")
+    agent = AdvancedAgent(llm=FakeListLLM(responses=["done"]), tools=[make_tool("search")], prompt_template=prompt)
+    compiled = agent.compiled_prompt
+    assert agent.plan([], input="hello").return_values == {"output": "done"}
+    assert agent.compiled_prompt is compiled
+    assert compiled.render({"input": "hello", "agent_scratchpad": ""}).startswith("Tools: search\nUser Query: hello")
+    agent.tools = [make_tool("search"), make_tool("ppt")]
+    assert agent.compiled_prompt is not compiled
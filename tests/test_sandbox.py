@@ -0,0 +1,112 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from tools.persist_tools.sandbox import SandboxPool, ToolFailed, ToolTimeout
+
+TOOLS = {
+    "echo": "def echo(text):\n    return {'pid': os.getpid(), 'text': text}\n",
+    "spin": "def spin(text):\n    while True:\n        pass\n",
+    "hog": "def hog(text):\n    return len(bytearray(4 * 1024 ** 3))\n",
+    "fail": "def fail(text):\n    raise ValueError('bad ' + text)\n",
+}
+
+
+def write_registry(path, tools):
+    path.write_text(json.dumps({
+        name: {"func_name": name, "description": f"The {name} tool.", "code": code,
+               "metadata": {"imports": [{"module": "os", "as": None}]}}
+        for name, code in tools.items()
+    }))
+
+
+def wait_for(condition, seconds=30):
+    deadline = time.monotonic() + seconds
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return condition()
+
+
+@pytest.fixture(scope="module")
+def pool(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("sandbox")
+    registry = directory / "registered_tools.json"
+    write_registry(registry, TOOLS)
+    with SandboxPool(size=2, registry_path=str(registry), cache_dir=str(directory / "bytecode"),
+                     timeout=1.0, memory_limit_mb=1024) as pool:
+        yield pool
+
+
+def test_calls_run_in_warm_workers(pool):
+    result = pool.run("echo", "hi")
+    assert result["text"] == "hi" and result["pid"] in pool.pids
+    with pytest.raises(ToolFailed, match="ValueError: bad x"):
+        pool.run("fail", "x")
+    # The memory limit turns a huge allocation into an error instead of swapping the host.
+    with pytest.raises(ToolFailed, match="MemoryError"):
+        pool.run("hog", "x")
+
+
+def test_runaway_tool_times_out_without_stalling_others(pool):
+    tools = {tool.name: tool for tool in pool.tools()}
+
+    async def run():
+        spin = asyncio.ensure_future(tools["spin"].ainvoke("x"))
+        start = time.perf_counter()
+        echoed = await tools["echo"].ainvoke("still here")
+        echo_seconds = time.perf_counter() - start
+        with pytest.raises(ToolTimeout):
+            await spin
+        return echoed, echo_seconds
+
+    echoed, echo_seconds = asyncio.run(run())
+    assert echoed["text"] == "still here" and echo_seconds < 0.9
+    # The killed worker is replaced in the background.
+    wait_for(lambda: pool.stats["respawns"] >= 1)
+    assert pool.stats["timeouts"] == 1 and len(pool.pids) == 2
+    assert pool.run("echo", "again")["text"] == "again"
+
+
+def test_waits_are_bounded_and_failed_restarts_are_retried(tmp_path):
+    registry = tmp_path / "registered_tools.json"
+    write_registry(registry, TOOLS)
+    with SandboxPool(size=1, registry_path=str(registry), cache_dir=str(tmp_path / "bytecode"),
+                     timeout=0.5, acquire_timeout=0.5, memory_limit_mb=None) as pool:
+        # A tool that does not compile makes every new worker fail to start.
+        write_registry(registry, {**TOOLS, "broken": "def broken(:\n"})
+        with pytest.raises(ToolTimeout):
+            pool.run("spin", "x")
+        with pytest.raises(ToolTimeout, match="No sandbox worker"):
+            pool.run("echo", "x")
+        assert wait_for(lambda: pool.stats["respawn_failures"] >= 1)
+        # Fixed registry: the next retry brings the pool back to full size.
+        write_registry(registry, TOOLS)
+        assert wait_for(lambda: pool.stats["respawns"] == 1)
+        assert pool.run("echo", "back")["text"] == "back"
+
+        # close() wakes a caller waiting for the busy worker.
+        pool.acquire_timeout = 60.0
+        errors = []
+
+        def call(tool, **kwargs):
+            try:
+                pool.run(tool, "x", **kwargs)
+            except Exception as exc:
+                errors.append((tool, exc))
+
+        busy = threading.Thread(target=call, args=("spin",), kwargs={"timeout": 60.0})
+        busy.start()
+        assert wait_for(lambda: pool._idle.empty())
+        waiter = threading.Thread(target=call, args=("echo",))
+        waiter.start()
+        time.sleep(0.2)
+        pool.close()
+        waiter.join(5)
+        busy.join(5)
+        assert not waiter.is_alive() and not busy.is_alive()
+        # Both the waiting caller and the call in flight see the pool closing, not a crash.
+        assert isinstance(dict(errors)["echo"], RuntimeError)
+        assert isinstance(dict(errors)["spin"], RuntimeError) and "closed" in str(dict(errors)["spin"])
@@ -0,0 +1,121 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.language_models.fake import FakeListLLM
+from langchain_core.prompts import PromptTemplate
+from langchain_core.tools import Tool
+
+from agents.advanced_agent import AdvancedAgent
+from agents.serving import build_agent_pool
+import main
+
+
+def build_echo_agent(llm):
+    prompt = PromptTemplate(input_variables=["input"], template="User Query: {input}")
+    echo = Tool(name="echo", func=lambda text: text, description="Echo the input.")
+    return AdvancedAgent.create_executor(llm=llm, tools=[echo], prompt_template=prompt)
+
+
+@pytest.fixture
+def make_client():
+    clients = []
+
+    def make(max_concurrent_runs=4):
+        llm = FakeListLLM(responses=["Paris is the capital of France."])
+        main.app.state.agents = build_agent_pool(
+            llm=llm, factories={"echo": build_echo_agent}, max_concurrent_runs=max_concurrent_runs
+        )
+        client = TestClient(main.app)
+        client.__enter__()
+        clients.append(client)
+        return client
+
+    yield make
+    for client in clients:
+        client.__exit__(None, None, None)
+    main.app.state.agents = None
+
+
+def test_invoke_reuses_the_prebuilt_executor(make_client):
+    client = make_client()
+    executor = main.app.state.agents.get("echo")
+    for _ in range(3):
+        response = client.post("/agents/echo/invoke", json={"input": "Capital of France?"})
+        assert response.status_code == 200
+        assert response.json() == {"agent": "echo", "output": "Paris is the capital of France."}
+    assert main.app.state.agents.get("echo") is executor
+    assert main.app.state.agents.in_flight == 0
+
+
+def test_unknown_agent_is_404(make_client):
+    client = make_client()
+    assert client.post("/agents/nope/invoke", json={"input": "hi"}).status_code == 404
+
+
+def test_saturated_pool_returns_429(make_client):
+    client = make_client(max_concurrent_runs=1)
+    main.app.state.agents.acquire()
+    try:
+        response = client.post("/agents/echo/invoke", json={"input": "hi"})
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "1"
+        assert client.post("/agents/echo/stream", json={"input": "hi"}).status_code == 429
+    finally:
+        main.app.state.agents.release()
+    assert client.post("/agents/echo/invoke", json={"input": "hi"}).status_code == 200
+
+
+def test_stream_ends_with_the_final_output(make_client):
+    client = make_client()
+    with client.stream("POST", "/agents/echo/stream", json={"input": "Capital of France?"}) as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        body = "".join(response.iter_text())
+    events = [block.split("\n") for block in body.strip().split("\n\n")]
+    name, data = events[-1][0], json.loads(events[-1][1][len("data: "):])
+    assert name == "event: end"
+    assert data == {"agent": "echo", "output": "Paris is the capital of France."}
+    assert main.app.state.agents.in_flight == 0
+
+
+def test_drain_waits_for_in_flight_runs():
+    pool = build_agent_pool(llm=FakeListLLM(responses=["ok"]), factories={"echo": build_echo_agent})
+
+    async def scenario():
+        pool.acquire()
+        asyncio.get_running_loop().call_later(0.1, pool.release)
+        assert not await pool.drain(timeout=0.01)
+        assert await pool.drain(timeout=1.0)
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("spec_version", ["2.3", "2.4"])
+def test_stream_slot_is_released_when_client_leaves_before_first_event(make_client, spec_version):
+    make_client()
+    body = json.dumps({"input": "hi"}).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": spec_version}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": "/agents/echo/stream", "raw_path": b"/agents/echo/stream",
+        "root_path": "", "query_string": b"", "headers": [(b"content-type", b"application/json")],
+        "client": ("test", 1), "server": ("test", 80),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        # The body, then the client is gone.
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            raise OSError("connection reset")
+
+    async def scenario():
+        try:
+            await main.app(scope, receive, send)
+        except Exception:
+            pass
+
+    asyncio.run(scenario())
+    assert main.app.state.agents.in_flight == 0
@@ -0,0 +1,104 @@
+import re
+
+import pytest
+
+from llms.think_filter import ThinkTagFilter
+
+
+def reference_clean(text):
+    """Whole-response cleanup: a dangling </think> closes a block opened at the start."""
+    if "</think>" in text and "<think>" not in text:
+        text = "<think>" + text
+    return re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL).strip()
+
+
+def run_filter(text, chunk_size, **kwargs):
+    think_filter = ThinkTagFilter(**kwargs)
+    out = [think_filter.feed(text[i:i + chunk_size]) for i in range(0, len(text), chunk_size)]
+    out.append(think_filter.flush())
+    return "".join(out), think_filter
+
+
+@pytest.mark.parametrize("text", [
+    "<think>reasoning here</think>\n\nParis is the capital.",
+    "I was thinking about it</think>\nThe answer is 42.",
+    "No reasoning at all, just an answer.",
+    "Before <think>one</think> middle <think>two</think> after",
+    "   padded answer   ",
+])
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1000])
+def test_matches_blocking_cleanup(text, chunk_size):
+    streamed, _ = run_filter(text, chunk_size)
+    assert streamed == reference_clean(text)
+
+
+def test_dangling_close_tag_is_reported():
+    _, think_filter = run_filter("hidden</think>shown", 4)
+    assert think_filter.dangling
+
+
+def test_visible_text_is_released_before_stream_ends():
+    think_filter = ThinkTagFilter()
+    assert think_filter.feed("<think>plan</think>Hello") == "Hello"
+    assert think_filter.feed(" world") == " world"
+
+
+def test_pending_text_released_after_lookahead():
+    think_filter = ThinkTagFilter(max_pending_chars=10)
+    assert think_filter.feed("short") == ""
+    assert think_filter.feed(" answer without tags") == "short answer without tags"
+
+
+def test_implicit_think_suppresses_until_close_tag():
+    think_filter = ThinkTagFilter(implicit_think=True)
+    assert think_filter.feed("still thinking") == ""
+    assert think_filter.feed("</think>done") == "done"
+
+
+def test_unclosed_think_block_is_suppressed():
+    streamed, _ = run_filter("Answer<think>never closed", 3, implicit_think=False)
+    assert streamed == "Answer"
+
+
+def test_tagless_stream_is_detected_as_visible():
+    streamed, think_filter = run_filter("No reasoning at all, just an answer.", 5)
+    assert streamed == "No reasoning at all, just an answer."
+    assert think_filter.detected is False and not think_filter.dangling
+
+
+def test_leading_open_tag_is_decided_at_once():
+    think_filter = ThinkTagFilter()
+    assert think_filter.feed("\n<think>") == ""
+    assert think_filter.detected is False
+    assert think_filter.feed("plan</think>Hello") == "Hello"
+
+
+def test_close_tag_after_lookahead_never_leaks():
+    think_filter = ThinkTagFilter(max_pending_chars=10)
+    shown = [think_filter.feed(chunk) for chunk in ["reasoning that ", "runs long", " still </th", "ink>Answer"]]
+    shown.append(think_filter.flush())
+    # Text released before the tag arrived cannot be taken back, but nothing held back when it arrives is shown.
+    assert "".join(shown) == "reasoning that runs long still Answer"
+    assert "</think>" not in "".join(shown) and "</th" not in "".join(shown)
+    assert think_filter.dangling and think_filter.detected is True
+
+
+def test_stream_learns_implicit_think(monkeypatch):
+    import asyncio
+
+    from llms.lmstudio_llm import LmstudioLLM
+
+    class FakeClient:
+        async def stream_chat_completion(self, model, messages, stop=None, usage=None, **params):
+            for token in ["plan", "</think>", "Answer"]:
+                yield token
+
+    monkeypatch.setattr(LmstudioLLM, "_get_async_client", lambda self: FakeClient())
+    llm = LmstudioLLM.model_construct(lm_model=type("FakeModel", (), {"identifier": "fake"})())
+
+    async def stream():
+        return "".join([chunk async for chunk in llm.astream("hi")])
+
+    assert asyncio.run(stream()) == "Answer"
+    # Learned privately; the configured field stays on auto.
+    assert llm.implicit_think is None and llm._think_filter().state == "thinking"
@@ -0,0 +1,59 @@
+import json
+import os
+
+from tools.persist_tools.loader import DynamicToolLoader, LazyModule
+
+
+def entry(name, body, imports=(), config=None):
+    code = f"def {name}(text: str) -> str:\n    return {body}\n"
+    return {
+        "func_name": name,
+        "description": f"The {name} tool.",
+        "config": config or {},
+        "code": code,
+        "metadata": {"imports": [{"module": module, "as": alias} for module, alias in imports]},
+    }
+
+
+def write_registry(path, entries):
+    with open(path, "w") as handle:
+        json.dump(entries, handle)
+    # Distinct mtimes even on coarse-grained filesystems.
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_tools_compile_once_and_reuse_cached_bytecode(tmp_path):
+    registry = tmp_path / "registered_tools.json"
+    entries = {f"tool_{i}": entry(f"tool_{i}", f"text + '-{i}'") for i in range(20)}
+    entries["shorten"] = entry("shorten", "tw.shorten(text, 10, placeholder='...')", imports=[("textwrap", "tw")])
+    entries["configured"] = entry("configured", "os.environ['LOADER_TEST_KEY']", [("os", None)], {"LOADER_TEST_KEY": "v1"})
+    write_registry(registry, entries)
+
+    first = DynamicToolLoader(str(registry), str(tmp_path / "bytecode"))
+    tools = {tool.name: tool for tool in first.tools()}
+    # Loading the registry compiles nothing; each tool compiles on its first call.
+    assert first.stats["compiled"] == 0
+    assert tools["tool_3"].invoke("x") == "x-3"
+    assert tools["shorten"].invoke("one two three four") == "one two..."
+    assert tools["configured"].invoke("") == "v1"
+    assert first.stats == {"compiled": 3, "cache_hits": 0, "built": 3}
+
+    second = DynamicToolLoader(str(registry), str(tmp_path / "bytecode"))
+    assert [tool.invoke("y") for tool in second.tools(["tool_3", "tool_5"])] == ["y-3", "y-5"]
+    assert second.stats["compiled"] == 1 and second.stats["cache_hits"] == 1
+
+    # Only the edited entry is rebuilt and recompiled.
+    entries["tool_3"] = entry("tool_3", "text.upper()")
+    write_registry(registry, entries)
+    assert second.refresh() == ["tool_3"]
+    assert second.tool("tool_3").invoke("y") == "Y"
+    assert second.tool("tool_5").invoke("z") == "z-5"
+    assert second.stats["compiled"] == 2 and second.stats["built"] == 3
+    assert second.prune_cache() == 1
+
+
+def test_lazy_module_imports_on_first_use():
+    module = LazyModule("xml.dom.minidom")
+    assert module._loaded is None
+    assert module.dom.minidom.parseString("<a/>").documentElement.tagName == "a"
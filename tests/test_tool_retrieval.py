@@ -0,0 +1,68 @@
+from langchain_core.language_models.fake import FakeListLLM
+from langchain_core.prompts import PromptTemplate
+from langchain_core.tools import Tool
+
+from agents.advanced_agent import AdvancedAgent
+from llms.semantic_cache import HashingVectorizer
+from tools.retrieval import ToolIndex
+
+DESCRIPTIONS = {
+    "weather_forecast": "Get the weather forecast for a city.",
+    "stock_quote": "Latest stock market price for a ticker symbol.",
+    "currency_convert": "Convert an amount between two currencies.",
+    "translate_text": "Translate text into another language.",
+    "send_email": "Send an email message to a recipient.",
+    "calendar_event": "Create a calendar event at a given time.",
+}
+TOOLS = [Tool(name=name, func=lambda text: text, description=text) for name, text in DESCRIPTIONS.items()]
+
+
+def test_bm25_ranks_by_name_and_description_and_updates_incrementally():
+    index = ToolIndex(TOOLS)
+    assert index.search("what is the weather in Paris", k=1)[0][0] == "weather_forecast"
+    assert [tool.name for tool in index.select("convert 10 dollars to euros currency", k=2)][0] == "currency_convert"
+    assert index.search("email my boss", k=1)[0][0] == "send_email"
+    # No overlap at all: the first k tools rather than none.
+    assert [tool.name for tool in index.select("nothing relevant here xyz", k=3)] == list(DESCRIPTIONS)[:3]
+    index.remove("send_email")
+    index.add("send_email", "Compose and send mail.", TOOLS[4])
+    assert index.search("email", k=1)[0][0] == "send_email" and len(index) == 6
+    # The always-on tools come first and do not count against k.
+    assert [tool.name for tool in index.select("stock price", k=1, always=["translate_text"])] == [
+        "translate_text", "stock_quote"
+    ]
+
+
+def test_embeddings_blend_in_and_catalog_tools_are_built_on_selection():
+    index = ToolIndex(TOOLS, embedder=HashingVectorizer(n_features=512), vector_weight=0.5)
+    assert index.search("forecast weather", k=1)[0][0] == "weather_forecast"
+    catalog = ToolIndex.from_catalog()
+    assert "google_search" in catalog and "wikipedia_lookup" in catalog
+    assert callable(catalog._entries["create_ppt"].tool)
+    [tool] = catalog.select("generate a powerpoint presentation", k=1)
+    assert tool.name == "create_ppt"
+
+
+def test_agent_prompt_carries_only_the_selected_tools():
+    prompt = PromptTemplate.from_template("Tools:\n{tools}\n\nQuestion: {input}")
+    agent = AdvancedAgent(llm=FakeListLLM(responses=["ok"]), tools=TOOLS, prompt_template=prompt, max_tools=2)
+    rendered = agent._render_prompt([], input="translate this text to French")
+    assert "translate_text:" in rendered
+    assert sum(f"{name}:" in rendered for name in DESCRIPTIONS) == 2
+    # A query that matches nothing still gets tools.
+    fallback = agent._render_prompt([], input="xyz")
+    assert sum(f"{name}:" in fallback for name in DESCRIPTIONS) == 2
+    # Without max_tools every tool is still included.
+    full = AdvancedAgent(llm=FakeListLLM(responses=["ok"]), tools=TOOLS, prompt_template=prompt)
+    assert all(f"{name}:" in full._render_prompt([], input="hi") for name in DESCRIPTIONS)
+
+
+def test_agent_selects_only_its_own_tools_from_a_shared_index():
+    prompt = PromptTemplate.from_template("Tools:\n{tools}\n\nQuestion: {input}")
+    shared = ToolIndex(TOOLS)
+    shared.add("weather_alerts", "Severe weather alerts and weather warnings for a city.", TOOLS[0])
+    own = [tool for tool in TOOLS if tool.name != "weather_forecast"]
+    agent = AdvancedAgent(llm=FakeListLLM(responses=["ok"]), tools=own, prompt_template=prompt, max_tools=2,
+                          tool_index=shared)
+    selected = agent.select_tools("weather in Paris")
+    assert len(selected) == 2 and all(tool in own for tool in selected)
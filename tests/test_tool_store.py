@@ -0,0 +1,53 @@
+import threading
+
+from tools.persist_tools.loader import DynamicToolLoader
+from tools.persist_tools.store import ToolStore
+
+
+def entry(name, body, description):
+    return {"func_name": name, "description": description, "code": f"def {name}(text):\n    return {body}\n"}
+
+
+def test_single_tool_writes_search_and_change_log(tmp_path):
+    store = ToolStore(str(tmp_path / "tools.sqlite"))
+    seen = []
+    store.subscribe(seen.extend)
+    assert store.put("weather", entry("weather", "'sunny'", "Current weather forecast for a city."))
+    assert store.put("stocks", entry("stocks", "'up'", "Latest stock market quotes."))
+    # Writing an unchanged tool touches nothing.
+    assert not store.put("stocks", entry("stocks", "'up'", "Latest stock market quotes."))
+    assert store.put("stocks", entry("stocks", "'down'", "Latest stock market quotes and charts."))
+    assert [tool.name for tool in store.search("forecast")] == ["weather"]
+    assert [tool.name for tool in store.search("chart stock")] == ["stocks"]
+    assert store.remove("weather") and not store.remove("weather")
+    assert store.search("weather") == [] and store.names() == ["stocks"]
+    assert [(change.name, change.op) for change in seen] == [
+        ("weather", "put"), ("stocks", "put"), ("stocks", "put"), ("weather", "remove")
+    ]
+    assert [change.seq for change in store.changes_since(2)] == [3, 4]
+    store.trim_changes(keep=1)
+    assert store.changes_since(2) is None and len(store.changes_since(3)) == 1
+
+
+def test_loader_hot_reloads_only_changed_tools(tmp_path):
+    path = str(tmp_path / "tools.sqlite")
+    writer = ToolStore(path)
+    for i in range(5):
+        writer.put(f"tool_{i}", entry(f"tool_{i}", f"text + '{i}'", f"Tool number {i}."))
+
+    loader = DynamicToolLoader(path, str(tmp_path / "bytecode"))
+    assert [tool.invoke("x") for tool in loader.tools()] == [f"x{i}" for i in range(5)]
+    built = loader.stats["built"]
+
+    # Another connection, as another process would, sees writes through the watcher.
+    notified = threading.Event()
+    loader.store.subscribe(lambda changes: notified.set())
+    loader.store.watch(interval=0.05)
+    writer.put("tool_2", entry("tool_2", "text.upper()", "Tool number 2."))
+    writer.remove("tool_4")
+    assert notified.wait(5)
+    assert loader.refresh() == ["tool_2", "tool_4"]
+    assert loader.tool("tool_2").invoke("x") == "X" and "tool_4" not in loader.entries()
+    assert [tool.invoke("y") for tool in loader.tools()][:2] == ["y0", "y1"]
+    assert loader.stats["built"] == built + 1
+    loader.store.close()
@@ -0,0 +1,105 @@
+import json
+
+from tools.http_cache import HTTPCacheEntry
+from tools.implementation.wiki_tools import WikipediaFetcher
+
+ARTICLES = {f"Topic {i}": f"Intro of topic {i}." for i in range(30)}
+ARTICLES["Albert Einstein"] = "Albert Einstein was a physicist."
+ARTICLES["Mercury"] = "Mercury may refer to:"
+ARTICLES["Mercury (planet)"] = "Mercury is the first planet."
+REDIRECTS = {"Einstein": "Albert Einstein"}
+DISAMBIGUATION = {"Mercury"}
+
+
+class FakeWikipediaAPI:
+    """Answers the subset of the MediaWiki query API the fetcher uses."""
+
+    def __init__(self, search_hits=1):
+        self.calls = []
+        self.namespaces = set()
+        # Total search hits; more than gsrlimit gets a generator continuation like the live API.
+        self.search_hits = search_hits
+
+    def get_cached(self, url, params=None, namespace="default"):
+        self.calls.append(params)
+        self.namespaces.add(namespace)
+        data = self._answer(params)
+        if "generator" in params:
+            offset = params.get("gsroffset", 0) + params["gsrlimit"]
+            if offset < self.search_hits:
+                data["continue"] = {"gsroffset": offset, "continue": "gsroffset||"}
+        return HTTPCacheEntry(url, 200, {}, json.dumps(data).encode("utf-8"), 0.0, 0.0)
+
+    def _answer(self, params):
+        if "generator" in params:
+            hits = [title for title in ARTICLES if params["gsrsearch"].lower() in title.lower()]
+            hits.sort(key=lambda title: title in DISAMBIGUATION)
+            titles, normalized, redirects = hits[:1], [], []
+        else:
+            titles, normalized, redirects = [], [], []
+            for title in params["titles"].split("|"):
+                if title[0].islower():
+                    normalized.append({"from": title, "to": title[0].upper() + title[1:]})
+                    title = title[0].upper() + title[1:]
+                if title in REDIRECTS:
+                    redirects.append({"from": title, "to": REDIRECTS[title]})
+                    title = REDIRECTS[title]
+                titles.append(title)
+        pages = []
+        for index, title in enumerate(titles):
+            if title not in ARTICLES:
+                pages.append({"title": title, "missing": True})
+                continue
+            page = {"title": title, "extract": ARTICLES[title], "index": index}
+            if title in DISAMBIGUATION:
+                page["pageprops"] = {"disambiguation": ""}
+            pages.append(page)
+        return {"batchcomplete": True, "query": {"normalized": normalized, "redirects": redirects, "pages": pages}}
+
+
+def test_titles_are_fetched_in_one_batched_request():
+    api = FakeWikipediaAPI()
+    fetcher = WikipediaFetcher(client=api)
+    results = fetcher.fetch(["Topic 1", "topic 2", "Einstein", "Topic 3", "Topic 4"])
+    assert [result["title"] for result in results] == ["Topic 1", "Topic 2", "Albert Einstein", "Topic 3", "Topic 4"]
+    assert results[2]["content"] == "Albert Einstein was a physicist."
+    assert len(api.calls) == 1
+    # Through the shared HTTP cache, under the namespace with the Wikipedia TTL override.
+    assert api.namespaces == {"fetch_wikipedia_content"}
+    assert fetcher.requests_made == 1
+
+
+def test_batches_respect_the_extracts_limit():
+    api = FakeWikipediaAPI()
+    fetcher = WikipediaFetcher(client=api)
+    results = fetcher.fetch([f"Topic {i}" for i in range(25)])
+    assert all(result["status"] == "success" for result in results)
+    assert [len(call["titles"].split("|")) for call in api.calls] == [20, 5]
+
+
+def test_missing_and_disambiguation_pages_fall_back_to_search():
+    api = FakeWikipediaAPI()
+    fetcher = WikipediaFetcher(client=api)
+    planet, einstein, nothing = fetcher.fetch(["Mercury", "einst", "no such topic"])
+    assert planet["title"] == "Mercury (planet)"
+    assert einstein["title"] == "Albert Einstein"
+    assert nothing["status"] == "error"
+    assert sum("generator" in call for call in api.calls) == 3
+
+
+def test_repeated_queries_are_served_from_the_cache():
+    api = FakeWikipediaAPI()
+    fetcher = WikipediaFetcher(client=api)
+    fetcher.fetch(["Einstein", "Topic 1"])
+    results = fetcher.fetch(["Einstein", "Albert Einstein", "Topic 1", "Einstein"])
+    assert [result["title"] for result in results] == ["Albert Einstein", "Albert Einstein", "Topic 1", "Albert Einstein"]
+    assert len(api.calls) == 1
+
+
+def test_search_does_not_page_through_further_hits():
+    api = FakeWikipediaAPI(search_hits=500)
+    fetcher = WikipediaFetcher(client=api)
+    (result,) = fetcher.fetch(["einst"])
+    assert result["title"] == "Albert Einstein"
+    # One title attempt and one search; the generator's gsroffset is never followed.
+    assert len(api.calls) == 2